@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+
+# Upper bounds in seconds; spans the ~10µs compiled single-row path up to multi-second batches.
+LATENCY_BUCKETS_S = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)  # fmt: skip
+
+STAGE_HISTOGRAM = "scoring_stage_latency_seconds"
+COUNTERS = {
+    "scoring_explanation_fallbacks_total": "Predictions answered with the fallback explanation.",
+    "scoring_unavailable_total": "Scoring requests answered with 503.",
+    "scoring_queue_full_total": "Scoring requests rejected with 429 because the queue was full.",
+    "scoring_validation_errors_total": "Scoring request items that failed schema validation.",
+    "scoring_cache_hits_total": "Single scoring requests answered from the score cache.",
+    "scoring_cache_misses_total": "Single scoring requests that missed the score cache.",
+    "scoring_decision_log_dropped_total": "Decisions dropped because the log queue was full.",
+}
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds=LATENCY_BUCKETS_S):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        with self._lock:
+            counts, total = list(self.counts), 0
+        out = []
+        for bound, n in zip((*map(repr, self.bounds), "+Inf"), counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+def _labels(pairs) -> str:
+    body = ",".join(f'{k}="{v}"' for k, v in pairs)
+    return f"{{{body}}}" if body else ""
+
+
+class ScoringMetrics:
+    """Per-model, per-stage latency histograms and event counters, rendered as Prometheus text.
+
+    ``observe`` and ``inc`` are called on the request hot path: a dict lookup, a bisect and
+    an uncontended lock, on the order of a microsecond each.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_S):
+        self.buckets = tuple(buckets)
+        self._histograms: dict[tuple[str, str, str], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, model: str, stage: str, seconds: float, mode: str = "single") -> None:
+        key = (model, stage, mode)
+        hist = self._histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(key, Histogram(self.buckets))
+        hist.observe(seconds)
+
+    def inc(self, name: str, value: int = 1, **labels: str) -> None:
+        if name not in COUNTERS:
+            raise KeyError(f"Unknown counter: {name}")
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, name: str, **labels: str) -> int:
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def histogram(self, model: str, stage: str, mode: str = "single") -> Histogram | None:
+        return self._histograms.get((model, stage, mode))
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {STAGE_HISTOGRAM} Wall time per scoring stage.",
+            f"# TYPE {STAGE_HISTOGRAM} histogram",
+        ]
+        for (model, stage, mode), hist in sorted(self._histograms.items()):
+            base = (("model", model), ("stage", stage), ("mode", mode))
+            for bound, total in hist.cumulative():
+                lines.append(f"{STAGE_HISTOGRAM}_bucket{_labels((*base, ('le', bound)))} {total}")
+            lines.append(f"{STAGE_HISTOGRAM}_sum{_labels(base)} {hist.sum!r}")
+            lines.append(f"{STAGE_HISTOGRAM}_count{_labels(base)} {hist.count}")
+        with self._lock:
+            counters = sorted(self._counters.items())
+        for name, help_text in COUNTERS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+            lines += [f"{name}{_labels(labels)} {value}" for (n, labels), value in counters if n == name]
+        return "\n".join(lines) + "\n"
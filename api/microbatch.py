@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from typing import Any, Callable
+
+from starlette.concurrency import run_in_threadpool
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class BatcherStoppedError(Exception):
+    pass
+
+
+def _size_bucket(n: int) -> str:
+    upper = 1
+    while upper < n:
+        upper *= 2
+    return f"le_{upper}"
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into one vectorized model call.
+
+    Requests wait in a bounded queue; a worker takes up to ``max_batch_size`` items or
+    whatever arrived within ``max_wait_ms`` of the first one, runs ``predict_many`` in the
+    threadpool and resolves each caller's future with its own result. A lone request goes
+    through ``predict_one`` so low traffic keeps the single-row fast path.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        predict_one: Callable[[dict], dict],
+        predict_many: Callable[[list[dict]], list[dict]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_queue: int = 1024,
+        workers: int = 1,
+    ):
+        self.name = name
+        self.predict_one = predict_one
+        self.predict_many = predict_many
+        self.max_batch_size = max_batch_size
+        self.max_wait_s = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.workers = workers
+        self.running = False
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.batch_sizes: Counter = Counter()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self.running = True
+
+    async def stop(self, drain_timeout_s: float = 5.0) -> None:
+        self.running = False
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), drain_timeout_s)
+            except asyncio.TimeoutError:
+                logger.warning("%s batcher stopped with %d queued items", self.name, self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, payload: dict) -> dict:
+        if not self.running or self._queue is None:
+            raise BatcherStoppedError(self.name)
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((payload, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(self.name) from None
+        return await future
+
+    async def _collect(self) -> list[tuple[dict, asyncio.Future]]:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_s
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            batch = await self._collect()
+            payloads = [payload for payload, _ in batch]
+            try:
+                if len(payloads) == 1:
+                    results: list[Any] = [await run_in_threadpool(self.predict_one, payloads[0])]
+                else:
+                    results = await run_in_threadpool(self.predict_many, payloads)
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            finally:
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[_size_bucket(len(batch))] += 1
+                for _ in batch:
+                    self._queue.task_done()
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "batches": self.batches,
+            "items": self.items,
+            "rejected": self.rejected,
+            "mean_batch_size": round(self.items / self.batches, 3) if self.batches else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items(), key=lambda kv: int(kv[0][3:]))),
+        }
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+from typing import Callable
+
+from src.utils.io import file_fingerprint
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelWatcher:
+    """Polls a model's artifacts and hot-swaps a freshly loaded, warmed-up bundle when any changes.
+
+    ``paths`` are the model file followed by the side files its bundle loads (merchant table,
+    reference bins). Their fingerprints are combined, so one watcher, and one reload at a time,
+    covers the whole bundle. The fingerprint is read before loading: a file rewritten while the
+    bundle loads makes the next poll reload again.
+
+    Loading and warm-up run on the watcher thread, so requests keep using the current bundle
+    until ``on_swap`` replaces the reference in one assignment. In-flight requests hold on to
+    the old bundle until they finish; nothing is dropped.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        paths: str | list[str],
+        loader: Callable[[], object],
+        on_swap: Callable[[object], None],
+        poll_seconds: float = 10.0,
+        fingerprint: tuple | None = None,
+    ):
+        self.name = name
+        paths = [paths] if isinstance(paths, (str, Path)) else paths
+        self.paths = [str(Path(path)) for path in paths]
+        self.path = self.paths[0]
+        self.loader = loader
+        self.on_swap = on_swap
+        self.poll_seconds = poll_seconds
+        self.reloads = 0
+        self.last_error: str | None = None
+        self.fingerprint = fingerprint
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._reload_lock = threading.Lock()
+
+    def current_fingerprint(self) -> tuple:
+        return tuple(file_fingerprint(path) for path in self.paths)
+
+    def check_once(self) -> bool:
+        with self._reload_lock:
+            fingerprint = self.current_fingerprint()
+            # Side files may be absent; the model file itself must exist.
+            if fingerprint[0] is None or fingerprint == self.fingerprint:
+                return False
+            try:
+                bundle = self.loader()
+                bundle.warm_up()
+            except Exception as exc:
+                # Keep serving the current model; retry on the next poll.
+                self.last_error = f"{type(exc).__name__}: {exc}"
+                logger.exception("Failed to reload %s model from %s", self.name, self.paths)
+                return False
+            self.on_swap(bundle)
+            self.fingerprint = fingerprint
+            self.reloads += 1
+            self.last_error = None
+            version = getattr(bundle, "version", "?")
+            logger.info("Swapped in %s model version %s", self.name, version)
+            return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self.check_once()
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-model-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_seconds + 1)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "paths": self.paths,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "poll_seconds": self.poll_seconds,
+        }
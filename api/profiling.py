@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable
+
+# Leaf functions of threads parked on a lock, queue or selector; their samples are dropped.
+IDLE_LEAVES = frozenset({"wait", "get", "select", "poll", "_worker", "sleep", "accept"})
+
+
+class SamplingProfiler:
+    """Samples the Python stack of one thread at a fixed interval while active.
+
+    Used as a context manager around one request, whose work runs through ``call`` so only
+    the thread doing it is sampled, not other requests served meanwhile. ``folded()`` returns
+    the stacks in ``root;...;leaf count`` form, which flamegraph.pl and speedscope read directly.
+    """
+
+    def __init__(self, interval_ms: float = 1.0, max_depth: int = 64):
+        self.interval_s = interval_ms / 1000
+        self.max_depth = max_depth
+        self.samples = 0
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._target: int | None = None  # ident of the thread running ``call``
+
+    def __enter__(self) -> SamplingProfiler:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(*args)`` on the calling thread, sampling that thread while it runs."""
+        self._target = threading.get_ident()
+        try:
+            return fn(*args)
+        finally:
+            self._target = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            target = self._target
+            if target is None:
+                continue
+            frame = sys._current_frames().get(target)
+            if frame is None or frame.f_code.co_name in IDLE_LEAVES:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {n}\n" for stack, n in self.stacks.most_common())
+
+    def write(self, out_dir: str | Path, label: str) -> Path:
+        path = Path(out_dir) / f"{label}-{time.time_ns()}.folded"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.folded())
+        return path
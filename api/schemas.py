@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import datetime
 from typing import Any
 
 from pydantic import BaseModel, Field
@@ -11,9 +12,11 @@ class FraudRequest(BaseModel):
     transaction_hour: int = Field(ge=0, le=23)
     merchant_category: str
     geo_distance_km: float = Field(ge=0)
-    txn_count_1h: int = Field(ge=0)
-    txn_count_24h: int = Field(ge=0)
+    # Velocity counters are computed by the online feature store when omitted.
+    txn_count_1h: int | None = Field(default=None, ge=0)
+    txn_count_24h: int | None = Field(default=None, ge=0)
     device_change_flag: int = Field(ge=0, le=1)
+    transaction_ts: datetime | None = None
 
 
 class CreditRiskRequest(BaseModel):
@@ -27,6 +30,8 @@ class CreditRiskRequest(BaseModel):
     dpd_m2: int = Field(ge=0)
     dpd_m3: int = Field(ge=0)
     loan_tenure_months: int = Field(gt=0)
+    # Looked up in the merchant risk table saved with the credit model.
+    merchant_category: str = "not_applicable"
 
 
 class PredictionResponse(BaseModel):
@@ -34,3 +39,16 @@ class PredictionResponse(BaseModel):
     threshold: float
     decision: str
     explanation: list[dict[str, Any]]
+    explanation_latency_ms: float | None = None
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    result: PredictionResponse | None = None
+    error: str | None = None
+
+
+class BatchPredictionResponse(BaseModel):
+    n_items: int
+    n_failed: int
+    results: list[BatchItemResult]
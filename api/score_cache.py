@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def cache_key(namespace: str, payload: dict[str, Any], version: str | None) -> str:
+    """Canonical hash of a validated request: sorted keys, fixed separators, model version mixed in."""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(f"{namespace}|{version}|{body}".encode(), digest_size=16).hexdigest()
+
+
+class _FileTier:
+    """One JSON file per key in a directory shared by every worker on the node (e.g. /dev/shm).
+
+    Writes go through a temp file and ``os.replace`` so readers never see a partial entry.
+    Expired files are swept every ``sweep_every`` writes; the oldest go first beyond ``max_entries``.
+    """
+
+    def __init__(self, directory: str | Path, max_entries: int, sweep_every: int = 1000):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.sweep_every = sweep_every
+        self._writes = 0
+
+    def get(self, key: str, now: float) -> tuple[Any, float] | None:
+        try:
+            entry = json.loads((self.directory / key).read_text())
+        except (OSError, ValueError):
+            return None
+        return (entry["value"], entry["expires_at"]) if entry["expires_at"] > now else None
+
+    def put(self, key: str, value: Any, expires_at: float) -> None:
+        tmp = self.directory / f".{key}.{os.getpid()}.tmp"
+        try:
+            tmp.write_text(json.dumps({"expires_at": expires_at, "value": value}))
+            os.replace(tmp, self.directory / key)
+        except OSError as exc:
+            logger.warning("Shared score cache write failed: %s", exc)
+            return
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep(time.time())
+
+    def sweep(self, now: float) -> int:
+        removed, live = 0, []
+        for path in self.directory.iterdir():
+            try:
+                mtime = path.stat().st_mtime
+                if path.name.startswith(".") or json.loads(path.read_text())["expires_at"] <= now:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+                else:
+                    live.append((mtime, path))
+            except (OSError, ValueError, KeyError):
+                continue
+        for _, path in sorted(live)[: max(len(live) - self.max_entries, 0)]:
+            path.unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+class ScoreCache:
+    """Bounded LRU + TTL cache of scoring responses for retried, byte-for-byte identical requests.
+
+    The in-process tier is an ``OrderedDict`` guarded by a lock. With ``shared_dir`` set, misses
+    fall through to a file tier that all uvicorn workers on the node read and write, and shared
+    hits are promoted into the local tier. Keys include the model version, so entries from a
+    previous model never match; ``clear`` drops them eagerly on reload.
+    """
+
+    def __init__(
+        self, max_entries: int = 10_000, ttl_seconds: float = 30.0, shared_dir: str | None = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.shared = _FileTier(shared_dir, max_entries) if shared_dir else None
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.shared_hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+                self.expirations += 1
+        if self.shared is not None:
+            shared = self.shared.get(key, now)
+            if shared is not None:
+                # Keep the writer's expiry so promotion never extends an entry's lifetime.
+                self._store(key, *shared)
+                with self._lock:
+                    self.shared_hits += 1
+                return shared[0]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _store(self, key: str, value: Any, expires_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, key: str, value: Any) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        self._store(key, value, expires_at)
+        if self.shared is not None:
+            self.shared.put(key, value, expires_at)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "shared_dir": str(self.shared.directory) if self.shared is not None else None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+        }
@@ -1,42 +1,594 @@
 from __future__ import annotations
 
+import os
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
 
 import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, Header, HTTPException, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, ValidationError
+from starlette.concurrency import run_in_threadpool
 
-from api.schemas import CreditRiskRequest, FraudRequest, PredictionResponse
-from src.explainability.shap_explainer import local_explanation
+from api.metrics import ScoringMetrics
+from api.microbatch import BatcherStoppedError, MicroBatcher, QueueFullError
+from api.model_registry import ModelWatcher
+from api.profiling import SamplingProfiler
+from api.score_cache import ScoreCache, cache_key
+from api.schemas import (
+    BatchPredictionResponse,
+    CreditRiskRequest,
+    FraudRequest,
+    PredictionResponse,
+)
+from src.drift_detection.online import OnlineDriftMonitor
+from src.drift_detection.reference_bins import load_reference_bins
+from src.explainability.compliance_pack import load_compliance_summary
+from src.explainability.shap_explainer import CachedExplainer
+from src.feature_engineering.features import serving_merchant_risk
+from src.feature_engineering.target_encoding import TargetEncodingTable
+from src.feature_engineering.online_store import VelocityFeatureStore
+from src.inference.compiled_scorer import CompiledScorer
+from src.inference.decision_log import DecisionLog
+from src.inference.warmup import synthetic_payload
 from src.utils.config import load_yaml
-from src.utils.io import load_joblib
+from src.utils.io import file_digest, file_fingerprint, load_joblib
+from src.utils.resources import current_rss_mb
 
-cfg = load_yaml("configs/api.yaml")
-app = FastAPI(title=cfg["service"]["name"], version=cfg["service"]["version"])
+cfg = load_yaml(os.environ.get("API_CONFIG", "configs/api.yaml"))
+
+
+def _load_velocity_store() -> VelocityFeatureStore:
+    snapshot = Path(cfg["feature_store"]["snapshot_path"])
+    if snapshot.exists():
+        return VelocityFeatureStore.load(snapshot)
+    return VelocityFeatureStore(cfg["feature_store"]["windows"])
+
+
+velocity_store = VelocityFeatureStore(cfg["feature_store"]["windows"])
+metrics = ScoringMetrics()
+_cache_cfg = cfg["score_cache"]
+# One cache per model so a reload only drops that model's entries.
+score_caches = {
+    name: ScoreCache(
+        _cache_cfg["max_entries"],
+        _cache_cfg["ttl_seconds"],
+        f"{_cache_cfg['shared_dir']}/{name}" if _cache_cfg["shared_dir"] else None,
+    )
+    for name in ("fraud", "credit")
+}
+_log_cfg = cfg["decision_log"]
+# Shared by both models; records carry the model name. Started and drained by the lifespan hook.
+decision_log = (
+    DecisionLog(**{k: v for k, v in _log_cfg.items() if k != "enabled"})
+    if _log_cfg["enabled"]
+    else None
+)
+startup_state: dict[str, Any] = {"ready": False, "load_seconds": None, "warmup_seconds": None}
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    global fraud_model, credit_model, velocity_store
+    # Models and feature state load here rather than at import so the process starts quickly;
+    # anything already loaded (e.g. injected by tests) is kept.
+    start = time.perf_counter()
+    if decision_log is not None:
+        decision_log.start()
+    if fraud_model.pipe is None:
+        fraud_model = await run_in_threadpool(_load_fraud_model)
+    if credit_model.pipe is None:
+        credit_model = await run_in_threadpool(_load_credit_model)
+    if len(velocity_store) == 0:
+        velocity_store = await run_in_threadpool(_load_velocity_store)
+    fraud_watcher.fingerprint = fraud_model.source_fingerprint(fraud_watcher.paths)
+    credit_watcher.fingerprint = credit_model.source_fingerprint(credit_watcher.paths)
+    loaded = time.perf_counter()
+    for bundle in (fraud_model, credit_model):
+        await run_in_threadpool(bundle.warm_up)
+    startup_state["load_seconds"] = round(loaded - start, 3)
+    startup_state["warmup_seconds"] = round(time.perf_counter() - loaded, 3)
+
+    if cfg["micro_batching"]["enabled"]:
+        for batcher in (fraud_batcher, credit_batcher):
+            await batcher.start()
+    if cfg["model_reload"]["enabled"]:
+        for watcher in (fraud_watcher, credit_watcher):
+            watcher.start()
+    startup_state["ready"] = True
+    yield
+    startup_state["ready"] = False
+    for watcher in (fraud_watcher, credit_watcher):
+        watcher.stop()
+    for batcher in (fraud_batcher, credit_batcher):
+        if batcher.running:
+            await batcher.stop()
+    if decision_log is not None:
+        # Queued decisions are written before the process exits.
+        await run_in_threadpool(decision_log.stop)
+    velocity_store.snapshot(cfg["feature_store"]["snapshot_path"])
+
+
+app = FastAPI(title=cfg["service"]["name"], version=cfg["service"]["version"], lifespan=lifespan)
 
 
 class ModelBundle:
-    def __init__(self, path: str, threshold: float = 0.5):
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.5,
+        mmap_mode: str | None = None,
+        load: bool = True,
+        name: str = "model",
+        merchant_risk_path: str | None = None,
+        reference_bins_path: str | None = None,
+        compliance_summary_path: str | None = None,
+        decision_log: DecisionLog | None = None,
+    ):
+        self.name = name
         self.path = Path(path)
         self.threshold = threshold
-        self.pipe = load_joblib(path) if self.path.exists() else None
+        self.fingerprint = file_fingerprint(self.path) if load else None
+        self.pipe = None
+        self.version = self.loaded_at = None
+        self.input_columns: frozenset[str] = frozenset()
+        if self.fingerprint is not None:
+            self.pipe = load_joblib(path, mmap_mode=mmap_mode)
+            self.input_columns = frozenset(self.pipe.named_steps["prep"].feature_names_in_)
+            self.version = file_digest(self.path)
+            self.loaded_at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        self.merchant_risk: TargetEncodingTable | None = None
+        self.merchant_risk_fingerprint = (
+            file_fingerprint(merchant_risk_path) if merchant_risk_path else None
+        )
+        if load and self.merchant_risk_fingerprint is not None:
+            self.merchant_risk = TargetEncodingTable.load(merchant_risk_path)
+        # Everything a cached response depends on besides the request itself.
+        self.cache_version = self.version
+        if self.merchant_risk is not None:
+            self.cache_version = f"{self.version}:{file_digest(Path(merchant_risk_path))}"
+        self.drift_reference_fingerprint = (
+            file_fingerprint(reference_bins_path) if reference_bins_path else None
+        )
+        self.drift: OnlineDriftMonitor | None = None
+        if self.pipe is not None and self.drift_reference_fingerprint is not None:
+            self.drift = OnlineDriftMonitor(
+                load_reference_bins(reference_bins_path),
+                features=list(self.pipe.named_steps["prep"].feature_names_in_),
+                windows={w: pd.Timedelta(w).total_seconds() for w in cfg["drift"]["windows"]},
+                bucket_seconds=cfg["drift"]["bucket_seconds"],
+            )
+        # Fingerprints of the files this bundle was built from, as its model watcher sees them.
+        sources = [
+            (path, self.fingerprint),
+            (merchant_risk_path, self.merchant_risk_fingerprint),
+            (reference_bins_path, self.drift_reference_fingerprint),
+        ]
+        self._sources = {str(Path(p)): fp for p, fp in sources if p is not None}
+        self.compliance_summary_path = compliance_summary_path
+        self.decision_log = decision_log
+        self._compliance_summary: tuple[Any, dict | None] = (None, None)
+        # Single-row fast path; falls back to the sklearn pipeline when steps are unsupported.
+        self.scorer = CompiledScorer.from_pipeline(self.pipe) if self.pipe is not None else None
+        self.explainer = (
+            CachedExplainer(self.pipe, top_n=cfg["explainability"]["top_features"])
+            if self.pipe is not None
+            else None
+        )
 
-    def predict(self, payload: dict) -> dict:
+    def warm_up(self) -> None:
+        """Run one synthetic single and batch prediction so lazy initialisation happens off the hot path."""
         if self.pipe is None:
+            return
+        payload = synthetic_payload(self.pipe)
+        # Synthetic rows would skew the live drift histograms and do not belong in the audit log.
+        drift, self.drift = self.drift, None
+        decision_log, self.decision_log = self.decision_log, None
+        try:
+            self.predict(payload)
+            self.predict_batch([payload, payload])
+        finally:
+            self.drift = drift
+            self.decision_log = decision_log
+
+    def source_fingerprint(self, paths: list[str]) -> tuple:
+        return tuple(self._sources.get(str(Path(path))) for path in paths)
+
+    def info(self) -> dict:
+        return {
+            "path": str(self.path),
+            "threshold": self.threshold,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "merchant_risk": self.merchant_risk.info() if self.merchant_risk is not None else None,
+        }
+
+    def compliance_summary(self) -> dict | None:
+        """Training-time global SHAP summary of this model version, re-read when the file changes.
+
+        The summary is written after the model, so a freshly reloaded model may briefly have none.
+        """
+        path = self.compliance_summary_path
+        fingerprint = file_fingerprint(path) if path and self.version else None
+        if fingerprint is None:
+            return None
+        if fingerprint != self._compliance_summary[0]:
+            summary = load_compliance_summary(path)
+            if summary.get("model_version") != self.version:
+                summary = None  # written for another model version
+            self._compliance_summary = (fingerprint, summary)
+        return self._compliance_summary[1]
+
+    def _ensure_loaded(self) -> None:
+        if self.pipe is None:
+            metrics.inc("scoring_unavailable_total", model=self.name, reason="model_not_loaded")
             raise HTTPException(status_code=503, detail=f"Model not loaded: {self.path}")
-        row = pd.DataFrame([payload])
-        score = float(self.pipe.predict_proba(row)[:, 1][0])
+
+    def _response(self, score: float, explanation: list[dict[str, Any]], explain_ms: float | None) -> dict:
         decision = "high_risk" if score >= self.threshold else "low_risk"
-        explanation = local_explanation(self.pipe, row, top_n=cfg["explainability"]["top_features"])
         return {
             "score": round(score, 6),
             "threshold": self.threshold,
             "decision": decision,
             "explanation": explanation,
+            "explanation_latency_ms": explain_ms,
         }
 
+    def _record(self, mode: str, t0: float, t1: float, t2: float, t3: float, explanations) -> None:
+        metrics.observe(self.name, "transform", t1 - t0, mode)
+        metrics.observe(self.name, "predict", t2 - t1, mode)
+        metrics.observe(self.name, "explain", t3 - t2, mode)
+        # Fallback is all-or-nothing per explainer call, so the first row tells for the batch.
+        if explanations and explanations[0] and "note" in explanations[0][0]:
+            metrics.inc("scoring_explanation_fallbacks_total", len(explanations), model=self.name)
+
+    def _log_decisions(self, mode: str, payloads: list[dict], responses: list[dict]) -> None:
+        # Only queues the records; the log's writer thread does the encoding and disk I/O.
+        ts = time.time()
+        records = [
+            {
+                "ts": ts,
+                "model": self.name,
+                "version": self.version,
+                "mode": mode,
+                "request": payload,
+                "score": response["score"],
+                "threshold": response["threshold"],
+                "decision": response["decision"],
+                "explanation": response["explanation"],
+            }
+            for payload, response in zip(payloads, responses)
+        ]
+        accepted = self.decision_log.extend(records)
+        dropped = len(records) - accepted
+        if dropped:
+            metrics.inc("scoring_decision_log_dropped_total", dropped, model=self.name)
+
+    def predict(self, payload: dict) -> dict:
+        self._ensure_loaded()
+        t0 = time.perf_counter()
+        if self.scorer is not None:
+            X = self.scorer.transform(payload).reshape(1, -1)
+            t1 = time.perf_counter()
+            score = self.scorer.score_vector(X[0])
+        else:
+            X = self.pipe.named_steps["prep"].transform(pd.DataFrame([payload]))
+            t1 = time.perf_counter()
+            score = float(self.pipe.named_steps["model"].predict_proba(X)[:, 1][0])
+        t2 = time.perf_counter()
+        explanations = self.explainer.explain_matrix(X, scores=[score])
+        t3 = time.perf_counter()
+        self._record("single", t0, t1, t2, t3, explanations)
+        if self.drift is not None:
+            self.drift.observe(payload, score)
+        response = self._response(score, explanations[0], round((t3 - t2) * 1000, 3))
+        if self.decision_log is not None:
+            self._log_decisions("single", [payload], [response])
+        return response
+
+    def predict_batch(self, payloads: list[dict]) -> list[dict]:
+        self._ensure_loaded()
+        if not payloads:
+            return []
+        t0 = time.perf_counter()
+        frame = pd.DataFrame(payloads)
+        X = self.pipe.named_steps["prep"].transform(frame)
+        t1 = time.perf_counter()
+        scores = self.pipe.named_steps["model"].predict_proba(X)[:, 1]
+        t2 = time.perf_counter()
+        explanations = self.explainer.explain_matrix(X, scores=scores)
+        t3 = time.perf_counter()
+        self._record("batch", t0, t1, t2, t3, explanations)
+        if self.drift is not None:
+            self.drift.observe_frame(frame, scores)
+        # One explainer call covers the batch; report its cost amortized per item.
+        explain_ms = round((t3 - t2) * 1000 / len(payloads), 3)
+        responses = [self._response(float(s), e, explain_ms) for s, e in zip(scores, explanations)]
+        if self.decision_log is not None:
+            self._log_decisions("batch", payloads, responses)
+        return responses
+
+
+def _reference_bins_path(name: str) -> str | None:
+    return cfg["drift"]["reference_bins_paths"][name] if cfg["drift"]["enabled"] else None
+
+
+def _load_fraud_model() -> ModelBundle:
+    mmap_mode = cfg["model_reload"]["mmap_mode"]
+    return ModelBundle(
+        cfg["model_paths"]["fraud"],
+        threshold=cfg["thresholds"]["fraud"],
+        mmap_mode=mmap_mode,
+        name="fraud",
+        reference_bins_path=_reference_bins_path("fraud"),
+        compliance_summary_path=cfg["explainability"]["compliance_summary_paths"]["fraud"],
+        decision_log=decision_log,
+    )
+
+
+def _load_credit_model() -> ModelBundle:
+    mmap_mode = cfg["model_reload"]["mmap_mode"]
+    return ModelBundle(
+        cfg["model_paths"]["credit"],
+        threshold=cfg["thresholds"]["credit"],
+        mmap_mode=mmap_mode,
+        name="credit",
+        merchant_risk_path=cfg["merchant_risk_paths"]["credit"],
+        reference_bins_path=_reference_bins_path("credit"),
+        compliance_summary_path=cfg["explainability"]["compliance_summary_paths"]["credit"],
+        decision_log=decision_log,
+    )
+
+
+# Placeholders until the lifespan hook loads the artifacts.
+fraud_model = ModelBundle(
+    cfg["model_paths"]["fraud"], threshold=cfg["thresholds"]["fraud"], load=False, name="fraud"
+)
+credit_model = ModelBundle(
+    cfg["model_paths"]["credit"], threshold=cfg["thresholds"]["credit"], load=False, name="credit"
+)
+
+
+def _swap_fraud_model(bundle: ModelBundle) -> None:
+    global fraud_model
+    fraud_model = bundle
+    score_caches["fraud"].clear()
+
+
+def _swap_credit_model(bundle: ModelBundle) -> None:
+    global credit_model
+    credit_model = bundle
+    score_caches["credit"].clear()
+
+
+def _watched_paths(name: str) -> list[str]:
+    # Training writes the model, then the merchant table and reference bins; incremental merchant
+    # risk updates rewrite only the table. Any of them changing reloads the whole bundle.
+    paths = [cfg["model_paths"][name]]
+    if name in cfg["merchant_risk_paths"]:
+        paths.append(cfg["merchant_risk_paths"][name])
+    if cfg["drift"]["enabled"]:
+        paths.append(cfg["drift"]["reference_bins_paths"][name])
+    return paths
+
+
+# One watcher per model, so its reloads never overlap and the last swap is always the newest.
+fraud_watcher = ModelWatcher(
+    "fraud",
+    _watched_paths("fraud"),
+    _load_fraud_model,
+    _swap_fraud_model,
+    poll_seconds=cfg["model_reload"]["poll_seconds"],
+)
+credit_watcher = ModelWatcher(
+    "credit",
+    _watched_paths("credit"),
+    _load_credit_model,
+    _swap_credit_model,
+    poll_seconds=cfg["model_reload"]["poll_seconds"],
+)
+
+
+_batching = {k: v for k, v in cfg["micro_batching"].items() if k != "enabled"}
+# The lambdas look the bundle up at call time, so a replaced module-level model is picked up.
+fraud_batcher = MicroBatcher(
+    "fraud",
+    predict_one=lambda payload: fraud_model.predict(payload),
+    predict_many=lambda payloads: fraud_model.predict_batch(payloads),
+    **_batching,
+)
+credit_batcher = MicroBatcher(
+    "credit",
+    predict_one=lambda payload: credit_model.predict(payload),
+    predict_many=lambda payloads: credit_model.predict_batch(payloads),
+    **_batching,
+)
+
+
+async def _score(batcher: MicroBatcher, payload: dict) -> dict:
+    if not batcher.running:
+        return await run_in_threadpool(batcher.predict_one, payload)
+    try:
+        return await batcher.submit(payload)
+    except QueueFullError:
+        metrics.inc("scoring_queue_full_total", model=batcher.name)
+        raise HTTPException(status_code=429, detail="Scoring queue full", headers={"Retry-After": "1"})
+    except BatcherStoppedError:
+        metrics.inc("scoring_unavailable_total", model=batcher.name, reason="shutting_down")
+        raise HTTPException(status_code=503, detail="Scoring service is shutting down")
+
+
+def _validate(name: str, schema: type[BaseModel], body: Any) -> BaseModel:
+    try:
+        return schema.model_validate(body)
+    except ValidationError as exc:
+        metrics.inc("scoring_validation_errors_total", model=name)
+        # Same 422 body FastAPI produces when it validates a typed parameter itself.
+        raise RequestValidationError(
+            [{**err, "loc": ("body", *err["loc"])} for err in exc.errors(include_url=False)]
+        )
+
+
+def _truthy(header: str | None) -> bool:
+    return header is not None and header.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _cacheable(request: BaseModel, idempotency_key: str | None) -> bool:
+    # A fraud request without a timestamp or idempotency key cannot be told apart from a new,
+    # identical charge (a card-testing burst): each one must be scored and counted.
+    if isinstance(request, FraudRequest):
+        return request.transaction_ts is not None or bool(idempotency_key)
+    return True
 
-fraud_model = ModelBundle(cfg["model_paths"]["fraud"], threshold=0.6)
-credit_model = ModelBundle(cfg["model_paths"]["credit"], threshold=0.55)
+
+async def _serve(
+    name: str,
+    bundle: ModelBundle,
+    batcher: MicroBatcher,
+    schema,
+    to_payload,
+    body: Any,
+    response: Response,
+    profile: str | None,
+    idempotency_key: str | None = None,
+) -> dict:
+    # Validation runs here rather than in FastAPI's parameter parsing so it can be timed.
+    start = time.perf_counter()
+    request = _validate(name, schema, body)
+    validated = time.perf_counter()
+    metrics.observe(name, "validation", validated - start)
+
+    # Retries of an identical request are answered from the cache before any side effects
+    # (such as the velocity store update), so a retried transaction is only counted once.
+    # Profiled requests always run the model.
+    profiling = _truthy(profile) and cfg["profiling"]["enabled"]
+    key = None
+    if (
+        _cache_cfg["enabled"]
+        and bundle.cache_version is not None
+        and not profiling
+        and _cacheable(request, idempotency_key)
+    ):
+        identity = request.model_dump(mode="json")
+        if idempotency_key:
+            # Two charges with the same body but different keys are different transactions.
+            identity["__idempotency_key__"] = idempotency_key
+        key = cache_key(name, identity, bundle.cache_version)
+        cached = score_caches[name].get(key)
+        if cached is not None:
+            metrics.inc("scoring_cache_hits_total", model=name)
+            metrics.observe(name, "total", time.perf_counter() - start)
+            return cached
+        metrics.inc("scoring_cache_misses_total", model=name)
+
+    payload = to_payload(request)
+    featured = time.perf_counter()
+    try:
+        if profiling:
+            # Scored alone on a threadpool thread, outside the batcher, so the samples are its own.
+            with SamplingProfiler(cfg["profiling"]["interval_ms"]) as profiler:
+                result = await run_in_threadpool(profiler.call, batcher.predict_one, payload)
+            path = await run_in_threadpool(profiler.write, cfg["profiling"]["output_dir"], name)
+            response.headers["X-Profile-Path"] = str(path)
+        else:
+            result = await _score(batcher, payload)
+    except Exception:
+        _revert_payload(request)
+        raise
+    if key is not None:
+        score_caches[name].put(key, result)
+    done = time.perf_counter()
+    metrics.observe(name, "features", featured - validated)
+    metrics.observe(name, "score", done - featured)
+    metrics.observe(name, "total", done - start)
+    return result
+
+
+def _event_ns(request: FraudRequest) -> int | None:
+    ts = request.transaction_ts
+    return pd.Timestamp(ts).value if ts is not None else None
+
+
+def _fraud_payload(request: FraudRequest) -> dict:
+    payload = request.model_dump()
+    del payload["transaction_ts"]
+    velocity = velocity_store.update(payload["customer_id"], payload["amount"], _event_ns(request))
+    # Counts the caller omitted, plus store features the model takes that the API does not
+    # accept (such as txn_amount_7d).
+    for col, value in velocity.items():
+        if payload.get(col) is None and (col in payload or col in fraud_model.input_columns):
+            payload[col] = value
+    return payload
+
+
+def _revert_payload(request: BaseModel) -> None:
+    # A request that was not scored (429, 503, model error) must not count towards velocity:
+    # the client retries it, and only successful responses are cached.
+    if isinstance(request, FraudRequest):
+        velocity_store.revert(request.customer_id, request.amount, _event_ns(request))
+
+
+def _credit_payload(request: CreditRiskRequest) -> dict:
+    payload = request.model_dump()
+    payload["income_to_emi_ratio"] = payload["monthly_income"] / max(payload["monthly_emi"], 1)
+    payload["utilization_ratio"] = payload["credit_used"] / max(payload["credit_limit"], 1)
+    payload["delinquency_trend_90d"] = (payload["dpd_m1"] + payload["dpd_m2"] + payload["dpd_m3"]) / 3
+    payload["label_proxy"] = 0
+    payload["merchant_risk_score"] = serving_merchant_risk(payload, credit_model.merchant_risk)
+    return payload
+
+
+def _format_validation_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'item'}: {err['msg']}" for err in exc.errors()
+    )
+
+
+def _predict_batch(bundle: ModelBundle, schema: type[BaseModel], items: list[Any], to_payload) -> dict:
+    max_items = cfg["batch"]["max_items"]
+    if len(items) > max_items:
+        raise HTTPException(status_code=413, detail=f"Batch of {len(items)} exceeds limit of {max_items}")
+
+    start = time.perf_counter()
+    results: list[dict] = [{"index": i} for i in range(len(items))]
+    valid_idx, requests = [], []
+    for i, item in enumerate(items):
+        try:
+            requests.append(schema.model_validate(item))
+            valid_idx.append(i)
+        except ValidationError as exc:
+            results[i]["error"] = _format_validation_error(exc)
+    validated = time.perf_counter()
+    payloads = [to_payload(request) for request in requests]
+    featured = time.perf_counter()
+
+    try:
+        predictions = bundle.predict_batch(payloads)
+    except Exception:
+        for request in requests:
+            _revert_payload(request)
+        raise
+    for i, prediction in zip(valid_idx, predictions):
+        results[i]["result"] = prediction
+    done = time.perf_counter()
+
+    name = bundle.name
+    if len(valid_idx) < len(items):
+        metrics.inc("scoring_validation_errors_total", len(items) - len(valid_idx), model=name)
+    metrics.observe(name, "validation", validated - start, "batch")
+    metrics.observe(name, "features", featured - validated, "batch")
+    metrics.observe(name, "score", done - featured, "batch")
+    metrics.observe(name, "total", done - start, "batch")
+
+    return {
+        "n_items": len(items),
+        "n_failed": len(items) - len(valid_idx),
+        "results": results,
+    }
 
 
 @app.get("/health")
@@ -44,6 +596,15 @@ def health() -> dict:
     return {"status": "ok", "models_loaded": bool(fraud_model.pipe and credit_model.pipe)}
 
 
+@app.get("/ready")
+def ready(response: Response) -> dict:
+    # Readiness: only true once startup warm-up finished and both models are loaded.
+    is_ready = bool(startup_state["ready"] and fraud_model.pipe and credit_model.pipe)
+    if not is_ready:
+        response.status_code = 503
+    return {**startup_state, "ready": is_ready}
+
+
 @app.get("/model-info")
 def model_info() -> dict:
     return {
@@ -51,20 +612,123 @@ def model_info() -> dict:
         "credit_model_path": str(credit_model.path),
         "fraud_threshold": fraud_model.threshold,
         "credit_threshold": credit_model.threshold,
+        "models": {"fraud": fraud_model.info(), "credit": credit_model.info()},
+        "reload": {"fraud": fraud_watcher.stats(), "credit": credit_watcher.stats()},
+        "resident_memory_mb": round(current_rss_mb(), 1),
+        "micro_batching": {"fraud": fraud_batcher.stats(), "credit": credit_batcher.stats()},
+        "score_cache": {name: cache.stats() for name, cache in score_caches.items()},
+        "decision_log": decision_log.stats() if decision_log is not None else None,
     }
 
 
-@app.post("/predict/fraud", response_model=PredictionResponse)
-def predict_fraud(request: FraudRequest):
-    return fraud_model.predict(request.model_dump())
+@app.get("/drift")
+def drift(window: str | None = None) -> dict:
+    # Live PSI per model since the current model version was loaded.
+    windows = cfg["drift"]["windows"]
+    if window is not None and window not in windows:
+        raise HTTPException(status_code=404, detail=f"Unknown window {window!r}; one of {windows}")
+    out = {}
+    for name, bundle in (("fraud", fraud_model), ("credit", credit_model)):
+        monitor = bundle.drift
+        out[name] = None
+        if monitor is not None:
+            out[name] = {
+                "version": bundle.version,
+                "bucket_seconds": monitor.bucket_seconds,
+                "windows": monitor.report(
+                    [window] if window else None,
+                    alert_threshold=cfg["drift"]["alert_psi"],
+                    min_rows=cfg["drift"]["min_rows"],
+                ),
+            }
+    return out
 
 
-@app.post("/predict/credit-risk", response_model=PredictionResponse)
-def predict_credit(request: CreditRiskRequest):
-    payload = request.model_dump()
-    payload["income_to_emi_ratio"] = payload["monthly_income"] / max(payload["monthly_emi"], 1)
-    payload["utilization_ratio"] = payload["credit_used"] / max(payload["credit_limit"], 1)
-    payload["delinquency_trend_90d"] = (payload["dpd_m1"] + payload["dpd_m2"] + payload["dpd_m3"]) / 3
-    payload["merchant_category"] = "not_applicable"
-    payload["label_proxy"] = 0
-    return credit_model.predict(payload)
+@app.get("/explanations/global")
+def global_explanations(top_n: int | None = None) -> dict:
+    # Precomputed at training time; null for a model without a summary matching its version.
+    out = {}
+    for name, bundle in (("fraud", fraud_model), ("credit", credit_model)):
+        summary = bundle.compliance_summary()
+        out[name] = None
+        if summary is not None:
+            out[name] = {
+                "version": summary["model_version"],
+                "created_at": summary["created_at"],
+                "n_rows": summary["n_rows"],
+                "base_value": summary["base_value"],
+                "global_importance": summary["global_importance"][:top_n],
+                "segments": summary["segments"],
+            }
+    return out
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+def _request_body(schema: type[BaseModel]) -> dict:
+    # Bodies are validated by hand in _serve; keep the schema in the OpenAPI docs.
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": schema.model_json_schema()}},
+        }
+    }
+
+
+@app.post(
+    "/predict/fraud", response_model=PredictionResponse, openapi_extra=_request_body(FraudRequest)
+)
+async def predict_fraud(
+    response: Response,
+    body: Any = Body(...),
+    x_profile: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
+):
+    return await _serve(
+        "fraud",
+        fraud_model,
+        fraud_batcher,
+        FraudRequest,
+        _fraud_payload,
+        body,
+        response,
+        x_profile,
+        idempotency_key,
+    )
+
+
+@app.post(
+    "/predict/credit-risk",
+    response_model=PredictionResponse,
+    openapi_extra=_request_body(CreditRiskRequest),
+)
+async def predict_credit(
+    response: Response,
+    body: Any = Body(...),
+    x_profile: str | None = Header(default=None),
+    idempotency_key: str | None = Header(default=None),
+):
+    return await _serve(
+        "credit",
+        credit_model,
+        credit_batcher,
+        CreditRiskRequest,
+        _credit_payload,
+        body,
+        response,
+        x_profile,
+        idempotency_key,
+    )
+
+
+@app.post("/predict/fraud/batch", response_model=BatchPredictionResponse)
+def predict_fraud_batch(items: list[Any] = Body(...)):
+    return _predict_batch(fraud_model, FraudRequest, items, _fraud_payload)
+
+
+@app.post("/predict/credit-risk/batch", response_model=BatchPredictionResponse)
+def predict_credit_batch(items: list[Any] = Body(...)):
+    return _predict_batch(credit_model, CreditRiskRequest, items, _credit_payload)
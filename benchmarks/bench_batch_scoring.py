@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import build_serving_env, make_fraud_frame
+
+
+def per_row_loop(config_path: Path, frame, n_rows: int) -> dict:
+    # Previous approach: one ModelBundle.predict call per row, as a hand-written loop would do.
+    os.environ["API_CONFIG"] = str(config_path)
+    from api.service import ModelBundle, cfg
+
+    bundle = ModelBundle(cfg["model_paths"]["fraud"], threshold=cfg["thresholds"]["fraud"])
+    payloads = frame.head(n_rows).to_dict(orient="records")
+    bundle.warm_up()
+    start = time.perf_counter()
+    for payload in payloads:
+        bundle.predict(payload)
+    seconds = time.perf_counter() - start
+    return {"mode": "per-row ModelBundle", "rows": len(payloads), "seconds": round(seconds, 2)}
+
+
+def batch(
+    config_path: Path, input_path: Path, out_dir: Path, workers: int, chunksize: int, reasons: str
+) -> dict:
+    from mlops.score_batch import run
+
+    result = run(
+        "fraud",
+        str(input_path),
+        str(out_dir),
+        config_path=str(config_path),
+        workers=workers,
+        chunksize=chunksize,
+        reason_codes=reasons,
+    )
+    return {
+        "mode": f"score_batch, {reasons} reasons, {workers} worker(s)",
+        "rows": result.n_rows,
+        "seconds": round(result.seconds, 2),
+    }
+
+
+def run(
+    n_rows: int, loop_rows: int, workers: list[int], chunksize: int, reason_codes: list[str]
+) -> list[dict]:
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        config_path = build_serving_env(tmp / "env")
+        frame = make_fraud_frame(n_rows, seed=7).drop(columns=["is_fraud"])
+        input_path = tmp / "transactions.parquet"
+        frame.to_parquet(input_path, index=False)
+
+        rows = [per_row_loop(config_path, frame, loop_rows)]
+        rows += [
+            batch(config_path, input_path, tmp / f"scores-{r}-{w}", w, chunksize, r)
+            for r in reason_codes
+            for w in workers
+        ]
+    print(f"\n{n_rows} fraud rows, RandomForest(100 trees) with top-3 reason codes")
+    print("| mode | rows | seconds | rows/s | rows/hour |")
+    print("|---|---|---|---|---|")
+    for r in rows:
+        rate = r["rows"] / max(r["seconds"], 1e-9)
+        r["rows_per_hour_m"] = round(rate * 3600 / 1e6, 1)
+        print(
+            f"| {r['mode']} | {r['rows']} | {r['seconds']} | {rate:.0f} "
+            f"| {r['rows_per_hour_m']}M |"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--loop-rows", type=int, default=2_000, help="Rows in the per-row loop")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument(
+        "--reason-codes", nargs="+", choices=["approximate", "exact"], default=["approximate"]
+    )
+    args = parser.parse_args()
+    run(args.rows, args.loop_rows, sorted(set(args.workers)), args.chunksize, args.reason_codes)
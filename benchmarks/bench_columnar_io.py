@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion.convert import csv_to_parquet
+from src.utils.resources import peak_rss_mb
+
+
+def synthetic_transactions(n_rows: int, n_float: int = 150, n_int: int = 20, n_cat: int = 15, seed: int = 42):
+    """IEEE-CIS-like table: many sparse low-precision floats, small ints and low-cardinality strings."""
+    rng = np.random.default_rng(seed)
+    cols: dict[str, np.ndarray] = {"TransactionID": np.arange(n_rows) + 2_987_000}
+    cols["isFraud"] = (rng.random(n_rows) < 0.035).astype(int)
+    cols["TransactionAmt"] = rng.gamma(2.0, 60.0, n_rows).round(3)
+    for i in range(n_float):
+        values = rng.normal(0, 50, n_rows).round(2)
+        values[rng.random(n_rows) < 0.4] = np.nan
+        cols[f"V{i}"] = values
+    for i in range(n_int):
+        cols[f"C{i}"] = rng.integers(0, 500, n_rows)
+    for i in range(n_cat):
+        cols[f"M{i}"] = rng.choice([f"level_{j}" for j in range(8)], n_rows)
+    return pd.DataFrame(cols)
+
+
+def _measure(path: str, columns: list[str] | None, queue) -> None:
+    from src.utils.io import read_table
+
+    base = peak_rss_mb()
+    start = time.perf_counter()
+    df = read_table(path, columns=columns)
+    seconds = time.perf_counter() - start
+    queue.put(
+        {
+            "seconds": round(seconds, 3),
+            "peak_rss_mb": round(peak_rss_mb() - base, 1),
+            "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1),
+        }
+    )
+
+
+def measure_load(path: str, columns: list[str] | None = None) -> dict:
+    # Fresh process per measurement so peak RSS is not polluted by earlier loads.
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(path, columns, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def run(n_rows: int) -> list[dict]:
+    df = synthetic_transactions(n_rows)
+    needed = ["isFraud", "TransactionAmt"] + [f"V{i}" for i in range(10)] + ["C0", "M0"]
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "train_transaction.csv"
+        df.to_csv(csv_path, index=False)
+        del df
+        parquet_dir = csv_to_parquet(csv_path, Path(tmp) / "train_transaction")
+        rows = []
+        for fmt, path in [("csv", csv_path), ("parquet", parquet_dir)]:
+            for label, columns in [("all columns", None), (f"{len(needed)} columns", needed)]:
+                rows.append({"format": fmt, "columns": label, **measure_load(str(path), columns)})
+
+    print(f"\n{n_rows} rows")
+    print("| format | columns | load s | peak RSS MB | frame MB |")
+    print("|---|---|---|---|---|")
+    for r in rows:
+        print(f"| {r['format']} | {r['columns']} | {r['seconds']} | {r['peak_rss_mb']} | {r['frame_mb']} |")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=300_000)
+    args = parser.parse_args()
+    run(args.rows)
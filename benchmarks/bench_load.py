@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import numpy as np
+
+ENDPOINTS = {"fraud": "/predict/fraud", "credit": "/predict/credit-risk"}
+BATCH_ENDPOINTS = {"fraud": "/predict/fraud/batch", "credit": "/predict/credit-risk/batch"}
+MODES = ("single", "batch", "concurrent")
+TARGETS = ("inprocess", "uvicorn")
+# Metrics compared against a baseline: (key, True when higher is worse).
+GATED_METRICS = (("p95_ms", True), ("p99_ms", True), ("throughput_rps", False))
+
+
+def load_request_log(path: str | Path, limit: int | None = None) -> list[dict]:
+    records = []
+    with Path(path).open() as fh:
+        for line in fh:
+            if line.strip():
+                records.append(json.loads(line))
+            if limit is not None and len(records) >= limit:
+                break
+    unknown = {r["endpoint"] for r in records} - set(ENDPOINTS)
+    if unknown:
+        raise ValueError(f"Unknown endpoints in request log: {sorted(unknown)}")
+    return records
+
+
+def summarize(latencies_s: list[float], wall_s: float, n_errors: int = 0, n_items: int | None = None) -> dict:
+    """Latency percentiles in ms plus request and item throughput for one run."""
+    lat_ms = np.asarray(latencies_s, dtype=float) * 1000
+    n_requests = len(lat_ms)
+    summary = {
+        "n_requests": n_requests,
+        "n_errors": n_errors,
+        "wall_s": round(wall_s, 4),
+        "throughput_rps": round(n_requests / wall_s, 2) if wall_s > 0 else None,
+    }
+    if n_items is not None:
+        summary["items_per_s"] = round(n_items / wall_s, 2) if wall_s > 0 else None
+    if n_requests:
+        p50, p95, p99 = np.percentile(lat_ms, [50, 95, 99])
+        summary.update(
+            mean_ms=round(float(lat_ms.mean()), 3),
+            p50_ms=round(float(p50), 3),
+            p95_ms=round(float(p95), 3),
+            p99_ms=round(float(p99), 3),
+            max_ms=round(float(lat_ms.max()), 3),
+        )
+    return summary
+
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = 0.25) -> list[str]:
+    """Return one message per gated metric that regressed by more than ``tolerance`` (relative)."""
+    regressions = []
+    for target, modes in report["results"].items():
+        for mode, current in modes.items():
+            previous = baseline.get("results", {}).get(target, {}).get(mode)
+            if previous is None:
+                continue
+            if current.get("n_errors", 0) > previous.get("n_errors", 0):
+                regressions.append(
+                    f"{target}/{mode}: errors {previous.get('n_errors', 0)} -> {current['n_errors']}"
+                )
+            for key, higher_is_worse in GATED_METRICS:
+                old, new = previous.get(key), current.get(key)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                if (change if higher_is_worse else -change) > tolerance:
+                    regressions.append(f"{target}/{mode}: {key} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+async def _post(client, path: str, body) -> tuple[float, bool]:
+    start = time.perf_counter()
+    response = await client.post(path, json=body)
+    return time.perf_counter() - start, response.status_code == 200
+
+
+async def _run_single(client, records: list[dict]) -> dict:
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for record in records:
+        elapsed, ok = await _post(client, ENDPOINTS[record["endpoint"]], record["body"])
+        latencies.append(elapsed)
+        errors += not ok
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def _run_batch(client, records: list[dict], batch_size: int) -> dict:
+    batches = []
+    for endpoint in ENDPOINTS:
+        bodies = [r["body"] for r in records if r["endpoint"] == endpoint]
+        batches += [(endpoint, bodies[i : i + batch_size]) for i in range(0, len(bodies), batch_size)]
+    latencies, errors = [], 0
+    start = time.perf_counter()
+    for endpoint, bodies in batches:
+        elapsed, ok = await _post(client, BATCH_ENDPOINTS[endpoint], bodies)
+        latencies.append(elapsed)
+        errors += not ok
+    summary = summarize(latencies, time.perf_counter() - start, errors, n_items=len(records))
+    summary["batch_size"] = batch_size
+    return summary
+
+
+async def _run_concurrent(client, records: list[dict], concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(record: dict) -> tuple[float, bool]:
+        async with semaphore:
+            return await _post(client, ENDPOINTS[record["endpoint"]], record["body"])
+
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(one(r) for r in records))
+    summary = summarize(
+        [elapsed for elapsed, _ in outcomes],
+        time.perf_counter() - start,
+        sum(not ok for _, ok in outcomes),
+    )
+    summary["concurrency"] = concurrency
+    return summary
+
+
+async def _drive(client, records: list[dict], modes, batch_size: int, concurrency: int, warmup: int) -> dict:
+    for record in records[:warmup]:
+        await client.post(ENDPOINTS[record["endpoint"]], json=record["body"])
+    results = {}
+    for mode in modes:
+        if mode == "single":
+            results[mode] = await _run_single(client, records)
+        elif mode == "batch":
+            results[mode] = await _run_batch(client, records, batch_size)
+        else:
+            results[mode] = await _run_concurrent(client, records, concurrency)
+        print(mode, json.dumps(results[mode]))
+    return results
+
+
+@asynccontextmanager
+async def _inprocess_client():
+    # api.service reads API_CONFIG at import, so it is imported only after the caller sets it.
+    import httpx
+
+    from api.service import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def _uvicorn_client(env: dict, startup_timeout_s: float = 60.0):
+    import httpx
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.service:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60) as client:
+            deadline = time.monotonic() + startup_timeout_s
+            while True:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {proc.returncode}")
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise TimeoutError("uvicorn did not become ready in time")
+                await asyncio.sleep(0.1)
+            yield client
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+async def _run_targets(records, targets, modes, batch_size, concurrency, warmup, env) -> dict:
+    results = {}
+    for target in targets:
+        client_cm = _inprocess_client() if target == "inprocess" else _uvicorn_client(env)
+        async with client_cm as client:
+            print(f"[{target}]")
+            results[target] = await _drive(client, records, modes, batch_size, concurrency, warmup)
+    return results
+
+
+def run(
+    request_log: str | None = None,
+    n_requests: int = 2000,
+    targets=TARGETS,
+    modes=MODES,
+    batch_size: int = 64,
+    concurrency: int = 32,
+    warmup: int = 50,
+    n_rows: int = 20_000,
+    out: str | None = "artifacts/reports/load_benchmark.json",
+    baseline: str | None = None,
+    tolerance: float = 0.25,
+    decisions_dir: str | None = None,
+) -> dict:
+    from benchmarks.synthetic import build_serving_env, write_request_log
+    from src.inference.decision_log import decision_requests
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if decisions_dir:
+            # Replay production traffic recorded by the API's decision log.
+            records = decision_requests(decisions_dir, limit=n_requests)
+        else:
+            log_path = request_log or write_request_log(Path(tmp) / "requests.jsonl", n_requests)
+            records = load_request_log(log_path, limit=n_requests)
+        config_path = build_serving_env(tmp, n_rows=n_rows)
+        os.environ["API_CONFIG"] = str(config_path)
+        env = {**os.environ}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+        results = asyncio.run(
+            _run_targets(records, targets, modes, batch_size, concurrency, warmup, env)
+        )
+
+    report = {
+        "python": sys.version.split()[0],
+        "cpu_count": os.cpu_count(),
+        "request_log": str(decisions_dir or request_log or "synthetic"),
+        "n_requests": len(records),
+        "results": results,
+    }
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(json.dumps(report, indent=2))
+    if baseline:
+        report["regressions"] = compare_to_baseline(
+            report, json.loads(Path(baseline).read_text()), tolerance
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", dest="request_log", default=None, help="JSONL request log to replay")
+    parser.add_argument("--decisions", default=None, help="Decision log dir to replay")
+    parser.add_argument("--n-requests", type=int, default=2000)
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--train-rows", type=int, default=20_000)
+    parser.add_argument("--out", default="artifacts/reports/load_benchmark.json")
+    parser.add_argument("--baseline", default=None, help="Previous report; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+    result = run(
+        args.request_log,
+        args.n_requests,
+        args.targets,
+        args.modes,
+        args.batch_size,
+        args.concurrency,
+        args.warmup,
+        args.train_rows,
+        args.out,
+        args.baseline,
+        args.tolerance,
+        args.decisions,
+    )
+    for message in result.get("regressions", []):
+        print("REGRESSION", message)
+    sys.exit(1 if result.get("regressions") else 0)
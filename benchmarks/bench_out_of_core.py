@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.bench_columnar_io import synthetic_transactions
+from src.data_ingestion.convert import downcast_frame
+from src.utils.resources import peak_rss_mb
+
+PREPROCESSING = {"compact": True, "min_frequency": 50, "max_categories": 100}
+
+
+def write_partitions(out_dir: Path, n_rows: int, part_rows: int = 250_000) -> Path:
+    """IEEE-CIS-like Parquet partitions written part by part, so generation stays small too."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for i, start in enumerate(range(0, n_rows, part_rows)):
+        part = synthetic_transactions(min(part_rows, n_rows - start), seed=i)
+        part["TransactionID"] += start
+        # A learnable signal, so holdout AUCs are comparable across modes.
+        logit = -4 + part["V0"].fillna(0) / 40 + part["TransactionAmt"] / 200
+        rng = np.random.default_rng(1000 + i)
+        part["isFraud"] = (rng.random(len(part)) < 1 / (1 + np.exp(-logit))).astype(np.uint8)
+        downcast_frame(part).to_parquet(out_dir / f"part-{i:05d}.parquet", index=False)
+    return out_dir
+
+
+def _measure(mode: str, path: str, chunksize: int, xgboost: dict, queue) -> None:
+    os.environ.setdefault("MLFLOW_TRACKING_URI", Path(tempfile.mkdtemp(), "mlruns").as_uri())
+    artifact_dir = tempfile.mkdtemp()
+    start = time.perf_counter()
+    if mode == "in-memory":
+        from src.model_training.train import train_and_select
+        from src.utils.io import read_table
+
+        df = read_table(path).drop(columns=["TransactionID"])
+        artifacts = train_and_select(
+            df, "isFraud", "bench", artifact_dir, "fraud", n_workers=1, preprocessing=PREPROCESSING
+        )
+    else:
+        from src.model_training.out_of_core import (
+            ChunkSource,
+            scan_training_data,
+            train_out_of_core,
+        )
+
+        source = ChunkSource(path, chunksize=chunksize, split_key=["TransactionID"])
+        # Drop the ID after splitting on it, as the in-memory run never sees it.
+        source.transform = lambda chunk: chunk.drop(columns=["TransactionID"])
+        stats = scan_training_data(source, "isFraud")
+        artifacts = train_out_of_core(
+            source,
+            stats,
+            "bench",
+            artifact_dir,
+            "fraud",
+            preprocessing=PREPROCESSING,
+            xgboost={**xgboost, "external_memory": mode == "out-of-core"},
+        )
+    best = artifacts.best_model_name
+    queue.put(
+        {
+            "mode": mode,
+            "seconds": round(time.perf_counter() - start, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "best": best,
+            "holdout_roc_auc": round(artifacts.auc_scores[best], 4),
+        }
+    )
+
+
+def measure(mode: str, path: str, chunksize: int, xgboost: dict) -> dict:
+    # Fresh process per mode so peak RSS is that mode's alone.
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(mode, path, chunksize, xgboost, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def run(n_rows: int, chunksize: int, modes: list[str], xgb_rounds: int = 300) -> list[dict]:
+    # out-of-core uses the disk-paged DMatrix; out-of-core-quantile streams into a QuantileDMatrix.
+    xgboost = {"num_boost_round": xgb_rounds, "max_depth": 6, "learning_rate": 0.1}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_partitions(Path(tmp) / "fraud", n_rows)
+        on_disk = sum(f.stat().st_size for f in path.iterdir()) / 2**20
+        rows = [measure(mode, str(path), chunksize, xgboost) for mode in modes]
+    print(f"\n{n_rows} rows ({on_disk:.0f} MB Parquet), chunks of {chunksize}")
+    print("| mode | seconds | peak RSS MB | best | holdout ROC-AUC |")
+    print("|---|---|---|---|---|")
+    for r in rows:
+        print(
+            f"| {r['mode']} | {r['seconds']} | {r['peak_rss_mb']} "
+            f"| {r['best']} | {r['holdout_roc_auc']} |"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=["in-memory", "out-of-core", "out-of-core-quantile"],
+        default=["in-memory", "out-of-core", "out-of-core-quantile"],
+    )
+    parser.add_argument("--xgb-rounds", type=int, default=300)
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n, args.chunksize, args.modes, args.xgb_rounds)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from scipy.stats import ks_2samp
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from benchmarks.bench_threshold_search import synthetic_scores
+from src.model_evaluation.evaluate import threshold_costs
+from src.model_evaluation.segments import evaluate_segments
+
+
+def naive_replicate(y, proba, segments: dict[str, np.ndarray], idx: np.ndarray) -> int:
+    # Straightforward approach: materialize the resample, then mask and score every segment.
+    y, proba = y[idx], proba[idx]
+    n_scored = 0
+    for labels in segments.values():
+        labels = labels[idx]
+        for level in np.unique(labels):
+            mask = labels == level
+            ys, ps = y[mask], proba[mask]
+            if 0 < ys.sum() < len(ys):
+                roc_auc_score(ys, ps)
+                average_precision_score(ys, ps)
+                ks_2samp(ps[ys == 1], ps[ys == 0])
+            threshold_costs(ys, ps, [0.5])
+            n_scored += 1
+    return n_scored
+
+
+def run(n_rows: int, n_bootstrap: int, naive_resamples: int, n_jobs: int) -> dict:
+    y, proba = synthetic_scores(n_rows)
+    rng = np.random.default_rng(0)
+    segments = {
+        "merchant_category": rng.choice([f"m{i:02d}" for i in range(20)], n_rows),
+        "amount_band": rng.choice(["<500", "500-2k", "2k-10k", ">10k"], n_rows),
+        "tenure_band": rng.choice(["<12", "12-36", "36-60", ">60"], n_rows),
+    }
+    n_segments = 1 + sum(len(np.unique(labels)) for labels in segments.values())
+
+    with_overall = {"overall": np.zeros(n_rows), **segments}
+    start = time.perf_counter()
+    for _ in range(naive_resamples):
+        naive_replicate(y, proba, with_overall, rng.integers(0, n_rows, n_rows))
+    naive_per_resample = (time.perf_counter() - start) / naive_resamples
+
+    start = time.perf_counter()
+    evaluate_segments(y, proba, segments, 0.5, n_bootstrap=n_bootstrap, n_jobs=n_jobs)
+    engine_s = time.perf_counter() - start
+    report = {
+        "n_rows": n_rows,
+        "n_segments": n_segments,
+        "n_bootstrap": n_bootstrap,
+        "naive_s_per_resample": round(naive_per_resample, 3),
+        "naive_s_projected": round(naive_per_resample * (n_bootstrap + 1), 1),
+        "engine_s": round(engine_s, 2),
+        "speedup": round(naive_per_resample * (n_bootstrap + 1) / engine_s, 1),
+    }
+    print(report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--bootstrap", type=int, default=500)
+    parser.add_argument("--naive-resamples", type=int, default=3, help="Timed, then projected")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n, args.bootstrap, args.naive_resamples, args.n_jobs)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from benchmarks.bench_columnar_io import synthetic_transactions
+from src.data_ingestion.convert import downcast_frame
+from src.utils.resources import peak_rss_mb
+
+MODES = {
+    "dense": {},
+    "compact": {"compact": True, "min_frequency": 50, "max_categories": 100},
+}
+
+
+def _frame(n_rows: int, high_cardinality: bool, seed: int = 42):
+    df = synthetic_transactions(n_rows, seed=seed).drop(columns=["TransactionID"])
+    if high_cardinality:
+        rng = np.random.default_rng(seed)
+        # IEEE-CIS-style high-cardinality categoricals with long Zipf tails.
+        df["card1"] = (rng.zipf(1.3, n_rows) % 13_000).astype(str)
+        df["P_emaildomain"] = (rng.zipf(1.6, n_rows) % 60).astype(str)
+    # Same dtypes mlops/prepare_data.py writes to Parquet: float32, narrow ints, categoricals.
+    return downcast_frame(df)
+
+
+def _measure(n_rows: int, high_cardinality: bool, mode: str, model: str, queue) -> None:
+    from src.model_training.train import _build_preprocessor, _candidate_models, _matrix_mb
+
+    df = _frame(n_rows, high_cardinality)
+    X, y = df.drop(columns=["isFraud"]), df["isFraud"].to_numpy()
+    base = peak_rss_mb()
+    report = {"mode": mode, "frame_mb": round(df.memory_usage(deep=True).sum() / 2**20, 1)}
+
+    start = time.perf_counter()
+    Xt = _build_preprocessor(df, "isFraud", **MODES[mode]).fit_transform(X)
+    report.update(
+        preprocess_s=round(time.perf_counter() - start, 2),
+        matrix=f"{'csr' if hasattr(Xt, 'indptr') else 'dense'} {Xt.dtype} {Xt.shape[1]} cols",
+        matrix_mb=round(_matrix_mb(Xt), 1),
+        preprocess_peak_mb=round(peak_rss_mb() - base, 1),
+    )
+    del df, X
+
+    estimator = _candidate_models()[model]
+    if model == "xgboost":
+        estimator.set_params(n_estimators=50)
+    start = time.perf_counter()
+    estimator.fit(Xt, y)
+    report.update(fit_s=round(time.perf_counter() - start, 2), fit_peak_mb=round(peak_rss_mb() - base, 1))
+    queue.put(report)
+
+
+def measure(n_rows: int, high_cardinality: bool, mode: str, model: str) -> dict:
+    # Fresh process per mode so one mode's high-water mark does not hide the other's.
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(n_rows, high_cardinality, mode, model, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def run(n_rows: int, model: str) -> list[dict]:
+    rows = [
+        {"categoricals": "+ card1, email" if high else "low-card", **measure(n_rows, high, mode, model)}
+        for high in (False, True)
+        for mode in MODES
+    ]
+    print(f"\n{n_rows} rows, {model}; peak RSS above the loaded frame")
+    print("| categoricals | mode | matrix | matrix MB | preprocess peak MB | fit peak MB | fit s |")
+    print("|---|---|---|---|---|---|---|")
+    for r in rows:
+        print(
+            f"| {r['categoricals']} | {r['mode']} | {r['matrix']} | {r['matrix_mb']} "
+            f"| {r['preprocess_peak_mb']} | {r['fit_peak_mb']} | {r['fit_s']} |"
+        )
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[200_000])
+    parser.add_argument("--model", choices=["logreg", "random_forest", "xgboost"], default="xgboost")
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n, args.model)
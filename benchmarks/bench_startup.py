@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+CHILD_FLAG = "--child"
+
+
+def _child() -> None:
+    """Runs in a fresh interpreter: import, start the app, send the first requests."""
+    start = time.perf_counter()
+    from api.service import app
+
+    imported = time.perf_counter()
+    from fastapi.testclient import TestClient
+
+    from benchmarks.synthetic import make_credit_frame, make_fraud_frame, to_requests
+
+    fraud = to_requests(make_fraud_frame(2, seed=1), "fraud")
+    credit = to_requests(make_credit_frame(2, seed=1), "credit")
+    lifespan_start = time.perf_counter()
+    with TestClient(app) as client:
+        ready_at = time.perf_counter()
+        assert client.get("/ready").status_code == 200
+        latencies = {}
+        for name, path, body in [
+            ("first_fraud_ms", "/predict/fraud", fraud[0]),
+            ("first_credit_ms", "/predict/credit-risk", credit[0]),
+            ("second_fraud_ms", "/predict/fraud", fraud[1]),
+        ]:
+            t = time.perf_counter()
+            assert client.post(path, json=body).status_code == 200
+            latencies[name] = round((time.perf_counter() - t) * 1000, 3)
+        startup = client.get("/ready").json()
+    print(
+        json.dumps(
+            {
+                "import_s": round(imported - start, 3),
+                # Excludes building the request bodies above.
+                "time_to_ready_s": round(imported - start + ready_at - lifespan_start, 3),
+                "model_load_s": startup["load_seconds"],
+                "warmup_s": startup["warmup_seconds"],
+                **latencies,
+            }
+        )
+    )
+
+
+def run(repeats: int = 3, out: str | None = "artifacts/reports/startup_benchmark.json") -> dict:
+    from benchmarks.synthetic import build_serving_env
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "API_CONFIG": str(build_serving_env(tmp, n_rows=5000))}
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+        runs = []
+        for _ in range(repeats):
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_startup", CHILD_FLAG],
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    report = {
+        "python": sys.version.split()[0],
+        "repeats": repeats,
+        "median": {key: statistics.median(r[key] for r in runs) for key in runs[0]},
+        "runs": runs,
+    }
+    print(json.dumps(report["median"], indent=2))
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    if CHILD_FLAG in sys.argv:
+        _child()
+    else:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("--repeats", type=int, default=3)
+        parser.add_argument("--out", default="artifacts/reports/startup_benchmark.json")
+        args = parser.parse_args()
+        run(args.repeats, args.out)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics import confusion_matrix
+
+from src.model_evaluation.evaluate import optimize_threshold, threshold_grid
+
+
+def legacy_optimize_threshold(y_true, proba, fn_cost: float = 10.0, fp_cost: float = 1.0) -> tuple[float, float]:
+    # Previous implementation: one full confusion_matrix per grid point.
+    thresholds = np.arange(0.05, 0.96, 0.01)
+    best_thr, min_cost = 0.5, float("inf")
+    for thr in thresholds:
+        pred = (proba >= thr).astype(int)
+        tn, fp, fn, tp = confusion_matrix(y_true, pred).ravel()
+        cost = fn * fn_cost + fp * fp_cost
+        if cost < min_cost:
+            best_thr, min_cost = float(thr), float(cost)
+    return best_thr, min_cost
+
+
+def synthetic_scores(n_rows: int, fraud_rate: float = 0.035, seed: int = 42) -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    y = (rng.random(n_rows) < fraud_rate).astype(int)
+    proba = np.clip(rng.beta(2, 8, n_rows) + 0.35 * y * rng.random(n_rows), 0, 1).round(4)
+    return y, proba
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+def run(n_rows: int) -> dict:
+    y, proba = synthetic_scores(n_rows)
+    legacy, legacy_s = _timed(legacy_optimize_threshold, y, proba)
+    grid, grid_s = _timed(optimize_threshold, y, proba, thresholds=threshold_grid())
+    distinct, distinct_s = _timed(optimize_threshold, y, proba, thresholds="distinct")
+    if grid != legacy:
+        raise AssertionError(f"Sorted search {grid} differs from legacy {legacy}")
+    if distinct[1] > grid[1]:
+        raise AssertionError("Distinct-score search must never cost more than the grid")
+    report = {
+        "n_rows": n_rows,
+        "legacy_s": round(legacy_s, 4),
+        "sorted_grid_s": round(grid_s, 4),
+        "sorted_distinct_s": round(distinct_s, 4),
+        "speedup": round(legacy_s / grid_s, 1),
+        "grid_result": grid,
+        "distinct_result": distinct,
+    }
+    print(report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from itertools import product
+from pathlib import Path
+
+from sklearn.base import clone
+from sklearn.metrics import average_precision_score
+from sklearn.model_selection import train_test_split
+
+from benchmarks.synthetic import make_fraud_frame
+from src.model_training.train import _build_preprocessor, _candidate_models
+from src.model_training.tuning import successive_halving
+
+GRID = {"max_depth": [3, 6, 9], "learning_rate": [0.03, 0.1, 0.3], "min_child_weight": [1.0, 5.0]}
+SPACE = {
+    "n_estimators": 2000,
+    "max_depth": {"int": [3, 9]},
+    "learning_rate": {"log_uniform": [0.03, 0.3]},
+    "min_child_weight": {"log_uniform": [1.0, 5.0]},
+}
+
+
+def _splits(n_rows: int):
+    # customer_id is an identifier, not a feature; one-hot encoding it only widens the matrix.
+    df = make_fraud_frame(n_rows).drop(columns=["customer_id"])
+    X, y = df.drop(columns=["is_fraud"]), df["is_fraud"].to_numpy()
+    X_rest, X_test, y_rest, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+    X_fit, X_val, y_fit, y_val = train_test_split(
+        X_rest, y_rest, test_size=0.2, stratify=y_rest, random_state=42
+    )
+    prep = _build_preprocessor(df, "is_fraud").fit(X_fit)
+    return (prep.transform(X_fit), y_fit), (prep.transform(X_val), y_val), (prep.transform(X_test), y_test)
+
+
+def grid_search(base, X_fit, y_fit, X_val, y_val):
+    # Previous approach: every grid point trained to the fixed 350 rounds on the full training set.
+    best, best_score, cpu = None, -1.0, time.process_time()
+    for values in product(*GRID.values()):
+        model = clone(base).set_params(**dict(zip(GRID, values))).fit(X_fit, y_fit)
+        score = average_precision_score(y_val, model.predict_proba(X_val)[:, 1])
+        if score > best_score:
+            best, best_score = model, score
+    return best, best_score, time.process_time() - cpu
+
+
+def run(n_rows: int, n_trials: int, n_workers: int, out: str | None) -> dict:
+    (X_fit, y_fit), (X_val, y_val), (X_test, y_test) = _splits(n_rows)
+    base = _candidate_models()["xgboost"]
+
+    wall = time.perf_counter()
+    grid_model, grid_val, grid_cpu = grid_search(base, X_fit, y_fit, X_val, y_val)
+    grid_wall = time.perf_counter() - wall
+
+    search = successive_halving(
+        {"xgboost": base}, {"xgboost": SPACE}, X_fit, y_fit, X_val, y_val,
+        n_trials=n_trials, n_workers=n_workers, budget_seconds=3600,
+    )  # fmt: skip
+    best = search.best["xgboost"]
+
+    def test_pr_auc(model) -> float:
+        return round(float(average_precision_score(y_test, model.predict_proba(X_test)[:, 1])), 4)
+
+    report = {
+        "n_rows": n_rows,
+        "grid": {
+            "configs": len(list(product(*GRID.values()))),
+            "val_pr_auc": round(grid_val, 4),
+            "test_pr_auc": test_pr_auc(grid_model),
+            "cpu_seconds": round(grid_cpu, 2),
+            "wall_seconds": round(grid_wall, 2),
+        },
+        "halving": {
+            "trials": len(search.trials),
+            "val_pr_auc": round(best.pr_auc, 4),
+            "test_pr_auc": test_pr_auc(best.estimator),
+            "best_iteration": best.best_iteration,
+            "cpu_seconds": round(search.cpu_seconds, 2),
+            "wall_seconds": round(search.wall_seconds, 2),
+        },
+    }
+    report["cpu_ratio"] = round(report["grid"]["cpu_seconds"] / max(search.cpu_seconds, 1e-9), 1)
+    print(json.dumps(report, indent=2))
+    if out:
+        Path(out).parent.mkdir(parents=True, exist_ok=True)
+        Path(out).write_text(json.dumps(report, indent=2))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--trials", type=int, default=18, help="Halving configurations sampled")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--out", default="artifacts/reports/tuning_benchmark.json")
+    args = parser.parse_args()
+    run(args.rows, args.trials, args.workers, args.out)
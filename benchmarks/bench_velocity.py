@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.feature_engineering.velocity import compute_velocity_features, feature_grid
+from src.utils.resources import peak_rss_mb
+
+
+def legacy_velocity_features(
+    df: pd.DataFrame,
+    customer_col: str = "customer_id",
+    ts_col: str = "transaction_ts",
+    amount_col: str = "amount",
+) -> pd.DataFrame:
+    # Previous implementation: one groupby().rolling() pass per window.
+    out = df.copy()
+    out[ts_col] = pd.to_datetime(out[ts_col])
+    out = out.sort_values([customer_col, ts_col])
+    grouped = out.set_index(ts_col).groupby(customer_col)[amount_col]
+    out["txn_count_1h"] = grouped.rolling("1h").count().reset_index(level=0, drop=True).values
+    out["txn_count_24h"] = grouped.rolling("24h").count().reset_index(level=0, drop=True).values
+    out["txn_amount_7d"] = grouped.rolling("7d").sum().reset_index(level=0, drop=True).fillna(0).values
+    return out
+
+
+def synthetic_transactions(n_rows: int, n_customers: int, days: int = 90, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "customer_id": rng.integers(0, n_customers, n_rows),
+            "transaction_ts": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, days * 86_400, n_rows), unit="s"),
+            "amount": rng.gamma(2.0, 1500.0, n_rows).round(2),
+            "merchant_category": rng.integers(0, 40, n_rows).astype(np.int16),
+        }
+    )
+
+
+def _timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - start
+
+
+def run(n_rows: int, n_customers: int | None = None, n_jobs: int = 1, legacy_max_rows: int = 10_000_000) -> dict:
+    df = synthetic_transactions(n_rows, n_customers or max(n_rows // 20, 1))
+    new, new_s = _timed(compute_velocity_features, df, n_jobs=n_jobs)
+    report = {"n_rows": n_rows, "n_jobs": n_jobs, "engine_s": round(new_s, 3)}
+
+    if n_rows <= legacy_max_rows:
+        legacy, legacy_s = _timed(legacy_velocity_features, df)
+        if not legacy.index.equals(new.index):
+            raise AssertionError("Row order differs from the legacy implementation")
+        for col in ["txn_count_1h", "txn_count_24h"]:
+            if not np.array_equal(legacy[col].to_numpy(), new[col].to_numpy()):
+                raise AssertionError(f"{col} differs from the legacy implementation")
+        np.testing.assert_allclose(new["txn_amount_7d"], legacy["txn_amount_7d"], rtol=1e-12, atol=1e-9)
+        report.update(legacy_s=round(legacy_s, 3), speedup=round(legacy_s / new_s, 1))
+        del legacy
+    del new
+
+    grid = feature_grid(["1h", "24h", "7d"], ["count", "sum", "mean", "max", "distinct_merchants"])
+    full, grid_s = _timed(compute_velocity_features, df, grid, n_jobs=n_jobs)
+    report["engine_15_features_s"] = round(grid_s, 3)
+    # Rows are sorted by customer, so a prefix holds whole windows; check it against pandas.
+    head = full.head(1_000_000)
+    rolled = head.set_index("transaction_ts").groupby("customer_id")["amount"].rolling("7d").max()
+    if not np.array_equal(head["txn_amount_max_7d"].to_numpy(), rolled.to_numpy()):
+        raise AssertionError("txn_amount_max_7d differs from pandas rolling max")
+    del full, head, rolled, df
+    # Max and distinct merchants look at every row of every window, so also time them on heavy
+    # customers: ~100k transactions each, ~7.8k of them in a 7d window.
+    heavy = synthetic_transactions(n_rows, max(n_rows // 100_000, 1))
+    _, heavy_s = _timed(compute_velocity_features, heavy, grid, n_jobs=n_jobs)
+    report["engine_15_features_heavy_customers_s"] = round(heavy_s, 3)
+    report["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    print(report)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000_000])
+    parser.add_argument("--customers", type=int, default=None, help="Defaults to rows / 20")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--legacy-max-rows", type=int, default=10_000_000)
+    args = parser.parse_args()
+    for n in args.rows:
+        run(n, args.customers, args.n_jobs, args.legacy_max_rows)
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from api.schemas import CreditRiskRequest, FraudRequest
+from src.model_training.train import _build_preprocessor
+from src.utils.config import load_yaml
+from src.utils.io import save_joblib
+
+MERCHANTS = ["grocery", "electronics", "travel", "fuel", "gaming", "p2p_transfer"]
+
+
+def make_fraud_frame(n_rows: int = 20_000, seed: int = 42) -> pd.DataFrame:
+    """Fraud training rows shaped like FraudRequest, with a rare label driven by risky signals."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "customer_id": [f"C{i:06d}" for i in rng.integers(0, max(n_rows // 20, 1), n_rows)],
+            "amount": rng.gamma(2.0, 1500.0, n_rows).round(2) + 1,
+            "transaction_hour": rng.integers(0, 24, n_rows),
+            "merchant_category": rng.choice(MERCHANTS, n_rows),
+            "geo_distance_km": rng.exponential(20.0, n_rows).round(3),
+            "txn_count_1h": rng.poisson(1.0, n_rows),
+            "txn_count_24h": rng.poisson(6.0, n_rows),
+            "device_change_flag": rng.integers(0, 2, n_rows),
+        }
+    )
+    logit = (
+        -5
+        + df["amount"] / 4000
+        + df["geo_distance_km"] / 30
+        + 1.2 * df["device_change_flag"]
+        + 0.4 * df["txn_count_1h"]
+    )
+    df["is_fraud"] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df
+
+
+def make_credit_frame(n_rows: int = 20_000, seed: int = 43) -> pd.DataFrame:
+    """Credit rows shaped like the payload the credit endpoint builds from CreditRiskRequest."""
+    rng = np.random.default_rng(seed)
+    income = rng.lognormal(10.8, 0.5, n_rows).round(0) + 1000
+    limit = rng.choice([50_000, 100_000, 200_000, 500_000], n_rows).astype(float)
+    df = pd.DataFrame(
+        {
+            "customer_id": [f"L{i:06d}" for i in range(n_rows)],
+            "monthly_income": income,
+            "monthly_emi": (income * rng.uniform(0.05, 0.7, n_rows)).round(0) + 1,
+            "credit_limit": limit,
+            "credit_used": (limit * rng.beta(2, 3, n_rows)).round(0),
+            "bureau_score": rng.integers(300, 901, n_rows),
+            "dpd_m1": rng.poisson(2, n_rows),
+            "dpd_m2": rng.poisson(2, n_rows),
+            "dpd_m3": rng.poisson(2, n_rows),
+            "loan_tenure_months": rng.choice([12, 24, 36, 48, 60], n_rows),
+        }
+    )
+    df["income_to_emi_ratio"] = df["monthly_income"] / np.clip(df["monthly_emi"], 1, None)
+    df["utilization_ratio"] = df["credit_used"] / np.clip(df["credit_limit"], 1, None)
+    df["delinquency_trend_90d"] = df[["dpd_m1", "dpd_m2", "dpd_m3"]].mean(axis=1)
+    df["merchant_category"] = "not_applicable"
+    df["label_proxy"] = 0
+    logit = (
+        -2
+        + 2.5 * df["utilization_ratio"]
+        - df["income_to_emi_ratio"] / 8
+        - (df["bureau_score"] - 650) / 120
+    )
+    df["default"] = (rng.random(n_rows) < 1 / (1 + np.exp(-logit))).astype(int)
+    return df
+
+
+def to_requests(df: pd.DataFrame, kind: str) -> list[dict]:
+    """Turn synthetic rows into JSON bodies for /predict/fraud or /predict/credit-risk."""
+    if kind == "fraud":
+        cols = list(FraudRequest.model_fields)
+    else:
+        cols = list(CreditRiskRequest.model_fields)
+    cols = [c for c in cols if c in df.columns]
+    return df[cols].to_dict(orient="records")
+
+
+def _fit(df: pd.DataFrame, target: str, n_estimators: int) -> Pipeline:
+    features = df.drop(columns=["customer_id"])
+    pipe = Pipeline(
+        [
+            ("prep", _build_preprocessor(features, target)),
+            (
+                "model",
+                RandomForestClassifier(n_estimators=n_estimators, max_depth=8, random_state=42, n_jobs=-1),
+            ),
+        ]
+    )
+    return pipe.fit(features.drop(columns=[target]), features[target])
+
+
+def build_serving_env(out_dir: str | Path, n_rows: int = 20_000, n_estimators: int = 100) -> Path:
+    """Train small fraud/credit models into ``out_dir`` and write an API config pointing at them.
+
+    Returns the config path; pass it to the API through the ``API_CONFIG`` environment variable.
+    """
+    out_dir = Path(out_dir)
+    fraud_path, credit_path = out_dir / "fraud_pipeline.joblib", out_dir / "credit_pipeline.joblib"
+    save_joblib(_fit(make_fraud_frame(n_rows), "is_fraud", n_estimators), fraud_path)
+    save_joblib(_fit(make_credit_frame(n_rows), "default", n_estimators), credit_path)
+
+    cfg = load_yaml("configs/api.yaml")
+    cfg["model_paths"] = {"fraud": str(fraud_path), "credit": str(credit_path)}
+    cfg["merchant_risk_paths"] = {"credit": str(out_dir / "credit_merchant_risk.joblib")}
+    cfg["feature_store"]["snapshot_path"] = str(out_dir / "velocity_store.joblib")
+    cfg["decision_log"]["directory"] = str(out_dir / "decision_log")
+    config_path = out_dir / "api.yaml"
+    config_path.write_text(yaml.safe_dump(cfg, sort_keys=False))
+    return config_path
+
+
+def write_request_log(
+    path: str | Path, n_requests: int = 2000, fraud_share: float = 0.7, seed: int = 7
+) -> Path:
+    """Write a replayable JSONL request log: one ``{"endpoint": "fraud"|"credit", "body": {...}}`` per line."""
+    rng = np.random.default_rng(seed)
+    n_fraud = int(round(n_requests * fraud_share))
+    rows = [{"endpoint": "fraud", "body": b} for b in to_requests(make_fraud_frame(n_fraud, seed), "fraud")]
+    rows += [
+        {"endpoint": "credit", "body": b}
+        for b in to_requests(make_credit_frame(n_requests - n_fraud, seed), "credit")
+    ]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as fh:
+        for i in rng.permutation(len(rows)):
+            fh.write(json.dumps(rows[i], default=_json_default) + "\n")
+    return path
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value)!r}")
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import argparse
+
+from src.feature_engineering.online_store import VelocityFeatureStore
+from src.utils.config import load_yaml
+
+
+def run(history_path: str, config_path: str = "configs/api.yaml") -> None:
+    cfg = load_yaml(config_path)["feature_store"]
+    store = VelocityFeatureStore(cfg["windows"])
+    n_events = store.warm_start(history_path)
+    store.snapshot(cfg["snapshot_path"])
+    print(f"Replayed {n_events} events for {len(store)} customers")
+    print(f"Snapshot: {cfg['snapshot_path']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--history", required=True, help="CSV/Parquet with customer_id, transaction_ts, amount")
+    args = parser.parse_args()
+    run(args.history)
@@ -1,25 +1,86 @@
 from __future__ import annotations
 
 import argparse
+import json
+from pathlib import Path
 
-import pandas as pd
+from src.drift_detection.reference_bins import (
+    PSI_ALERT,
+    SCORE_FEATURE,
+    DriftAccumulator,
+    build_reference_bins,
+    load_reference_bins,
+    save_reference_bins,
+)
+from src.inference.decision_log import decision_frames
+from src.utils.io import iter_table_chunks, read_table
 
-from src.drift_detection.psi import population_stability_index
 
+def run(
+    production_path: str | None,
+    reference_path: str | None = None,
+    columns: list[str] | None = None,
+    bins_path: str | None = None,
+    chunksize: int = 200_000,
+    report_path: str | None = None,
+    decisions_dir: str | None = None,
+    model: str | None = None,
+) -> dict[str, dict]:
+    if bool(production_path) == bool(decisions_dir):
+        raise ValueError("Provide exactly one of --production or --decisions")
+    if decisions_dir and not model:
+        raise ValueError("--decisions needs --model (fraud or credit)")
+    if bins_path and Path(bins_path).exists():
+        reference = load_reference_bins(bins_path)
+    elif reference_path:
+        reference = build_reference_bins(read_table(reference_path, columns), columns)
+        if bins_path:
+            save_reference_bins(reference, bins_path)
+    else:
+        raise ValueError("Provide --reference or an existing --bins artifact")
+    if not decisions_dir:
+        reference.pop(SCORE_FEATURE, None)  # production files carry no score; decision logs do
+    if columns:
+        reference = {c: reference[c] for c in columns}
 
-def run(reference_path: str, production_path: str, column: str) -> None:
-    ref = pd.read_csv(reference_path)[column]
-    prod = pd.read_csv(production_path)[column]
-    psi = population_stability_index(ref, prod)
-    print(f"PSI({column}) = {psi:.4f}")
-    if psi > 0.25:
-        print("ALERT: Significant drift detected")
+    acc = DriftAccumulator(reference)
+    if decisions_dir:
+        chunks = decision_frames(decisions_dir, model, chunksize, include_open=True)
+    else:
+        chunks = iter_table_chunks(production_path, list(reference), chunksize)
+    for chunk in chunks:
+        acc.update(chunk)
+
+    report = acc.report()
+    for name, row in report.items():
+        print(f"PSI({name}) = {row['psi']:.4f}")
+    alerts = [name for name, row in report.items() if row["alert"]]
+    if alerts:
+        print(f"ALERT: Significant drift detected (PSI > {PSI_ALERT}) in: {', '.join(alerts)}")
+    if report_path:
+        Path(report_path).parent.mkdir(parents=True, exist_ok=True)
+        Path(report_path).write_text(json.dumps({"n_rows": acc.n_rows, "features": report}, indent=2))
+    return report
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--reference", required=True)
-    parser.add_argument("--production", required=True)
-    parser.add_argument("--column", required=True)
+    parser.add_argument("--reference", help="Reference CSV/Parquet (file or partition dir); only needed when --bins does not exist yet")
+    parser.add_argument("--production", help="Production CSV/Parquet (file or partition dir)")
+    parser.add_argument("--decisions", help="Or the API decision log directory")
+    parser.add_argument("--model", choices=["fraud", "credit"], help="Model to check")
+    parser.add_argument("--column", nargs="*", help="Features to check (default: all in the reference bins)")
+    parser.add_argument("--bins", help="Reference bins artifact, e.g. artifacts/models/fraud_reference_bins.joblib")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    parser.add_argument("--report", help="Optional JSON report path")
     args = parser.parse_args()
-    run(args.reference, args.production, args.column)
+    run(
+        args.production,
+        args.reference,
+        args.column,
+        args.bins,
+        args.chunksize,
+        args.report,
+        args.decisions,
+        args.model,
+    )
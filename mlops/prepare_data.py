@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import argparse
+
+from src.data_ingestion.convert import convert_all
+from src.data_ingestion.unpack import unzip_all
+
+
+def run(raw_dir: str = "data/raw", processed_dir: str = "data/processed", chunksize: int = 500_000) -> None:
+    unzip_all(raw_dir)
+    for table in convert_all(raw_dir, processed_dir, chunksize=chunksize):
+        print(f"Parquet table: {table}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--raw", default="data/raw")
+    parser.add_argument("--processed", default="data/processed")
+    parser.add_argument("--chunksize", type=int, default=500_000)
+    args = parser.parse_args()
+    run(args.raw, args.processed, args.chunksize)
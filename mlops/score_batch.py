@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import argparse
+import os
+
+from src.inference.batch_scoring import BatchScoringResult, score_table
+from src.utils.config import load_yaml
+
+
+def run(
+    task: str,
+    input_path: str,
+    output_dir: str,
+    config_path: str = "configs/api.yaml",
+    model_path: str | None = None,
+    threshold: float | None = None,
+    workers: int | None = None,
+    chunksize: int | None = None,
+    top_n: int | None = None,
+    keep_columns: list[str] | None = None,
+    reason_codes: str | None = None,
+) -> BatchScoringResult:
+    # Same model, threshold and reason-code count as the API unless overridden.
+    cfg = load_yaml(config_path)
+    batch_cfg = cfg["batch_scoring"]
+    scorer_kwargs = {
+        "task": task,
+        "model_path": model_path or cfg["model_paths"][task],
+        "threshold": threshold if threshold is not None else cfg["thresholds"][task],
+        "top_n": top_n if top_n is not None else cfg["explainability"]["top_features"],
+        "merchant_risk_path": cfg["merchant_risk_paths"].get(task),
+        "keep_columns": keep_columns or [],
+        "mmap_mode": cfg["model_reload"]["mmap_mode"],
+        "reason_codes": reason_codes or batch_cfg["reason_codes"],
+    }
+    result = score_table(
+        input_path,
+        output_dir,
+        scorer_kwargs,
+        chunksize=chunksize or batch_cfg["chunksize"],
+        workers=workers or batch_cfg["workers"] or os.cpu_count() or 1,
+        queued_per_worker=batch_cfg["queued_per_worker"],
+    )
+    print(f"Scored {result.n_rows} rows into {result.n_parts} parts under {result.output_dir}")
+    if result.resumed_parts:
+        print(f"Resumed: {result.resumed_parts} parts were already scored")
+    print(f"Flagged high risk: {result.n_flagged}")
+    print(f"Seconds: {result.seconds:.1f} ({result.n_rows / max(result.seconds, 1e-9):.0f} rows/s)")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--task", choices=["fraud", "credit"], required=True)
+    parser.add_argument("--input", required=True, help="CSV, Parquet file or Parquet directory")
+    parser.add_argument("--output", required=True, help="Directory for part-*.parquet files")
+    parser.add_argument("--model", help="Pipeline artifact (default: model_paths in api.yaml)")
+    parser.add_argument("--threshold", type=float, help="Decision threshold (default: thresholds)")
+    parser.add_argument("--workers", type=int, help="Scoring processes (default: every core)")
+    parser.add_argument("--chunksize", type=int)
+    parser.add_argument("--top-n", type=int, help="Reason codes per row; 0 skips explanations")
+    parser.add_argument("--reason-codes", choices=["approximate", "exact"])
+    parser.add_argument("--keep", nargs="*", help="Input columns copied to the output, e.g. ids")
+    args = parser.parse_args()
+    run(
+        args.task,
+        args.input,
+        args.output,
+        model_path=args.model,
+        threshold=args.threshold,
+        workers=args.workers,
+        chunksize=args.chunksize,
+        top_n=args.top_n,
+        keep_columns=args.keep,
+        reason_codes=args.reason_codes,
+    )
@@ -1,44 +1,224 @@
 from __future__ import annotations
 
 import argparse
+import time
 from pathlib import Path
 
 import pandas as pd
 
-from src.feature_engineering.features import add_credit_features, add_geo_anomaly_feature, add_transaction_velocity_features
+from src.data_validation.validator import check_schema, read_schema
+from src.drift_detection.reference_bins import (
+    SCORE_FEATURE,
+    build_reference_bins,
+    build_score_bins,
+    reference_bins_path,
+    save_reference_bins,
+)
+from src.explainability.compliance_pack import build_compliance_pack
+from src.feature_engineering.features import (
+    add_credit_features,
+    add_row_local_fraud_features,
+    add_transaction_velocity_features,
+)
+from src.feature_engineering.target_encoding import TargetEncodingTable, target_encoding_path
+from src.model_evaluation.evaluate import threshold_search_kwargs
+from src.model_evaluation.segments import (
+    evaluate_segments,
+    segment_columns,
+    write_segment_report,
+)
+from src.model_training.out_of_core import (
+    ChunkSource,
+    sample_holdout,
+    scan_training_data,
+    train_out_of_core,
+)
 from src.model_training.train import train_and_select
 from src.utils.config import load_yaml
+from src.utils.io import file_digest, load_joblib, read_table
 
 
-def load_training_data(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
+def load_training_data(path: str, columns: list[str] | None = None) -> pd.DataFrame:
+    # CSV or (partitioned) Parquet from mlops/prepare_data.py; Parquet keeps the downcast dtypes.
+    df = read_table(path, columns=columns)
     return df
 
 
-def run(task: str, data_path: str, config_path: str = "configs/training.yaml") -> None:
+def run_out_of_core(task: str, data_path: str, cfg: dict, columns: list[str] | None = None):
+    if task != "fraud":
+        # The merchant risk encoding needs out-of-fold statistics over the whole credit table.
+        raise ValueError("Out-of-core training supports the fraud task only")
+    ooc = dict(cfg["out_of_core"])
+    target_col = cfg["label_columns"]["fraud"]
+    # Velocity windows need each customer's full history, so they must already be in the data.
+    source = ChunkSource(
+        data_path,
+        columns=columns,
+        transform=add_row_local_fraud_features,
+        chunksize=ooc.pop("chunksize"),
+        test_size=cfg["splits"]["test_size"],
+        split_key=ooc.pop("split_key"),
+    )
+    stats = scan_training_data(source, target_col, sample_rows=ooc.pop("sample_rows"))
+    artifacts = train_out_of_core(
+        source,
+        stats,
+        cfg["mlflow"]["experiment_name"],
+        cfg["artifacts"]["model_dir"],
+        task,
+        seed=cfg["seed"],
+        preprocessing=cfg["preprocessing"],
+        **ooc,
+    )
+    # One extra pass samples the holdout for the post-training stages that need its rows.
+    stages = [cfg[name] for name in ("segment_evaluation", "compliance_pack")]
+    caps = [stage["max_rows"] for stage in stages if stage["enabled"]]
+    holdout = sample_holdout(source, stats.n_test, max(caps)) if caps else None
+    return artifacts, stats.sample.drop(columns=[target_col]), holdout
+
+
+def run(
+    task: str,
+    data_path: str,
+    config_path: str = "configs/training.yaml",
+    columns: list[str] | None = None,
+    out_of_core: bool = False,
+) -> None:
     cfg = load_yaml(config_path)
     artifact_dir = cfg["artifacts"]["model_dir"]
     exp_name = cfg["mlflow"]["experiment_name"]
 
-    df = load_training_data(data_path)
+    # Fail fast on a bad file before paying for the full load.
+    check_schema(read_schema(data_path), cfg["schema_contracts"][task], source=data_path)
+    if out_of_core:
+        artifacts, reference, holdout = run_out_of_core(task, data_path, cfg, columns)
+        _save_reference_and_report(artifacts, reference, artifact_dir, task)
+        _save_segment_report(artifacts, holdout, cfg, task)
+        _save_compliance_pack(artifacts, holdout, cfg, task)
+        return
+    df = load_training_data(data_path, columns)
     if task == "fraud":
         if {"transaction_ts", "customer_id", "amount"}.issubset(df.columns):
-            df = add_transaction_velocity_features(df)
-        if {"home_lat", "home_lon", "txn_lat", "txn_lon"}.issubset(df.columns):
-            df = add_geo_anomaly_feature(df)
+            df = add_transaction_velocity_features(df, **cfg["velocity_features"])
+        df = add_row_local_fraud_features(df)
         target_col = cfg["label_columns"]["fraud"]
     else:
-        df = add_credit_features(df)
+        # Built once per run and saved next to the model; the API looks levels up from it.
+        merchant_risk = TargetEncodingTable.fit(df, **cfg["merchant_risk"])
+        merchant_risk.save(target_encoding_path(artifact_dir, task))
+        df = add_credit_features(df, merchant_risk=merchant_risk, out_of_fold=True)
         target_col = cfg["label_columns"]["credit"]
 
-    artifacts = train_and_select(df, target_col, exp_name, artifact_dir, task)
+    artifacts = train_and_select(
+        df,
+        target_col,
+        exp_name,
+        artifact_dir,
+        task,
+        **cfg["training"],
+        **cfg["splits"],
+        tuning=cfg["tuning"],
+        preprocessing=cfg["preprocessing"],
+    )
+    _save_reference_and_report(artifacts, df.drop(columns=[target_col]), artifact_dir, task)
+    holdout = df.iloc[artifacts.holdout_rows]
+    _save_segment_report(artifacts, holdout, cfg, task)
+    _save_compliance_pack(artifacts, holdout, cfg, task)
+
+
+def _save_reference_and_report(
+    artifacts, reference: pd.DataFrame, artifact_dir: str, task: str
+) -> None:
+    bins_path = reference_bins_path(artifact_dir, task)
+    bins = build_reference_bins(reference)
+    # Score bins let the API compare live score distributions against training.
+    bins[SCORE_FEATURE] = build_score_bins(load_joblib(artifacts.model_path), reference)
+    save_reference_bins(bins, bins_path)
     print(f"Best model: {artifacts.best_model_name}")
     print(f"Model path: {artifacts.model_path}")
+    print(f"Fit seconds: {artifacts.fit_seconds}")
+    peaks = {stage: mem["peak_rss_mb"] for stage, mem in artifacts.stage_memory_mb.items()}
+    print(f"Peak RSS MB per stage: {peaks}")
+    worker_peak = artifacts.stage_memory_mb["fit"]["worker_peak_rss_mb"]
+    print(f"Peak worker RSS MB during fit: {worker_peak}")
+    if artifacts.best_config_path:
+        print(f"Best config: {artifacts.best_config_path}")
+    print(f"Reference bins: {bins_path}")
+
+
+def _save_segment_report(artifacts, holdout: pd.DataFrame | None, cfg: dict, task: str) -> None:
+    seg_cfg = cfg["segment_evaluation"]
+    if not seg_cfg["enabled"] or holdout is None:
+        return
+    start = time.perf_counter()
+    target_col = cfg["label_columns"][task]
+    y_true = holdout[target_col].to_numpy()
+    pipe = load_joblib(artifacts.model_path)
+    proba = pipe.predict_proba(holdout.drop(columns=[target_col]))[:, 1]
+    costs = threshold_search_kwargs(cfg)
+    # The deployed cut-off: a threshold tuned on this holdout would flatter its own metrics.
+    threshold = seg_cfg["threshold"]
+    if threshold is None:
+        threshold = load_yaml(seg_cfg["api_config"])["thresholds"][task]
+    segments = segment_columns(holdout, seg_cfg["segments"][task], seg_cfg["min_segment_rows"])
+    report = evaluate_segments(
+        y_true,
+        proba,
+        segments,
+        threshold,
+        fn_cost=costs["fn_cost"],
+        fp_cost=costs["fp_cost"],
+        n_bootstrap=seg_cfg["n_bootstrap"],
+        confidence=seg_cfg["confidence"],
+        n_jobs=seg_cfg["n_jobs"],
+        batch_cells=seg_cfg["batch_cells"],
+        seed=cfg["seed"],
+    )
+    path = write_segment_report(
+        {
+            "task": task,
+            "model": artifacts.best_model_name,
+            "model_version": file_digest(artifacts.model_path),
+            "n_rows": len(y_true),
+            "threshold": threshold,
+            "fn_cost": costs["fn_cost"],
+            "fp_cost": costs["fp_cost"],
+            "n_bootstrap": seg_cfg["n_bootstrap"],
+            "confidence": seg_cfg["confidence"],
+            "seconds": round(time.perf_counter() - start, 2),
+            "segments": report,
+        },
+        Path(cfg["artifacts"]["report_dir"]) / f"{task}_segment_evaluation.json",
+    )
+    print(f"Segment evaluation: {path}")
+
+
+def _save_compliance_pack(artifacts, holdout: pd.DataFrame | None, cfg: dict, task: str) -> None:
+    # Global SHAP for auditors and the API, computed once here instead of on request.
+    pack_cfg = dict(cfg["compliance_pack"])
+    if not pack_cfg.pop("enabled") or holdout is None:
+        return
+    target_col = cfg["label_columns"][task]
+    summary_path = build_compliance_pack(
+        artifacts.model_path,
+        holdout.drop(columns=[target_col]),
+        holdout[target_col],
+        cfg["artifacts"]["model_dir"],
+        task,
+        segment_columns=pack_cfg.pop("segment_columns").get(task),
+        seed=cfg["seed"],
+        **pack_cfg,
+    )
+    print(f"Compliance pack: {summary_path}")
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--task", choices=["fraud", "credit"], required=True)
-    parser.add_argument("--data", required=True)
+    parser.add_argument("--data", required=True, help="CSV, Parquet file or Parquet partition directory")
+    parser.add_argument("--columns", nargs="*", help="Load only these columns (must include the label)")
+    parser.add_argument(
+        "--out-of-core", action="store_true", help="Stream chunks instead of loading the table"
+    )
     args = parser.parse_args()
-    run(args.task, args.data)
+    run(args.task, args.data, columns=args.columns, out_of_core=args.out_of_core)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import argparse
+
+from src.feature_engineering.target_encoding import TargetEncodingTable
+from src.utils.config import load_yaml
+from src.utils.io import read_table
+
+
+def run(outcomes_path: str, config_path: str = "configs/api.yaml") -> None:
+    table_path = load_yaml(config_path)["merchant_risk_paths"]["credit"]
+    table = TargetEncodingTable.load(table_path)
+    outcomes = read_table(outcomes_path, columns=[table.column, table.target])
+    table.update(outcomes[table.column], outcomes[table.target])
+    # Atomic rewrite; the API's merchant risk watcher reloads the credit bundle on its next poll.
+    table.save(table_path)
+    print(f"Folded {len(outcomes)} outcomes into {table_path}")
+    print(f"Version: {table.version}, levels: {len(table.levels)}, prior: {table.prior:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--outcomes", required=True, help="CSV/Parquet of newly labelled rows")
+    args = parser.parse_args()
+    run(args.outcomes)
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.io import ensure_dir
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+INT_TYPES = [np.int8, np.int16, np.int32, np.int64]
+UINT_TYPES = [np.uint8, np.uint16, np.uint32, np.uint64]
+
+
+def _number_str(value) -> str:
+    if isinstance(value, (int, np.integer)):
+        return str(int(value))
+    value = float(value)
+    return str(int(value)) if value.is_integer() else str(value)
+
+
+def _as_str(series: pd.Series) -> pd.Series:
+    """Values as strings, spelled alike whichever dtype a chunk was parsed as; NaN stays NaN.
+
+    Integral numbers are written without a decimal point, so 1 from an int64 chunk and 1.0 from
+    a float64 chunk (one with missing values) are the same level.
+    """
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.map(_number_str, na_action="ignore").astype(object)
+    return series.astype(str).where(series.notna())
+
+
+@dataclass
+class _ColumnStats:
+    kinds: set = field(default_factory=set)  # "number", "bool" or "text", one per chunk dtype
+    integral: bool = True
+    has_nan: bool = False
+    min: float = np.inf
+    max: float = -np.inf
+    float32_rel_error: float = 0.0
+    levels: set = field(default_factory=set)
+    too_many_levels: bool = False
+
+    @property
+    def numeric(self) -> bool:
+        return self.kinds <= {"number"}
+
+    def update(self, series: pd.Series, max_categories: int) -> None:
+        is_bool = pd.api.types.is_bool_dtype(series)
+        is_number = pd.api.types.is_numeric_dtype(series) and not is_bool
+        self.kinds.add("bool" if is_bool else "number" if is_number else "text")
+        if is_number:
+            values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            present = values[~np.isnan(values)]
+            self.has_nan |= len(present) < len(values)
+            if len(present):
+                self.min = min(self.min, float(present.min()))
+                self.max = max(self.max, float(present.max()))
+                self.integral &= bool(np.all(present == np.round(present)))
+                with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+                    err = np.abs(present.astype(np.float32).astype(np.float64) - present)
+                    rel = np.where(present != 0, err / np.abs(present), err)
+                self.float32_rel_error = max(self.float32_rel_error, float(np.nan_to_num(rel, nan=np.inf).max()))
+        # Levels are kept for every chunk until there are too many: a column read as numbers in
+        # early chunks may still turn out to be categorical.
+        if not self.too_many_levels:
+            unique = pd.Series(series.dropna().unique())
+            if len(unique) > max_categories:
+                self.too_many_levels = True
+                return
+            self.levels.update(_as_str(unique))
+            self.too_many_levels = len(self.levels) > max_categories
+
+
+def _smallest_int(lo: float, hi: float):
+    candidates = UINT_TYPES if lo >= 0 else INT_TYPES
+    for dtype in candidates:
+        info = np.iinfo(dtype)
+        if info.min <= lo and hi <= info.max:
+            return dtype
+    return np.int64
+
+
+def plan_dtypes(
+    chunks, max_categories: int = 1024, float_rtol: float = 1e-6
+) -> dict[str, object]:
+    """Scan chunks once and choose the smallest dtype that holds every value of each column.
+
+    Integral columns without missing values become the narrowest (u)int type, float columns
+    become float32 when the round-trip relative error stays within ``float_rtol``, and string
+    columns with at most ``max_categories`` levels become a fixed ``CategoricalDtype`` so every
+    partition shares the same categories. Bool columns stay bool. A column read as numbers in
+    some chunks and as strings in others is categorical too, or plain strings when it has too
+    many levels, so every partition has the same column type.
+    """
+    stats: dict[str, _ColumnStats] = {}
+    for chunk in chunks:
+        for col in chunk.columns:
+            stats.setdefault(col, _ColumnStats()).update(chunk[col], max_categories)
+
+    plan: dict[str, object] = {}
+    for col, st in stats.items():
+        if st.numeric:
+            if st.min > st.max:
+                plan[col] = np.float32
+            elif st.integral and not st.has_nan:
+                plan[col] = _smallest_int(st.min, st.max)
+            elif st.float32_rel_error <= float_rtol and max(abs(st.min), abs(st.max)) < np.finfo(np.float32).max:
+                plan[col] = np.float32
+            else:
+                plan[col] = np.float64
+        elif st.kinds == {"bool"}:
+            plan[col] = np.bool_
+        elif not st.too_many_levels:
+            plan[col] = pd.CategoricalDtype(sorted(st.levels))
+        elif st.kinds == {"text"}:
+            plan[col] = object
+        else:
+            plan[col] = str  # the kind changed mid-scan
+    return plan
+
+
+def apply_dtypes(df: pd.DataFrame, plan: dict[str, object]) -> pd.DataFrame:
+    out = {}
+    for col in df.columns:
+        dtype = plan.get(col)
+        if isinstance(dtype, pd.CategoricalDtype):
+            out[col] = _as_str(df[col]).astype(dtype)
+        elif dtype is str:
+            out[col] = _as_str(df[col])
+        elif dtype is None or dtype is object:
+            out[col] = df[col]
+        else:
+            out[col] = df[col].astype(dtype)
+    return pd.DataFrame(out, index=df.index)
+
+
+def downcast_frame(df: pd.DataFrame, max_categories: int = 1024, float_rtol: float = 1e-6) -> pd.DataFrame:
+    return apply_dtypes(df, plan_dtypes([df], max_categories=max_categories, float_rtol=float_rtol))
+
+
+def csv_to_parquet(
+    csv_path: str | Path,
+    out_dir: str | Path,
+    chunksize: int = 500_000,
+    max_categories: int = 1024,
+) -> Path:
+    """Convert one CSV into a directory of downcast Parquet parts (one part per chunk).
+
+    The CSV is read twice in chunks: once to plan dtypes, once to write, so memory stays bounded.
+    """
+    out_dir = ensure_dir(out_dir)
+    for stale in out_dir.glob("part-*.parquet"):
+        stale.unlink()
+    plan = plan_dtypes(pd.read_csv(csv_path, chunksize=chunksize), max_categories=max_categories)
+    for i, chunk in enumerate(pd.read_csv(csv_path, chunksize=chunksize)):
+        apply_dtypes(chunk, plan).to_parquet(out_dir / f"part-{i:05d}.parquet", index=False)
+    logger.info("Converted %s -> %s", csv_path, out_dir)
+    return out_dir
+
+
+def convert_all(raw_dir: str | Path, processed_dir: str | Path, chunksize: int = 500_000) -> list[Path]:
+    """Mirror every CSV under ``raw_dir`` as a partitioned Parquet table under ``processed_dir``."""
+    raw_dir, processed_dir = Path(raw_dir), Path(processed_dir)
+    outputs = []
+    for csv_path in sorted(raw_dir.rglob("*.csv")):
+        target = processed_dir / csv_path.relative_to(raw_dir).with_suffix("")
+        outputs.append(csv_to_parquet(csv_path, target, chunksize=chunksize))
+    return outputs
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class QuantileSketch:
+    """Mergeable log-bucketed quantile sketch (DDSketch-style).
+
+    Every quantile estimate is within ``relative_accuracy`` of a true value at that rank.
+    Buckets are integer keys, so merging two sketches is adding their counters.
+    """
+
+    relative_accuracy: float = 0.01
+    positive: Counter = field(default_factory=Counter)
+    negative: Counter = field(default_factory=Counter)
+    zero_count: int = 0
+    count: int = 0
+    min_value: float = 1e-9
+
+    @property
+    def gamma(self) -> float:
+        return (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+
+    def _keys(self, magnitudes: np.ndarray) -> np.ndarray:
+        return np.ceil(np.log(magnitudes) / math.log(self.gamma)).astype(np.int64)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def _bounds(self, key: int) -> tuple[float, float]:
+        return self.gamma ** (key - 1), self.gamma**key
+
+    def update(self, values: np.ndarray) -> None:
+        values = values[~np.isnan(values)]
+        self.count += len(values)
+        small = np.abs(values) < self.min_value
+        self.zero_count += int(small.sum())
+        parts = ((self.positive, values[~small & (values > 0)]), (self.negative, -values[~small & (values < 0)]))
+        for store, part in parts:
+            if len(part):
+                keys, counts = np.unique(self._keys(part), return_counts=True)
+                store.update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def merge(self, other: QuantileSketch) -> None:
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def _buckets(self) -> list[tuple[float, float, float, int]]:
+        """All buckets in ascending value order as (low, high, representative, count)."""
+        out = []
+        for key in sorted(self.negative, reverse=True):
+            lo, hi = self._bounds(key)
+            out.append((-hi, -lo, -self._value(key), self.negative[key]))
+        if self.zero_count:
+            out.append((-self.min_value, self.min_value, 0.0, self.zero_count))
+        for key in sorted(self.positive):
+            lo, hi = self._bounds(key)
+            out.append((lo, hi, self._value(key), self.positive[key]))
+        return out
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return float("nan")
+        rank = q * (self.count - 1)
+        seen = 0
+        for _, _, value, n in self._buckets():
+            seen += n
+            if seen > rank:
+                return value
+        return self._buckets()[-1][2]
+
+    def count_outside(self, low: float, high: float) -> tuple[int, int]:
+        """Estimated count of values < low or > high, and an upper bound on that estimate's error.
+
+        Buckets entirely outside the fences are counted exactly; buckets straddling a fence are
+        assigned by their representative value and their full size is reported as the error bound.
+        """
+        estimate, error = 0, 0
+        for lo, hi, value, n in self._buckets():
+            if hi < low or lo > high:
+                estimate += n
+            elif lo < low <= hi or lo <= high < hi:
+                estimate += n if (value < low or value > high) else 0
+                error += n
+        return estimate, error
+
+
+@dataclass
+class ColumnSketch:
+    nulls: int = 0
+    min: float = math.inf
+    max: float = -math.inf
+    quantiles: QuantileSketch = field(default_factory=QuantileSketch)
+
+    def update(self, series: pd.Series) -> None:
+        values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        self.nulls += int(series.isna().sum())
+        present = values[~np.isnan(values)]
+        if len(present):
+            self.min = min(self.min, float(present.min()))
+            self.max = max(self.max, float(present.max()))
+        self.quantiles.update(present)
+
+    def merge(self, other: ColumnSketch) -> None:
+        self.nulls += other.nulls
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.quantiles.merge(other.quantiles)
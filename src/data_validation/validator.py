@@ -1,8 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from pathlib import Path
 
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
+
+from src.data_validation.sketches import ColumnSketch
+from src.utils.hashing import canonical_rows
+from src.utils.io import iter_table_chunks
 
 
 @dataclass
@@ -10,6 +17,12 @@ class ValidationReport:
     missing_ratio: dict[str, float]
     duplicate_rows: int
     outlier_counts: dict[str, int]
+    # Streaming validation only: max absolute error of each outlier count (0 when exact).
+    outlier_error_bounds: dict[str, int] = field(default_factory=dict)
+
+
+class SchemaContractError(ValueError):
+    pass
 
 
 def validate_frame(df: pd.DataFrame, numeric_cols: list[str]) -> ValidationReport:
@@ -26,3 +39,139 @@ def validate_frame(df: pd.DataFrame, numeric_cols: list[str]) -> ValidationRepor
         low, high = q1 - 1.5 * iqr, q3 + 1.5 * iqr
         outliers[col] = int(((series < low) | (series > high)).sum())
     return ValidationReport(missing_ratio=missing, duplicate_rows=duplicates, outlier_counts=outliers)
+
+
+def check_schema(dtypes: dict[str, object], contract: dict[str, str], source: str = "frame") -> None:
+    """Raise SchemaContractError unless every contract column exists with the expected kind.
+
+    ``contract`` maps column name to ``numeric``, ``categorical`` or ``any``.
+    """
+    problems = []
+    for col, kind in contract.items():
+        if col not in dtypes:
+            problems.append(f"missing column '{col}'")
+            continue
+        is_numeric = pd.api.types.is_numeric_dtype(dtypes[col]) and not pd.api.types.is_bool_dtype(dtypes[col])
+        if kind == "numeric" and not is_numeric:
+            problems.append(f"column '{col}' is {dtypes[col]}, expected numeric")
+        elif kind == "categorical" and is_numeric:
+            problems.append(f"column '{col}' is {dtypes[col]}, expected categorical")
+    if problems:
+        raise SchemaContractError(f"{source}: " + "; ".join(problems))
+
+
+def read_schema(path: str | Path, sample_rows: int = 1000) -> dict[str, object]:
+    """Column dtypes of a CSV (inferred from a small sample) or Parquet file/dir (from metadata)."""
+    path = Path(path)
+    if path.is_dir() or path.suffix == ".parquet":
+        import pyarrow.dataset as ds
+
+        return dict(ds.dataset(path, format="parquet").schema.empty_table().to_pandas().dtypes)
+    return dict(pd.read_csv(path, nrows=sample_rows).dtypes)
+
+
+class StreamingValidator:
+    """Chunk-at-a-time validator whose state merges across files and partitions.
+
+    Keeps per-column null counts, min/max and quantile sketches, plus 64-bit row hashes
+    for duplicate detection (8 bytes per distinct row).
+    """
+
+    def __init__(self, numeric_cols: list[str], relative_accuracy: float = 0.01):
+        self.numeric_cols = list(numeric_cols)
+        self.relative_accuracy = relative_accuracy
+        self.n_rows = 0
+        self.nulls: dict[str, int] = {}
+        self.sketches = {col: self._new_sketch() for col in self.numeric_cols}
+        self._hashes: list[np.ndarray] = []
+
+    def _new_sketch(self) -> ColumnSketch:
+        sketch = ColumnSketch()
+        sketch.quantiles.relative_accuracy = self.relative_accuracy
+        return sketch
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.n_rows += len(chunk)
+        for col, n in chunk.isna().sum().items():
+            self.nulls[col] = self.nulls.get(col, 0) + int(n)
+        for col in self.numeric_cols:
+            self.sketches[col].update(chunk[col])
+        hashes = pd.util.hash_pandas_object(canonical_rows(chunk), index=False)
+        self._add_hashes(np.unique(hashes.to_numpy()))
+
+    def _add_hashes(self, hashes: np.ndarray) -> None:
+        self._hashes.append(hashes)
+        if len(self._hashes) > 16:
+            self._compact_hashes()
+
+    def _compact_hashes(self) -> np.ndarray:
+        merged = np.unique(np.concatenate(self._hashes)) if self._hashes else np.empty(0, np.uint64)
+        self._hashes = [merged]
+        return merged
+
+    def merge(self, other: StreamingValidator) -> StreamingValidator:
+        self.n_rows += other.n_rows
+        for col, n in other.nulls.items():
+            self.nulls[col] = self.nulls.get(col, 0) + n
+        for col, sketch in other.sketches.items():
+            self.sketches.setdefault(col, self._new_sketch()).merge(sketch)
+        for hashes in other._hashes:
+            self._add_hashes(hashes)
+        return self
+
+    def report(self) -> ValidationReport:
+        missing = {col: n / self.n_rows if self.n_rows else 0.0 for col, n in self.nulls.items()}
+        duplicates = self.n_rows - len(self._compact_hashes())
+        outliers: dict[str, int] = {}
+        bounds: dict[str, int] = {}
+        for col, sketch in self.sketches.items():
+            q = sketch.quantiles
+            if q.count == 0:
+                outliers[col], bounds[col] = 0, 0
+                continue
+            q1 = min(max(q.quantile(0.25), sketch.min), sketch.max)
+            q3 = min(max(q.quantile(0.75), sketch.min), sketch.max)
+            iqr = q3 - q1
+            outliers[col], bounds[col] = q.count_outside(q1 - 1.5 * iqr, q3 + 1.5 * iqr)
+        return ValidationReport(
+            missing_ratio=missing,
+            duplicate_rows=int(duplicates),
+            outlier_counts=outliers,
+            outlier_error_bounds=bounds,
+        )
+
+
+def _validate_source(
+    path: str | Path, numeric_cols: list[str], chunksize: int, relative_accuracy: float
+) -> StreamingValidator:
+    validator = StreamingValidator(numeric_cols, relative_accuracy)
+    for chunk in iter_table_chunks(path, chunksize=chunksize):
+        validator.update(chunk)
+    return validator
+
+
+def validate_files(
+    paths: list[str | Path],
+    numeric_cols: list[str],
+    contract: dict[str, str] | None = None,
+    chunksize: int = 200_000,
+    n_jobs: int = 1,
+    relative_accuracy: float = 0.01,
+) -> ValidationReport:
+    """Validate files/partitions in parallel and merge them into one report.
+
+    Every schema is checked against ``contract`` before any data is read, so a bad file
+    fails fast instead of after the other partitions have been scanned.
+    """
+    if not paths:
+        raise ValueError("No files to validate")
+    if contract:
+        for path in paths:
+            check_schema(read_schema(path), contract, source=str(path))
+    states = Parallel(n_jobs=n_jobs)(
+        delayed(_validate_source)(path, numeric_cols, chunksize, relative_accuracy) for path in paths
+    )
+    merged = states[0]
+    for state in states[1:]:
+        merged.merge(state)
+    return merged.report()
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from src.drift_detection.reference_bins import (
+    PSI_ALERT,
+    SCORE_FEATURE,
+    FeatureBins,
+    psi_from_counts,
+)
+
+
+def _bin_index(fb: FeatureBins) -> Callable[[Any], int]:
+    """Scalar version of ``FeatureBins.bin_counts``: the bin one value falls into."""
+    missing = fb.n_bins - 1
+    if fb.kind == "numeric":
+        edges = fb.edges.tolist()
+
+        def index(value) -> int:
+            if value is None:
+                return missing
+            value = float(value)
+            return missing if value != value else bisect_left(edges, value)
+
+    else:
+        levels = {level: i for i, level in enumerate(fb.levels)}
+        other = len(fb.levels)
+
+        def index(value) -> int:
+            if value is None or value != value:
+                return missing
+            return levels.get(value, other)
+
+    return index
+
+
+class _Shard:
+    """One thread's counts: a ring of time slots, each a flat row of every feature's bins.
+
+    Rows are plain lists: incrementing a handful of list items is several times cheaper than
+    a NumPy fancy-indexed update of the same cells.
+    """
+
+    __slots__ = ("counts", "rows", "buckets")
+
+    def __init__(self, n_slots: int, n_bins: int):
+        self.counts = [[0] * n_bins for _ in range(n_slots)]
+        self.rows = [0] * n_slots
+        self.buckets = [-1] * n_slots  # absolute time bucket held by each slot
+
+
+class OnlineDriftMonitor:
+    """Rolling live histograms of model inputs and scores, binned like the training reference.
+
+    Time is cut into ``bucket_seconds`` slots, kept in a ring long enough for the largest window.
+    Each thread writes to its own shard, so the request path takes no lock: one bisect or dict
+    lookup and one list increment per feature. Readers sum every shard's live slots; a read
+    racing a write may miss that one observation, which is fine for monitoring.
+    """
+
+    def __init__(
+        self,
+        reference: dict[str, FeatureBins],
+        features: list[str] | None = None,
+        windows: dict[str, float] | None = None,
+        bucket_seconds: float = 60.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        names = [n for n in (features or reference) if n in reference and n != SCORE_FEATURE]
+        self.reference = {name: reference[name] for name in names}
+        self.score_bins = reference.get(SCORE_FEATURE)
+        self.windows = dict(windows or {"1h": 3600.0})
+        self.bucket_seconds = float(bucket_seconds)
+        self.n_slots = max(int(np.ceil(max(self.windows.values()) / self.bucket_seconds)), 1)
+        self.clock = clock
+
+        self._offsets: dict[str, int] = {}
+        self._index: list[tuple[str, int, Callable[[Any], int]]] = []
+        offset = 0
+        for name, fb in self.reference.items():
+            self._offsets[name] = offset
+            self._index.append((name, offset, _bin_index(fb)))
+            offset += fb.n_bins
+        self._score_offset = offset
+        self._score_index = _bin_index(self.score_bins) if self.score_bins is not None else None
+        self.n_bins = offset + (self.score_bins.n_bins if self.score_bins is not None else 0)
+
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._lock = threading.Lock()  # only taken when a new thread registers its shard
+
+    def _slot(self) -> tuple[_Shard, int]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard(self.n_slots, self.n_bins)
+            with self._lock:
+                self._shards.append(shard)
+        bucket = int(self.clock() // self.bucket_seconds)
+        slot = bucket % self.n_slots
+        if shard.buckets[slot] != bucket:
+            # The slot last held a bucket that has left every window; start it over.
+            shard.counts[slot] = [0] * self.n_bins
+            shard.rows[slot] = 0
+            shard.buckets[slot] = bucket
+        return shard, slot
+
+    def observe(self, payload: dict, score: float | None = None) -> None:
+        """Count one request; features absent from ``payload`` count as missing."""
+        shard, slot = self._slot()
+        row = shard.counts[slot]
+        for name, offset, index in self._index:
+            row[offset + index(payload.get(name))] += 1
+        if score is not None and self._score_index is not None:
+            row[self._score_offset + self._score_index(score)] += 1
+        shard.rows[slot] += 1
+
+    def observe_frame(self, frame: pd.DataFrame, scores=None) -> None:
+        """Count a batch of requests (e.g. one micro-batch) with a single slot update."""
+        n_rows = len(frame)
+        idx = []
+        for name, offset, index in self._index:
+            if name in frame.columns:
+                idx += [offset + index(value) for value in frame[name].tolist()]
+            else:
+                idx += [offset + self.reference[name].n_bins - 1] * n_rows
+        if scores is not None and self._score_index is not None:
+            idx += [self._score_offset + self._score_index(s) for s in np.asarray(scores).tolist()]
+        counts = np.bincount(np.asarray(idx, dtype=np.int64), minlength=self.n_bins)
+        shard, slot = self._slot()
+        row = shard.counts[slot]
+        for i in np.flatnonzero(counts).tolist():
+            row[i] += int(counts[i])
+        shard.rows[slot] += n_rows
+
+    def window_counts(self, seconds: float) -> tuple[np.ndarray, int]:
+        """Summed bin counts and row count over the last ``seconds``, in whole slots."""
+        now = int(self.clock() // self.bucket_seconds)
+        n_buckets = max(int(round(seconds / self.bucket_seconds)), 1)
+        counts = np.zeros(self.n_bins, dtype=np.int64)
+        rows = 0
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for slot, bucket in enumerate(shard.buckets):
+                if now - n_buckets < bucket <= now:
+                    counts += np.asarray(shard.counts[slot], dtype=np.int64)
+                    rows += shard.rows[slot]
+        return counts, rows
+
+    def report(
+        self,
+        windows: list[str] | None = None,
+        alert_threshold: float = PSI_ALERT,
+        min_rows: int = 0,
+    ) -> dict[str, dict]:
+        """PSI per feature and for the score in each window, with ``psi_from_counts`` math.
+
+        Windows with fewer than ``min_rows`` rows report PSI but never alert.
+        """
+        out = {}
+        for label in windows or list(self.windows):
+            counts, rows = self.window_counts(self.windows[label])
+
+            def entry(fb: FeatureBins, offset: int) -> dict:
+                psi = psi_from_counts(fb.expected, counts[offset : offset + fb.n_bins])
+                alert = rows >= min_rows and psi > alert_threshold
+                return {"kind": fb.kind, "psi": round(psi, 6), "alert": alert}
+
+            features = {name: entry(fb, self._offsets[name]) for name, fb in self.reference.items()}
+            score = None
+            if self.score_bins is not None:
+                score = entry(self.score_bins, self._score_offset)
+            alerts = [name for name, row in features.items() if row["alert"]]
+            if score is not None and score["alert"]:
+                alerts.append("score")
+            out[label] = {"n_rows": rows, "score": score, "features": features, "alerts": alerts}
+        return out
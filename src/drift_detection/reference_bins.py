@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.io import load_joblib, save_joblib
+
+OTHER_LEVEL = "__other__"
+PSI_ALERT = 0.25
+# Key of the model score's bins in a reference bins artifact; not an input column.
+SCORE_FEATURE = "__score__"
+
+
+@dataclass
+class FeatureBins:
+    """Reference binning for one feature plus the reference counts per bin.
+
+    Numeric features use the same quantile cut points as ``population_stability_index``
+    with open-ended outer bins; categorical (and low-cardinality numeric) features use
+    the reference levels plus an ``__other__`` bucket. The last bin always counts missing values.
+    """
+
+    name: str
+    kind: str
+    edges: np.ndarray | None = None
+    levels: list = field(default_factory=list)
+    expected: np.ndarray | None = None
+
+    @property
+    def n_bins(self) -> int:
+        if self.kind == "numeric":
+            return len(self.edges) + 2
+        return len(self.levels) + 2
+
+    def bin_counts(self, values: pd.Series) -> np.ndarray:
+        counts = np.zeros(self.n_bins, dtype=np.int64)
+        missing = values.isna().to_numpy()
+        counts[-1] = int(missing.sum())
+        present = values[~missing]
+        if self.kind == "numeric":
+            idx = np.searchsorted(self.edges, present.to_numpy(dtype=np.float64), side="left")
+            counts[:-1] += np.bincount(idx, minlength=len(self.edges) + 1)
+        else:
+            level_counts = present.value_counts()
+            index = {level: i for i, level in enumerate(self.levels)}
+            for level, n in level_counts.items():
+                counts[index.get(level, len(self.levels))] += int(n)
+        return counts
+
+
+def build_feature_bins(series: pd.Series, bins: int = 10, max_levels: int = 50) -> FeatureBins:
+    name = str(series.name)
+    present = series.dropna()
+    if pd.api.types.is_numeric_dtype(series) and present.nunique() > bins:
+        cut_points = np.unique(present.quantile(np.linspace(0, 1, bins + 1)).values)
+        feature = FeatureBins(name=name, kind="numeric", edges=cut_points[1:-1].astype(np.float64))
+    else:
+        levels = present.value_counts().index[:max_levels].tolist()
+        feature = FeatureBins(name=name, kind="categorical", levels=levels)
+    feature.expected = feature.bin_counts(series)
+    return feature
+
+
+def build_reference_bins(
+    df: pd.DataFrame, columns: list[str] | None = None, bins: int = 10
+) -> dict[str, FeatureBins]:
+    columns = columns or df.columns.tolist()
+    return {col: build_feature_bins(df[col], bins=bins) for col in columns}
+
+
+def build_score_bins(
+    pipe, frame: pd.DataFrame, max_rows: int = 100_000, seed: int = 42
+) -> FeatureBins:
+    """Reference bins of the model's positive-class score over (a sample of) ``frame``."""
+    if len(frame) > max_rows:
+        frame = frame.sample(n=max_rows, random_state=seed)
+    scores = pipe.predict_proba(frame)[:, 1]
+    return build_feature_bins(pd.Series(scores, name=SCORE_FEATURE))
+
+
+def reference_bins_path(artifact_dir: str | Path, task_name: str) -> Path:
+    return Path(artifact_dir) / f"{task_name}_reference_bins.joblib"
+
+
+def save_reference_bins(reference: dict[str, FeatureBins], path: str | Path) -> None:
+    save_joblib(reference, path)
+
+
+def load_reference_bins(path: str | Path) -> dict[str, FeatureBins]:
+    return load_joblib(path)
+
+
+def psi_from_counts(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI over pre-binned counts, using the same smoothing as ``population_stability_index``."""
+    if expected.sum() == 0 or actual.sum() == 0:
+        return 0.0
+    exp_pct = expected / expected.sum()
+    act_pct = actual / actual.sum()
+    eps = 1e-6
+    psi_vals = (act_pct + eps - exp_pct + eps) * np.log((act_pct + eps) / (exp_pct + eps))
+    return float(psi_vals.sum())
+
+
+class DriftAccumulator:
+    """Accumulates production histograms for many features chunk by chunk (bounded memory)."""
+
+    def __init__(self, reference: dict[str, FeatureBins]):
+        self.reference = reference
+        self.counts = {name: np.zeros(fb.n_bins, dtype=np.int64) for name, fb in reference.items()}
+        self.n_rows = 0
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        self.n_rows += len(chunk)
+        for name, fb in self.reference.items():
+            if name in chunk.columns:
+                self.counts[name] += fb.bin_counts(chunk[name])
+
+    def report(self, alert_threshold: float = PSI_ALERT) -> dict[str, dict]:
+        out = {}
+        for name, fb in self.reference.items():
+            psi = psi_from_counts(fb.expected, self.counts[name])
+            out[name] = {"kind": fb.kind, "psi": round(psi, 6), "alert": psi > alert_threshold}
+        return out
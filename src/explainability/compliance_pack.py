@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from src.explainability.shap_explainer import CachedExplainer
+from src.model_evaluation.segments import segment_labels
+from src.utils.io import file_digest, load_joblib
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+PACK_FORMAT = 1
+# Rows per SHAP call and per worker task; contributions are computed on a dense float64 block.
+EXPLAIN_BLOCK_ROWS = 5_000
+
+
+def compliance_pack_path(artifact_dir: str | Path, task_name: str) -> Path:
+    return Path(artifact_dir) / f"{task_name}_shap_pack.npz"
+
+
+def compliance_summary_path(artifact_dir: str | Path, task_name: str) -> Path:
+    return Path(artifact_dir) / f"{task_name}_shap_summary.json"
+
+
+def stratified_sample(
+    labels: np.ndarray, max_rows: int, min_per_class: int = 500, seed: int = 42
+) -> tuple[np.ndarray, np.ndarray]:
+    """Row positions of a per-class sample of at most ``max_rows`` rows, and their weights.
+
+    Classes get rows in proportion to their size, but at least ``min_per_class`` (or all of them),
+    so a rare positive class is explained on more than a handful of rows. The weight of a row is
+    its class size over its class sample size, so weighted means estimate the full set.
+    """
+    labels = np.asarray(labels)
+    if len(labels) <= max_rows:
+        return np.arange(len(labels)), np.ones(len(labels))
+    rng = np.random.default_rng(seed)
+    classes, counts = np.unique(labels, return_counts=True)
+    floor = np.minimum(counts, min(min_per_class, max_rows // len(classes)))
+    share = (max_rows - floor.sum()) * counts / counts.sum()
+    take = np.minimum(counts, floor + np.floor(share).astype(int))
+    # Rows lost to rounding go to the classes with the largest remainders that still have rows.
+    for i in np.argsort(-(share % 1), kind="stable"):
+        if take.sum() < max_rows and take[i] < counts[i]:
+            take[i] += 1
+    positions, weights = [], []
+    for cls, n_class, n_take in zip(classes, counts, take):
+        rows = np.flatnonzero(labels == cls)
+        positions.append(rng.choice(rows, size=n_take, replace=False))
+        weights.append(np.full(n_take, n_class / n_take))
+    order = np.argsort(np.concatenate(positions), kind="stable")
+    return np.concatenate(positions)[order], np.concatenate(weights)[order]
+
+
+# Per-process explainer, built once by the pool initializer rather than shipped with every block.
+_WORKER: dict[str, CachedExplainer] = {}
+
+
+def _init_worker(model_path: str) -> None:
+    _WORKER["explainer"] = CachedExplainer(load_joblib(model_path, mmap_mode="r"))
+
+
+def _explain_block(X) -> np.ndarray:
+    return _WORKER["explainer"].contributions(X).astype(np.float32)
+
+
+def shap_values(model_path: str, X, workers: int = 1) -> np.ndarray:
+    """Per-source-feature SHAP values of a transformed matrix, computed in row blocks.
+
+    With ``workers > 1`` the blocks are spread over processes, each loading the pipeline once;
+    results come back in row order and are stacked. Values are float32.
+    """
+    n_rows = X.shape[0]
+    n_blocks = max(int(np.ceil(n_rows / EXPLAIN_BLOCK_ROWS)), min(workers, n_rows), 1)
+    bounds = np.linspace(0, n_rows, n_blocks + 1).astype(int)
+    blocks = [X[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+    if workers > 1:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            parts = list(pool.map(_explain_block, blocks))
+    else:
+        _init_worker(model_path)
+        try:
+            parts = [_explain_block(block) for block in blocks]
+        finally:
+            _WORKER.clear()
+    return np.vstack(parts)
+
+
+def _importance(values: np.ndarray, weights: np.ndarray, names: list[str]) -> list[dict]:
+    mean_abs = np.average(np.abs(values), axis=0, weights=weights)
+    mean = np.average(values, axis=0, weights=weights)
+    order = np.argsort(-mean_abs, kind="stable")
+    return [
+        {"feature": names[j], "mean_abs_shap": float(mean_abs[j]), "mean_shap": float(mean[j])}
+        for j in order
+    ]
+
+
+def summarize_segments(
+    values: np.ndarray,
+    weights: np.ndarray,
+    scores: np.ndarray,
+    segments: dict[str, np.ndarray],
+    names: list[str],
+    top_n: int = 10,
+) -> dict[str, dict[str, dict]]:
+    """Weighted row count, mean score and top-N global importance per level of every segment."""
+    out: dict[str, dict[str, dict]] = {}
+    for segment, levels in segments.items():
+        out[segment] = {}
+        for level in sorted(set(levels.tolist())):
+            mask = levels == level
+            w = weights[mask]
+            out[segment][level] = {
+                "n_rows": int(mask.sum()),
+                "weight": float(w.sum()),
+                "mean_score": float(np.average(scores[mask], weights=w)),
+                "top_features": _importance(values[mask], w, names)[:top_n],
+            }
+    return out
+
+
+def build_compliance_pack(
+    model_path: str,
+    frame: pd.DataFrame,
+    labels,
+    artifact_dir: str | Path,
+    task_name: str,
+    max_rows: int = 20_000,
+    min_per_class: int = 500,
+    segment_columns: list[str] | None = None,
+    min_segment_rows: int = 50,
+    workers: int = 1,
+    dtype: str = "float16",
+    top_n: int = 10,
+    seed: int = 42,
+) -> Path | None:
+    """Explain a stratified holdout sample and save the per-row pack plus a JSON summary.
+
+    ``<task>_shap_pack.npz`` holds the SHAP values (``dtype``, one column per source feature), the
+    base value, scores, labels, sample weights and segment levels of every sampled row.
+    ``<task>_shap_summary.json`` holds the global importance and per-segment summaries. Both carry
+    the model file's digest, so consumers can tell whether they match the model they serve.
+    Returns the summary path, or None when the model has no SHAP explainer.
+    """
+    pipe = load_joblib(model_path)
+    explainer = CachedExplainer(pipe)
+    if not explainer.available:
+        logger.warning("No SHAP explainer for %s; skipping the compliance pack", model_path)
+        return None
+    labels = np.asarray(labels)
+    rows, weights = stratified_sample(labels, max_rows, min_per_class=min_per_class, seed=seed)
+    sample = frame.iloc[rows]
+    X = pipe.named_steps["prep"].transform(sample)
+    scores = pipe.named_steps["model"].predict_proba(X)[:, 1]
+    values = shap_values(model_path, X, workers=workers)
+
+    names = explainer.feature_names
+    segments = {"label": labels[rows].astype(str)}
+    for col in segment_columns or []:
+        if col not in sample.columns:
+            logger.warning("Segment column %r is not in the data; skipped", col)
+            continue
+        # Levels with too few sampled rows would publish noisy attributions; they are pooled.
+        segments[col] = segment_labels(sample[col], min_rows=min_segment_rows)
+
+    model_version = file_digest(model_path)
+    pack_path = compliance_pack_path(artifact_dir, task_name)
+    tmp = pack_path.with_name(f".{pack_path.name}.tmp")
+    with tmp.open("wb") as f:
+        np.savez_compressed(
+            f,
+            shap_values=values.astype(dtype),
+            base_value=np.float64(explainer.base_value),
+            feature_names=np.asarray(names, dtype=str),
+            row_position=rows.astype(np.int64),
+            score=scores.astype(np.float32),
+            label=labels[rows],
+            weight=weights.astype(np.float32),
+            model_version=np.asarray(model_version),
+            **{f"segment__{name}": levels.astype(str) for name, levels in segments.items()},
+        )
+    os.replace(tmp, pack_path)
+
+    summary = {
+        "format": PACK_FORMAT,
+        "task": task_name,
+        "model_version": model_version,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "pack_path": pack_path.name,
+        "explainer": explainer.kind,
+        "base_value": float(explainer.base_value),
+        "n_holdout": int(len(labels)),
+        "n_rows": int(len(rows)),
+        "dtype": dtype,
+        "feature_names": names,
+        "global_importance": _importance(values, weights, names),
+        "segments": summarize_segments(values, weights, scores, segments, names, top_n=top_n),
+    }
+    summary_path = compliance_summary_path(artifact_dir, task_name)
+    tmp = summary_path.with_name(f".{summary_path.name}.tmp")
+    tmp.write_text(json.dumps(summary, indent=2))
+    os.replace(tmp, summary_path)
+    logger.info("Compliance pack for %s: %d rows x %d features", task_name, *values.shape)
+    return summary_path
+
+
+def load_compliance_summary(path: str | Path) -> dict[str, Any]:
+    return json.loads(Path(path).read_text())
+
+
+def load_compliance_pack(path: str | Path) -> dict[str, np.ndarray]:
+    """Every array of a pack, with SHAP values in their stored dtype."""
+    with np.load(path, allow_pickle=False) as pack:
+        return {name: pack[name] for name in pack.files}
@@ -4,6 +4,13 @@ from typing import Any
 
 import numpy as np
 import pandas as pd
+from scipy import sparse
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+FALLBACK_NOTE = "Fallback explanation. Global SHAP attributions are in the model's compliance pack."
 
 
 def summarize_feature_importance(model, X: pd.DataFrame, top_n: int = 10) -> list[dict[str, Any]]:
@@ -20,28 +27,148 @@ def summarize_feature_importance(model, X: pd.DataFrame, top_n: int = 10) -> lis
     return [{"feature": str(f), "importance": float(v)} for f, v in ranking]
 
 
+def source_feature_names(prep) -> list[str]:
+    """Map every transformed column of a fitted ColumnTransformer back to its raw input column."""
+    names: list[str] = []
+    for name, transformer, cols in prep.transformers_:
+        if name == "remainder" or transformer == "drop" or len(cols) == 0:
+            continue
+        cols = [str(c) for c in cols]
+        for out in transformer.get_feature_names_out(cols):
+            matches = [c for c in cols if out == c or out.startswith(f"{c}_")]
+            names.append(max(matches, key=len) if matches else str(out))
+    return names
+
+
+def record_training_mean(pipe, Xt) -> None:
+    """Store the column means of the transformed training matrix on the pipeline.
+
+    They are the baseline of the linear explainer, as the background mean is for
+    ``shap.LinearExplainer``; one-hot and passthrough columns do not average to zero.
+    """
+    pipe.transformed_mean_ = np.asarray(Xt.mean(axis=0), dtype=np.float64).ravel()
+
+
+def _fallback_explanation(score: float) -> list[dict[str, Any]]:
+    return [{"feature": "model_score", "impact": round(score, 4), "note": FALLBACK_NOTE}]
+
+
+class CachedExplainer:
+    """Builds the explainer for a fitted prep + model pipeline once and reuses it for every request.
+
+    Tree ensembles use ``shap.TreeExplainer``. Linear models use the closed form
+    ``coef * (x - mean)``, where ``mean`` is the transformed training mean saved by
+    ``record_training_mean``, so attributions average to zero over the training data.
+    Contributions of one-hot columns are summed back onto their source feature.
+    """
+
+    def __init__(self, pipe, top_n: int = 3):
+        self.pipe = pipe
+        self.prep = pipe.named_steps["prep"]
+        self.model = pipe.named_steps["model"]
+        self.top_n = top_n
+        self.kind = "none"
+        self._explainer = None
+
+        transformed = source_feature_names(self.prep)
+        self.feature_names = list(dict.fromkeys(transformed))
+        self._group = np.zeros((len(transformed), len(self.feature_names)), dtype=np.float64)
+        for i, feature in enumerate(transformed):
+            self._group[i, self.feature_names.index(feature)] = 1.0
+
+        if not hasattr(self.model, "predict_proba"):
+            return
+        if hasattr(self.model, "coef_") and np.ndim(self.model.coef_) == 2 and self.model.coef_.shape[0] == 1:
+            self.kind = "linear"
+            self._mean = getattr(pipe, "transformed_mean_", None)
+            if self._mean is None:
+                # Pipelines saved before the mean was recorded: numeric columns are centred by
+                # the scaler, one-hot columns are not, so their attributions carry an offset.
+                logger.warning("Pipeline has no training mean; linear baseline is zero")
+                self._mean = np.zeros(self.model.coef_.shape[1])
+            return
+        try:
+            import shap
+
+            self._explainer = shap.TreeExplainer(self.model)
+            self.kind = "tree"
+        except Exception as exc:
+            logger.warning("No SHAP explainer for %s, using fallback: %s", type(self.model).__name__, exc)
+
+    @property
+    def available(self) -> bool:
+        return self.kind != "none"
+
+    @property
+    def base_value(self) -> float:
+        """Model output the contributions of a row add up from (log-odds for linear models)."""
+        if self.kind == "linear":
+            return float(self.model.intercept_[0] + self.model.coef_[0] @ self._mean)
+        return float(np.ravel(self._explainer.expected_value)[-1])
+
+    def contributions(self, X, approximate: bool = False) -> np.ndarray:
+        """Signed per-source-feature contributions for a transformed matrix, shape (n_rows, n_features).
+
+        ``approximate`` uses Saabas path attributions for trees instead of exact TreeSHAP: orders of
+        magnitude faster, at the cost of occasionally reordering close contributions.
+        """
+        # XGBoost reads entries absent from a CSR matrix as missing, not zero, so it is explained
+        # on the same CSR it scores; densifying would explain a different input.
+        keep_sparse = self.kind == "tree" and not type(self.model).__module__.startswith("sklearn.")
+        if sparse.issparse(X) and not keep_sparse:
+            X = X.toarray()
+        if not sparse.issparse(X):
+            X = np.asarray(X, dtype=np.float64)
+        if self.kind == "linear":
+            values = (X - self._mean) * self.model.coef_[0]
+        else:
+            values = np.asarray(self._explainer.shap_values(X, approximate=approximate))
+            if values.ndim == 3:
+                values = values[:, :, -1]
+        return values @ self._group
+
+    def explain_matrix(self, X, scores=None) -> list[list[dict[str, Any]]]:
+        if not hasattr(self.model, "predict_proba"):
+            return [[] for _ in range(X.shape[0])]
+        if not self.available:
+            return self._fallback(X, scores)
+        try:
+            contrib = self.contributions(X)
+        except Exception as exc:
+            logger.warning("SHAP explanation failed, using fallback: %s", exc)
+            return self._fallback(X, scores)
+
+        order = np.argsort(-np.abs(contrib), axis=1, kind="stable")[:, : self.top_n]
+        explanations = []
+        for row, idx in zip(contrib, order):
+            explanations.append(
+                [
+                    {
+                        "feature": self.feature_names[j],
+                        "impact": float(abs(row[j])),
+                        "direction": "increases_risk" if row[j] >= 0 else "decreases_risk",
+                    }
+                    for j in idx
+                ]
+            )
+        return explanations
+
+    def explain_frame(self, rows: pd.DataFrame, scores=None) -> list[list[dict[str, Any]]]:
+        return self.explain_matrix(self.prep.transform(rows), scores=scores)
+
+    def _fallback(self, X, scores) -> list[list[dict[str, Any]]]:
+        if scores is None:
+            scores = self.model.predict_proba(X)[:, 1]
+        return [_fallback_explanation(float(s)) for s in scores]
+
+
 def local_explanation(pipe, row: pd.DataFrame, top_n: int = 3) -> list[dict[str, Any]]:
-    # business-friendly fallback explanation when exact SHAP on transformed matrix is expensive.
-    model = pipe.named_steps["model"]
-    prepped = pipe.named_steps["prep"].transform(row)
-    if not hasattr(model, "predict_proba"):
-        return []
+    explanations = local_explanations(pipe, row, top_n=top_n)
+    return explanations[0] if explanations else []
+
 
-    try:
-        import shap
-
-        explainer = shap.Explainer(model)
-        shap_values = explainer(prepped)
-        vals = np.abs(np.asarray(shap_values.values)[0])
-        names = [f"feature_{i}" for i in range(vals.shape[0])]
-        ranking = sorted(zip(names, vals), key=lambda x: x[1], reverse=True)[:top_n]
-        return [{"feature": f, "impact": float(v)} for f, v in ranking]
-    except Exception:
-        score = float(pipe.predict_proba(row)[:, 1][0])
-        return [
-            {
-                "feature": "model_score",
-                "impact": round(score, 4),
-                "note": "Fallback explanation. Enable full SHAP artifacts offline for compliance packs.",
-            }
-        ]
+def local_explanations(
+    pipe, rows: pd.DataFrame, top_n: int = 3, scores: np.ndarray | None = None
+) -> list[list[dict[str, Any]]]:
+    # One-off helper; long-lived callers such as the API should keep a CachedExplainer instead.
+    return CachedExplainer(pipe, top_n=top_n).explain_frame(rows, scores=scores)
@@ -3,6 +3,9 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
+from src.feature_engineering.target_encoding import TargetEncodingTable
+from src.feature_engineering.velocity import compute_velocity_features
+
 EARTH_RADIUS_KM = 6371.0
 
 
@@ -19,15 +22,13 @@ def add_transaction_velocity_features(
     customer_col: str = "customer_id",
     ts_col: str = "transaction_ts",
     amount_col: str = "amount",
+    features: dict[str, tuple[str, str]] | None = None,
+    n_jobs: int = 1,
 ) -> pd.DataFrame:
-    out = df.copy()
-    out[ts_col] = pd.to_datetime(out[ts_col])
-    out = out.sort_values([customer_col, ts_col])
-    grouped = out.set_index(ts_col).groupby(customer_col)[amount_col]
-    out["txn_count_1h"] = grouped.rolling("1h").count().reset_index(level=0, drop=True).values
-    out["txn_count_24h"] = grouped.rolling("24h").count().reset_index(level=0, drop=True).values
-    out["txn_amount_7d"] = grouped.rolling("7d").sum().reset_index(level=0, drop=True).fillna(0).values
-    return out
+    # Defaults to txn_count_1h, txn_count_24h and txn_amount_7d; see velocity.feature_grid for more.
+    return compute_velocity_features(
+        df, features, customer_col=customer_col, ts_col=ts_col, amount_col=amount_col, n_jobs=n_jobs
+    )
 
 
 def add_geo_anomaly_feature(df: pd.DataFrame) -> pd.DataFrame:
@@ -38,10 +39,46 @@ def add_geo_anomaly_feature(df: pd.DataFrame) -> pd.DataFrame:
     return out
 
 
-def add_credit_features(df: pd.DataFrame) -> pd.DataFrame:
+def add_row_local_fraud_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Fraud features computable from each row alone, so they also apply chunk by chunk."""
+    if {"home_lat", "home_lon", "txn_lat", "txn_lon"}.issubset(df.columns):
+        df = add_geo_anomaly_feature(df)
+    return df
+
+
+def serving_merchant_risk(rows, merchant_risk: TargetEncodingTable | None):
+    """``merchant_risk_score`` at serving time, for one payload dict or a frame of rows.
+
+    Levels are looked up in the table saved with the model, unseen ones get its prior. Without a
+    table the score is missing and the model's imputer fills it, in the API and batch scoring
+    alike; the training fallback (mean ``label_proxy`` per merchant) needs labels serving lacks.
+    """
+    if isinstance(rows, pd.DataFrame):
+        if merchant_risk is None:
+            return np.full(len(rows), np.nan)
+        return merchant_risk.transform(rows[merchant_risk.column])
+    if merchant_risk is None:
+        return np.nan
+    return merchant_risk.lookup(rows[merchant_risk.column])
+
+
+def add_credit_features(
+    df: pd.DataFrame,
+    merchant_risk: TargetEncodingTable | None = None,
+    out_of_fold: bool = False,
+    serving: bool = False,
+) -> pd.DataFrame:
     out = df.copy()
     out["income_to_emi_ratio"] = out["monthly_income"] / np.clip(out["monthly_emi"], 1, None)
     out["utilization_ratio"] = out["credit_used"] / np.clip(out["credit_limit"], 1, None)
     out["delinquency_trend_90d"] = out[["dpd_m1", "dpd_m2", "dpd_m3"]].mean(axis=1)
-    out["merchant_risk_score"] = out.groupby("merchant_category")["label_proxy"].transform("mean")
+    if serving:
+        out["merchant_risk_score"] = serving_merchant_risk(out, merchant_risk)
+    elif merchant_risk is None:
+        out["merchant_risk_score"] = out.groupby("merchant_category")["label_proxy"].transform("mean")
+    elif out_of_fold:
+        # Training rows: each row is encoded from the other folds only.
+        out["merchant_risk_score"] = merchant_risk.out_of_fold(out)
+    else:
+        out["merchant_risk_score"] = merchant_risk.transform(out[merchant_risk.column])
     return out
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.io import load_joblib, read_table, save_joblib
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Same window labels as the offline pandas rolling windows in add_transaction_velocity_features.
+DEFAULT_WINDOWS: dict[str, str] = {"1h": "1h", "24h": "24h", "7d": "7d"}
+# Offline feature name -> (aggregation, window label).
+OFFLINE_FEATURES: dict[str, tuple[str, str]] = {
+    "txn_count_1h": ("count", "1h"),
+    "txn_count_24h": ("count", "24h"),
+    "txn_amount_7d": ("sum", "7d"),
+}
+
+
+class _CustomerWindows:
+    """Per-customer event buffer with one running (count, sum) and start pointer per window.
+
+    Events only enter at the tail and leave at the head, so each event is touched a
+    bounded number of times: updates are O(1) amortized. Expired events are compacted
+    away once they make up half of the buffer.
+    """
+
+    __slots__ = ("ts", "amount", "starts", "counts", "sums")
+
+    def __init__(self, n_windows: int) -> None:
+        self.ts: list[int] = []
+        self.amount: list[float] = []
+        self.starts = [0] * n_windows
+        self.counts = [0] * n_windows
+        self.sums = [0.0] * n_windows
+
+    def advance(self, now_ns: int, widths_ns: list[int]) -> None:
+        for k, width in enumerate(widths_ns):
+            start, cutoff = self.starts[k], now_ns - width
+            while start < len(self.ts) and self.ts[start] <= cutoff:
+                value = self.amount[start]
+                if not math.isnan(value):
+                    self.counts[k] -= 1
+                    self.sums[k] -= value
+                start += 1
+            if self.counts[k] == 0:
+                self.sums[k] = 0.0  # drop accumulated rounding error whenever a window empties
+            self.starts[k] = start
+        head = min(self.starts)
+        if head > 32 and head * 2 > len(self.ts):
+            del self.ts[:head], self.amount[:head]
+            self.starts = [s - head for s in self.starts]
+
+    def add(self, ts_ns: int, amount: float, widths_ns: list[int]) -> None:
+        # Late events are treated as arriving at the latest seen time to keep the buffer ordered.
+        if self.ts and ts_ns < self.ts[-1]:
+            ts_ns = self.ts[-1]
+        self.ts.append(ts_ns)
+        self.amount.append(amount)
+        if not math.isnan(amount):
+            for k in range(len(widths_ns)):
+                self.counts[k] += 1
+                self.sums[k] += amount
+        self.advance(ts_ns, widths_ns)
+
+    def remove(self, amount: float, ts_ns: int | None) -> bool:
+        """Take back the newest event of ``amount`` recorded at or after ``ts_ns`` (any time when
+        None; late events are stored at the latest time seen, so never before ``ts_ns``)."""
+        for i in range(len(self.ts) - 1, -1, -1):
+            if ts_ns is not None and self.ts[i] < ts_ns:
+                return False
+            value = self.amount[i]
+            if value == amount or (math.isnan(value) and math.isnan(amount)):
+                break
+        else:
+            return False
+        for k, start in enumerate(self.starts):
+            if i < start:
+                self.starts[k] = start - 1  # already out of this window
+            elif not math.isnan(value):
+                self.counts[k] -= 1
+                self.sums[k] -= value
+                if self.counts[k] == 0:
+                    self.sums[k] = 0.0
+        del self.ts[i], self.amount[i]
+        return True
+
+
+class VelocityFeatureStore:
+    """In-process online store for per-customer transaction velocity features.
+
+    Produces ``txn_count_<window>`` and ``txn_amount_<window>`` with the same semantics as the
+    offline pandas rolling windows: the window is ``(t - width, t]`` and includes the current event.
+    Customers idle for longer than the largest window contribute nothing, so a sweep after every
+    ``len(self)`` updates (at least ``sweep_every``) evicts them; memory tracks active customers.
+
+    The state lives in one process: run the API with a single uvicorn worker, or each worker
+    counts only the transactions routed to it.
+    """
+
+    def __init__(self, windows: dict[str, str] | None = None, sweep_every: int = 1024) -> None:
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.labels = list(self.windows)
+        self.widths_ns = [int(pd.Timedelta(w).value) for w in self.windows.values()]
+        self.sweep_every = sweep_every
+        self.evicted = 0
+        self._customers: dict[str, _CustomerWindows] = {}
+        self._since_sweep = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._customers)
+
+    def _features(self, state: _CustomerWindows | None) -> dict[str, float]:
+        out: dict[str, float] = {}
+        for k, label in enumerate(self.labels):
+            out[f"txn_count_{label}"] = state.counts[k] if state else 0
+            out[f"txn_amount_{label}"] = state.sums[k] if state else 0.0
+        return out
+
+    def update(self, customer_id: str, amount: float, ts_ns: int | None = None) -> dict[str, float]:
+        """Record a transaction and return the velocity features including it."""
+        ts_ns = time.time_ns() if ts_ns is None else int(ts_ns)
+        with self._lock:
+            state = self._customers.get(customer_id)
+            if state is None:
+                state = self._customers[customer_id] = _CustomerWindows(len(self.labels))
+            state.add(ts_ns, float(amount), self.widths_ns)
+            self._since_sweep += 1
+            if self._since_sweep >= max(self.sweep_every, len(self._customers)):
+                self._evict_idle(ts_ns)
+            return self._features(state)
+
+    def revert(self, customer_id: str, amount: float, ts_ns: int | None = None) -> bool:
+        """Undo an ``update`` for a transaction that was not scored after all (e.g. rejected
+        with a 429), so a retry of it is counted once. False when no such event is held."""
+        with self._lock:
+            state = self._customers.get(customer_id)
+            return state is not None and state.remove(float(amount), ts_ns)
+
+    def _evict_idle(self, now_ns: int) -> None:
+        # Called with the lock held. "Now" is the event being recorded, not the latest time seen,
+        # so replaying history one customer at a time never evicts a customer still to come.
+        cutoff = now_ns - max(self.widths_ns)
+        idle = [c for c, s in self._customers.items() if not s.ts or s.ts[-1] <= cutoff]
+        for customer in idle:
+            del self._customers[customer]
+        self.evicted += len(idle)
+        self._since_sweep = 0
+
+    def query(self, customer_id: str, ts_ns: int | None = None) -> dict[str, float]:
+        """Return the velocity features as of ``ts_ns`` without recording an event."""
+        ts_ns = time.time_ns() if ts_ns is None else int(ts_ns)
+        with self._lock:
+            state = self._customers.get(customer_id)
+            if state is not None and (not state.ts or ts_ns >= state.ts[-1]):
+                state.advance(ts_ns, self.widths_ns)
+            return self._features(state)
+
+    def replay(
+        self,
+        df: pd.DataFrame,
+        customer_col: str = "customer_id",
+        ts_col: str = "transaction_ts",
+        amount_col: str = "amount",
+    ) -> pd.DataFrame:
+        """Feed historical events in time order; returns per-event features aligned to ``df.index``."""
+        ts_ns = pd.to_datetime(df[ts_col]).values.astype("datetime64[ns]").astype(np.int64)
+        order = np.lexsort((ts_ns, df[customer_col].to_numpy()))
+        customers = df[customer_col].to_numpy()[order]
+        ts_ns = ts_ns[order]
+        amounts = df[amount_col].to_numpy(dtype=np.float64)[order]
+        rows = [self.update(c, a, t) for c, a, t in zip(customers, amounts, ts_ns)]
+        return pd.DataFrame(rows, index=df.index[order]).reindex(df.index)
+
+    def warm_start(
+        self,
+        path: str | Path,
+        customer_col: str = "customer_id",
+        ts_col: str = "transaction_ts",
+        amount_col: str = "amount",
+    ) -> int:
+        """Replay a historical CSV/Parquet file; only the trailing largest window is needed."""
+        df = read_table(path, columns=[customer_col, ts_col, amount_col])
+        ts = pd.to_datetime(df[ts_col])
+        df = df[ts > ts.max() - pd.Timedelta(max(self.widths_ns), unit="ns")]
+        self.replay(df, customer_col, ts_col, amount_col)
+        logger.info("Warm-started velocity store from %s: %d events, %d customers", path, len(df), len(self))
+        return len(df)
+
+    def snapshot(self, path: str | Path) -> None:
+        with self._lock:
+            ids = list(self._customers)
+            states = [self._customers[c] for c in ids]
+            lengths = np.array([len(s.ts) - min(s.starts) for s in states], dtype=np.int64)
+            ts = np.fromiter((t for s in states for t in s.ts[min(s.starts) :]), dtype=np.int64)
+            amounts = np.fromiter((a for s in states for a in s.amount[min(s.starts) :]), dtype=np.float64)
+        state = {
+            "windows": self.windows,
+            "customers": np.array(ids, dtype=object),
+            "lengths": lengths,
+            "ts": ts,
+            "amount": amounts,
+        }
+        save_joblib(state, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> VelocityFeatureStore:
+        state = load_joblib(path)
+        store = cls(state["windows"])
+        offsets = np.concatenate([[0], np.cumsum(state["lengths"])])
+        for i, customer in enumerate(state["customers"]):
+            lo, hi = offsets[i], offsets[i + 1]
+            for t, a in zip(state["ts"][lo:hi], state["amount"][lo:hi]):
+                store.update(customer, float(a), int(t))
+        return store
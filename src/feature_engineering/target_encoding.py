@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.utils.io import load_joblib, save_joblib
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _level_stats(keys: pd.Series, target: pd.Series):
+    """Per-level target sums and counts, plus the totals over every labelled row for the prior.
+
+    Unlabelled rows are ignored; rows with a missing key only count towards the prior.
+    """
+    labelled = target.notna().to_numpy()
+    present = labelled & keys.notna().to_numpy()
+    codes, levels = pd.factorize(keys[present].astype(str))
+    values = target[present].to_numpy(dtype=np.float64)
+    sums = np.bincount(codes, weights=values, minlength=len(levels))
+    counts = np.bincount(codes, minlength=len(levels)).astype(np.float64)
+    totals = (float(target[labelled].sum()), float(labelled.sum()))
+    return pd.Index(levels), sums, counts, totals
+
+
+@dataclass
+class TargetEncodingTable:
+    """Smoothed mean-target encoding of one categorical column, persisted next to the model.
+
+    ``encoded = (sum + smoothing * prior) / (count + smoothing)``, so rare levels shrink towards
+    the global mean and unseen levels get the prior. Raw sums and counts are kept so labelled
+    outcomes can be folded in with ``update`` without rescanning history; every update bumps
+    ``version``.
+    """
+
+    column: str
+    target: str
+    smoothing: float = 20.0
+    n_splits: int = 5
+    seed: int = 42
+    levels: list[str] = field(default_factory=list)
+    sums: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(0))
+    total_sum: float = 0.0
+    total_count: float = 0.0
+    version: int = 0
+    built_at: str | None = None
+    updated_at: str | None = None
+
+    def __post_init__(self) -> None:
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self._index = {level: i for i, level in enumerate(self.levels)}
+        self._encoded = (self.sums + self.smoothing * self.prior) / (self.counts + self.smoothing)
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._reindex()
+
+    def __getstate__(self) -> dict:
+        return {k: v for k, v in self.__dict__.items() if k not in ("_index", "_encoded")}
+
+    @property
+    def prior(self) -> float:
+        return self.total_sum / self.total_count if self.total_count else 0.0
+
+    @classmethod
+    def fit(
+        cls,
+        df: pd.DataFrame,
+        column: str,
+        target: str,
+        smoothing: float = 20.0,
+        n_splits: int = 5,
+        seed: int = 42,
+    ) -> TargetEncodingTable:
+        levels, sums, counts, (total_sum, total_count) = _level_stats(df[column], df[target])
+        return cls(
+            column=column,
+            target=target,
+            smoothing=smoothing,
+            n_splits=n_splits,
+            seed=seed,
+            levels=levels.tolist(),
+            sums=sums,
+            counts=counts,
+            total_sum=total_sum,
+            total_count=total_count,
+            version=1,
+            built_at=_now(),
+        )
+
+    def lookup(self, key) -> float:
+        """O(1) encoded value for one level; the prior for unseen or missing levels."""
+        i = self._index.get(str(key)) if key is not None else None
+        return float(self._encoded[i]) if i is not None else self.prior
+
+    def transform(self, keys: pd.Series) -> np.ndarray:
+        idx = pd.Index(self.levels).get_indexer(keys.astype(str).where(keys.notna(), None))
+        return np.where(idx >= 0, self._encoded[idx], self.prior)
+
+    def out_of_fold(self, df: pd.DataFrame) -> np.ndarray:
+        """Training-time encoding where each row only sees targets from the other folds.
+
+        Uses this table's column, target, smoothing and fold settings on ``df``, not its stored
+        statistics, so a row's own label never leaks into its feature.
+        """
+        keys, target = df[self.column], df[self.target]
+        codes, _ = pd.factorize(keys.astype(str).where(keys.notna(), None))
+        values = target.to_numpy(dtype=np.float64)
+        labelled = ~np.isnan(values)
+        n_levels = int(codes.max()) + 1 if len(codes) else 0
+        fold = np.random.default_rng(self.seed).permutation(len(df)) % self.n_splits
+
+        use = labelled & (codes >= 0)
+        flat = fold[use] * n_levels + codes[use]
+        size = self.n_splits * n_levels
+        fold_sums = np.bincount(flat, weights=values[use], minlength=size).reshape(self.n_splits, n_levels)
+        fold_counts = np.bincount(flat, minlength=size).reshape(self.n_splits, n_levels).astype(np.float64)
+        fold_total = np.bincount(fold[labelled], weights=values[labelled], minlength=self.n_splits)
+        fold_n = np.bincount(fold[labelled], minlength=self.n_splits).astype(np.float64)
+
+        prior_n = fold_n.sum() - fold_n[fold]
+        prior_sum = fold_total.sum() - fold_total[fold]
+        prior = np.divide(prior_sum, prior_n, out=np.zeros(len(df)), where=prior_n > 0)
+        safe = np.maximum(codes, 0)
+        level_sum = fold_sums.sum(axis=0)[safe] - fold_sums[fold, safe]
+        level_count = fold_counts.sum(axis=0)[safe] - fold_counts[fold, safe]
+        encoded = (level_sum + self.smoothing * prior) / (level_count + self.smoothing)
+        return np.where(codes >= 0, encoded, prior)
+
+    def update(self, keys: pd.Series, target: pd.Series) -> TargetEncodingTable:
+        """Fold newly labelled outcomes into the running sums; cost is O(batch + levels)."""
+        levels, sums, counts, (total_sum, total_count) = _level_stats(keys, target)
+        new = [level for level in levels if level not in self._index]
+        if new:
+            self.levels = self.levels + new
+            self.sums = np.concatenate([self.sums, np.zeros(len(new))])
+            self.counts = np.concatenate([self.counts, np.zeros(len(new))])
+            self._index = {level: i for i, level in enumerate(self.levels)}
+        idx = np.array([self._index[level] for level in levels], dtype=np.int64)
+        np.add.at(self.sums, idx, sums)
+        np.add.at(self.counts, idx, counts)
+        self.total_sum += total_sum
+        self.total_count += total_count
+        self.version += 1
+        self.updated_at = _now()
+        self._reindex()
+        return self
+
+    def info(self) -> dict:
+        return {
+            "column": self.column,
+            "target": self.target,
+            "version": self.version,
+            "levels": len(self.levels),
+            "rows": int(self.total_count),
+            "built_at": self.built_at,
+            "updated_at": self.updated_at,
+        }
+
+    def save(self, path: str | Path) -> None:
+        save_joblib(self, path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> TargetEncodingTable:
+        return load_joblib(path)
+
+
+def target_encoding_path(artifact_dir: str | Path, task_name: str, column: str = "merchant") -> Path:
+    return Path(artifact_dir) / f"{task_name}_{column}_risk.joblib"
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from src.feature_engineering.online_store import OFFLINE_FEATURES
+
+AGGREGATIONS = ("count", "sum", "mean", "max", "distinct_merchants")
+# Column name prefix per aggregation; count/sum match the online store's txn_count_/txn_amount_.
+FEATURE_PREFIX = {
+    "count": "txn_count",
+    "sum": "txn_amount",
+    "mean": "txn_amount_mean",
+    "max": "txn_amount_max",
+    "distinct_merchants": "txn_distinct_merchants",
+}
+
+
+def feature_grid(windows: list[str], aggregations: list[str]) -> dict[str, tuple[str, str]]:
+    """Every aggregation over every window, e.g. ``txn_amount_max_24h: ("max", "24h")``."""
+    return {f"{FEATURE_PREFIX[agg]}_{w}": (agg, w) for w in windows for agg in aggregations}
+
+
+class _WindowIndex:
+    """Finds the left pointer of every row's ``(t - width, t]`` window, for rows sorted by (customer, ts).
+
+    This is the two-pointer sweep done for all rows at once. Timestamps are replaced by their rank
+    among distinct timestamps, so (customer, rank) packs into one monotone int64 key that can be
+    binary-searched. Needles are always searched in sorted order, which keeps searchsorted
+    cache-friendly; the time ordering is computed once and shared by every window.
+    """
+
+    def __init__(self, local_codes: np.ndarray, ts: np.ndarray):
+        self.ts_order = np.argsort(ts, kind="stable")
+        ts_sorted = ts[self.ts_order]
+        self.ts_sorted = ts_sorted
+        new_value = np.r_[True, ts_sorted[1:] != ts_sorted[:-1]]
+        self.uniq = ts_sorted[new_value]
+        rank = np.empty(len(ts), dtype=np.int64)
+        rank[self.ts_order] = np.cumsum(new_value) - 1
+        self.codes = local_codes
+        self.stride = len(self.uniq) + 1
+        self.key = local_codes * self.stride + rank
+
+    def starts(self, width_ns: int) -> np.ndarray:
+        lower = np.empty(len(self.key), dtype=np.int64)
+        lower[self.ts_order] = np.searchsorted(self.uniq, self.ts_sorted - width_ns, side="right")
+        return np.searchsorted(self.key, self.codes * self.stride + lower, side="left")
+
+
+def _scan_windows(starts: np.ndarray, amount: np.ndarray | None, merchants: np.ndarray | None):
+    """Window max and distinct-merchant count in one forward sweep over the rows.
+
+    ``starts`` never decreases (rows are sorted by customer, then time, and a customer's window
+    never reaches back into the previous customer), so each row enters and leaves the window once.
+    The max comes from a deque of row indices with decreasing amounts; distinct merchants from a
+    per-merchant count of rows in the window. Work is linear in the number of rows, however long
+    the windows are.
+    """
+    bounds = starts.tolist()
+    window_max = distinct = None
+    if amount is not None:
+        values = amount.tolist()
+        out = [0.0] * len(values)
+        candidates: deque[int] = deque()
+        for end, start in enumerate(bounds):
+            value = values[end]
+            while candidates and values[candidates[-1]] <= value:
+                candidates.pop()
+            candidates.append(end)
+            while candidates[0] < start:
+                candidates.popleft()
+            out[end] = values[candidates[0]]
+        window_max = np.array(out, dtype=np.float64)
+    if merchants is not None:
+        codes = merchants.tolist()
+        in_window = [0] * (max(codes, default=-1) + 1)
+        out = [0] * len(codes)
+        seen = left = 0
+        for end, start in enumerate(bounds):
+            code = codes[end]
+            # Missing merchants (code -1) never count as distinct.
+            if code >= 0:
+                seen += in_window[code] == 0
+                in_window[code] += 1
+            while left < start:
+                code = codes[left]
+                left += 1
+                if code >= 0:
+                    in_window[code] -= 1
+                    seen -= in_window[code] == 0
+            out[end] = seen
+        distinct = np.array(out, dtype=np.int64)
+    return window_max, distinct
+
+
+def velocity_arrays(
+    codes: np.ndarray,
+    ts: np.ndarray,
+    amount: np.ndarray,
+    features: dict[str, tuple[str, str]],
+    merchants: np.ndarray | None = None,
+) -> dict[str, np.ndarray]:
+    """Velocity features for rows already sorted by (customer code, timestamp ns).
+
+    Windows are ``(t - width, t]`` and include the current row plus earlier rows with the same
+    timestamp, like pandas time-based ``rolling``. Missing amounts are skipped; an empty window
+    gives 0 for every aggregation.
+    """
+    codes = np.asarray(codes, dtype=np.int64)
+    codes = codes - codes[0] if len(codes) else codes
+    ts = np.asarray(ts, dtype=np.int64)
+    amount = np.asarray(amount, dtype=np.float64)
+    valid = ~np.isnan(amount)
+    ends = np.arange(1, len(ts) + 1)
+    prefix_count = np.concatenate([[0], np.cumsum(valid)])
+    # Extended precision keeps differences of a long running sum exact to ~1e-12 relative.
+    prefix_sum = np.concatenate([[0], np.cumsum(np.where(valid, amount, 0.0), dtype=np.longdouble)])
+    masked = np.where(valid, amount, -np.inf)
+
+    by_window: dict[str, list[tuple[str, str]]] = {}
+    for name, (agg, window) in features.items():
+        if agg not in AGGREGATIONS:
+            raise ValueError(f"Unknown velocity aggregation {agg!r}; expected one of {AGGREGATIONS}")
+        by_window.setdefault(window, []).append((name, agg))
+
+    if merchants is None and any(agg == "distinct_merchants" for agg, _ in features.values()):
+        raise ValueError("distinct_merchants needs a merchant column")
+    index = _WindowIndex(codes, ts)
+    out: dict[str, np.ndarray] = {}
+    for window, wanted in by_window.items():
+        aggs = {agg for _, agg in wanted}
+        starts = index.starts(int(pd.Timedelta(window).value))
+        count = (prefix_count[ends] - prefix_count[starts]).astype(np.float64)
+        total = (prefix_sum[ends] - prefix_sum[starts]).astype(np.float64)
+        window_max, distinct = _scan_windows(
+            starts,
+            masked if "max" in aggs else None,
+            np.asarray(merchants, dtype=np.int64) if "distinct_merchants" in aggs else None,
+        )
+        for name, agg in wanted:
+            if agg == "count":
+                out[name] = count
+            elif agg == "sum":
+                out[name] = total
+            elif agg == "mean":
+                out[name] = np.divide(total, count, out=np.zeros_like(total), where=count > 0)
+            elif agg == "max":
+                out[name] = np.where(np.isfinite(window_max), window_max, 0.0)
+            else:
+                out[name] = distinct.astype(np.float64)
+    return out
+
+
+def _partition_bounds(codes: np.ndarray, partition_rows: int) -> list[tuple[int, int]]:
+    """Split sorted rows into ~partition_rows chunks without cutting a customer in two."""
+    n = len(codes)
+    if n == 0:
+        return []
+    group_starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    # Snap each target cut forward to the next customer boundary.
+    idx = np.searchsorted(group_starts, np.arange(partition_rows, n, partition_rows))
+    cuts = np.unique(group_starts[idx[idx < len(group_starts)]])
+    edges = [0, *cuts.tolist(), n]
+    return [(a, b) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def compute_velocity_features(
+    df: pd.DataFrame,
+    features: dict[str, tuple[str, str]] | None = None,
+    customer_col: str = "customer_id",
+    ts_col: str = "transaction_ts",
+    amount_col: str = "amount",
+    merchant_col: str = "merchant_category",
+    n_jobs: int = 1,
+    partition_rows: int = 1_000_000,
+) -> pd.DataFrame:
+    """Return ``df`` sorted by (customer, timestamp) with the requested velocity columns added.
+
+    One stable sort, then every window and aggregation is computed from shared prefix arrays.
+    Customer partitions are independent and run in parallel with ``n_jobs`` joblib workers.
+    """
+    features = {k: tuple(v) for k, v in (features or OFFLINE_FEATURES).items()}
+    ts = pd.to_datetime(df[ts_col])
+    codes, _ = pd.factorize(df[customer_col], sort=True)
+    order = np.lexsort((ts.to_numpy(dtype="datetime64[ns]").view(np.int64), codes))
+
+    out = df.take(order)
+    out[ts_col] = ts.take(order).to_numpy()
+    codes = codes[order]
+    ts_ns = out[ts_col].to_numpy(dtype="datetime64[ns]").view(np.int64)
+    amount = out[amount_col].to_numpy(dtype=np.float64, na_value=np.nan)
+    merchants = None
+    if any(agg == "distinct_merchants" for agg, _ in features.values()):
+        merchants = pd.factorize(out[merchant_col])[0]
+
+    bounds = _partition_bounds(codes, partition_rows)
+    parts = Parallel(n_jobs=n_jobs)(
+        delayed(velocity_arrays)(
+            codes[a:b], ts_ns[a:b], amount[a:b], features, None if merchants is None else merchants[a:b]
+        )
+        for a, b in bounds
+    )
+    for name in features:
+        out[name] = np.concatenate([p[name] for p in parts]) if parts else np.array([], dtype=np.float64)
+    return out
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+# Maximum absolute difference tolerated between CompiledScorer.score and pipe.predict_proba.
+PARITY_TOLERANCE = 1e-5
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+# sklearn is imported inside the functions that need it so importing the API stays cheap;
+# the cost is paid once when a model is loaded.
+
+
+def _steps(transformer) -> list:
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(transformer, Pipeline):
+        return [step for _, step in transformer.steps]
+    return [transformer]
+
+
+def _is_float32_cast(step) -> bool:
+    from sklearn.preprocessing import FunctionTransformer
+
+    return (
+        isinstance(step, FunctionTransformer)
+        and step.func is np.array
+        and step.inverse_func is None
+        and (step.kw_args or {}) == {"dtype": np.float32}
+    )
+
+
+def _numeric_block(transformer, n_cols: int) -> tuple[np.ndarray, np.ndarray, np.ndarray] | None:
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import StandardScaler
+
+    fill = np.full(n_cols, np.nan)
+    mean, scale = np.zeros(n_cols), np.ones(n_cols)
+    steps = _steps(transformer)
+    # The compact preprocessor's leading float32 cast; the scorer's buffer is float32 already.
+    if _is_float32_cast(steps[0]):
+        steps = steps[1:]
+    for i, step in enumerate(steps):
+        if isinstance(step, SimpleImputer) and i == 0 and not step.add_indicator:
+            if step.statistics_.dtype.kind not in "biuf":
+                return None
+            fill = step.statistics_.astype(float)
+        elif isinstance(step, StandardScaler):
+            # mean_ is fitted even with with_mean=False, but transform does not subtract it.
+            if step.with_mean and step.mean_ is not None:
+                mean = step.mean_.astype(float)
+            if step.with_std and step.scale_ is not None:
+                scale = step.scale_.astype(float)
+        else:
+            return None
+    return fill, mean, scale
+
+
+def _categorical_block(
+    transformer, n_cols: int
+) -> tuple[list[Any], list[tuple[dict[Any, int], int, int | None]]] | None:
+    """Imputer fills plus, per column, (level -> relative output index, width, unknown index)."""
+    from sklearn.impute import SimpleImputer
+    from sklearn.preprocessing import OneHotEncoder
+
+    steps = _steps(transformer)
+    fill: list[Any] = [None] * n_cols
+    if isinstance(steps[0], SimpleImputer):
+        if steps[0].add_indicator:
+            return None
+        fill = list(steps[0].statistics_)
+        steps = steps[1:]
+    if len(steps) != 1 or not isinstance(steps[0], OneHotEncoder):
+        return None
+    encoder = steps[0]
+    if encoder.drop is not None or encoder.handle_unknown not in ("ignore", "infrequent_if_exist"):
+        return None
+    infrequent = getattr(encoder, "infrequent_categories_", [None] * n_cols)
+    blocks = []
+    for levels, rare in zip(encoder.categories_, infrequent):
+        if rare is None:
+            blocks.append(({value: j for j, value in enumerate(levels)}, len(levels), None))
+            continue
+        # Frequent levels keep their order; rare levels, and unseen ones when the encoder maps
+        # unknowns to infrequent, share the trailing "infrequent" column.
+        rare_set = set(rare)
+        frequent = [value for value in levels if value not in rare_set]
+        mapping = {value: j for j, value in enumerate(frequent)}
+        mapping.update({value: len(frequent) for value in rare})
+        unknown = len(frequent) if encoder.handle_unknown == "infrequent_if_exist" else None
+        blocks.append((mapping, len(frequent) + 1, unknown))
+    return fill, blocks
+
+
+@dataclass
+class CompiledScorer:
+    """Scores a dict payload from flat arrays extracted from a fitted prep + model pipeline."""
+
+    model: Any
+    num_cols: list[str]
+    num_fill: np.ndarray
+    num_mean: np.ndarray
+    num_scale: np.ndarray
+    cat_cols: list[str]
+    cat_fill: list[Any]
+    cat_maps: list[dict[Any, int]]
+    n_features: int
+    cat_unknown: list[int | None] = field(default_factory=list)
+    coef: np.ndarray | None = None
+    intercept: float = 0.0
+    _local: threading.local = field(default_factory=threading.local, repr=False)
+
+    @classmethod
+    def from_pipeline(cls, pipe) -> CompiledScorer | None:
+        """Return a compiled scorer, or None when the pipeline has steps it cannot reproduce."""
+        from sklearn.compose import ColumnTransformer
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import Pipeline
+
+        if not isinstance(pipe, Pipeline) or set(pipe.named_steps) != {"prep", "model"}:
+            return None
+        prep, model = pipe.named_steps["prep"], pipe.named_steps["model"]
+        if not isinstance(prep, ColumnTransformer) or prep.remainder != "drop":
+            return None
+        if not hasattr(model, "predict_proba") or len(getattr(model, "classes_", [])) != 2:
+            return None
+        # XGBoost treats absent sparse entries as missing, so a dense vector would change its scores.
+        if prep.sparse_output_ and not type(model).__module__.startswith("sklearn."):
+            return None
+
+        num_cols: list[str] = []
+        cat_cols: list[str] = []
+        num_parts: list[tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        cat_fill: list[Any] = []
+        cat_blocks: list[tuple[dict[Any, int], int, int | None]] = []
+        block_order: list[str] = []
+        for name, transformer, cols in prep.transformers_:
+            if name == "remainder" or len(cols) == 0 or transformer == "drop":
+                continue
+            if isinstance(cols, str) or not all(isinstance(c, str) for c in cols):
+                return None
+            numeric = _numeric_block(transformer, len(cols))
+            if numeric is not None:
+                num_cols.extend(cols)
+                num_parts.append(numeric)
+                block_order.append("num")
+                continue
+            categorical = _categorical_block(transformer, len(cols))
+            if categorical is None:
+                return None
+            cat_cols.extend(cols)
+            cat_fill.extend(categorical[0])
+            cat_blocks.extend(categorical[1])
+            block_order.append("cat")
+        # Output is laid out as [numeric..., one-hot...], matching _build_preprocessor's order.
+        if block_order != sorted(block_order, key=lambda b: b != "num"):
+            return None
+
+        cat_maps: list[dict[Any, int]] = []
+        cat_unknown: list[int | None] = []
+        offset = len(num_cols)
+        for mapping, width, unknown in cat_blocks:
+            cat_maps.append({value: offset + j for value, j in mapping.items()})
+            cat_unknown.append(offset + unknown if unknown is not None else None)
+            offset += width
+        num_fill, num_mean, num_scale = (
+            tuple(np.concatenate(parts) for parts in zip(*num_parts)) if num_parts else (np.empty(0),) * 3
+        )
+        scorer = cls(
+            model=model,
+            num_cols=num_cols,
+            num_fill=num_fill,
+            num_mean=num_mean,
+            num_scale=num_scale,
+            cat_cols=cat_cols,
+            cat_fill=cat_fill,
+            cat_maps=cat_maps,
+            n_features=offset,
+            cat_unknown=cat_unknown,
+        )
+        if getattr(model, "n_features_in_", offset) != offset:
+            return None
+        if isinstance(model, LogisticRegression):
+            scorer.coef = model.coef_[0].astype(np.float64)
+            scorer.intercept = float(model.intercept_[0])
+        return scorer
+
+    def _buffer(self) -> np.ndarray:
+        # One preallocated vector per thread, since the API serves requests from a threadpool.
+        buf = getattr(self._local, "buf", None)
+        if buf is None:
+            buf = self._local.buf = np.zeros(self.n_features, dtype=np.float32)
+        return buf
+
+    def transform(self, payload: dict[str, Any]) -> np.ndarray:
+        x = self._buffer()
+        x[:] = 0.0
+        n_num = len(self.num_cols)
+        if n_num:
+            values = np.array(
+                [np.nan if _is_missing(v) else v for v in map(payload.get, self.num_cols)], dtype=np.float64
+            )
+            values = np.where(np.isnan(values), self.num_fill, values)
+            x[:n_num] = (values - self.num_mean) / self.num_scale
+        for j, col in enumerate(self.cat_cols):
+            value = payload.get(col)
+            # SimpleImputer only treats NaN as missing for object columns; None stays an unknown level.
+            if isinstance(value, float) and math.isnan(value):
+                value = self.cat_fill[j]
+            idx = self.cat_maps[j].get(value, self.cat_unknown[j])
+            if idx is not None:
+                x[idx] = 1.0
+        return x
+
+    def score(self, payload: dict[str, Any]) -> float:
+        return self.score_vector(self.transform(payload))
+
+    def score_vector(self, x: np.ndarray) -> float:
+        if self.coef is not None:
+            z = float(np.dot(self.coef, x)) + self.intercept
+            return 1.0 / (1.0 + math.exp(-z)) if z >= 0 else math.exp(z) / (1.0 + math.exp(z))
+        return float(self.model.predict_proba(x.reshape(1, -1))[0, 1])
+
@@ -0,0 +1,337 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import threading
+import time
+import zlib
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+from src.drift_detection.reference_bins import SCORE_FEATURE
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+SEGMENT_PREFIX = "decisions-"
+SEGMENT_SUFFIX = ".jsonl.gz"
+OPEN_SUFFIX = ".part"  # appended to the segment currently being written
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _fsync_dir(directory: Path) -> None:
+    # Makes a rename durable; not every platform can open a directory.
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DecisionLog:
+    """Append-only log of scoring decisions, written behind the request path by one thread.
+
+    ``append`` only puts the record on a bounded in-memory queue; encoding, compression and disk
+    I/O happen on the writer thread, which takes up to ``batch_size`` records at a time. Records
+    go to gzip JSONL segments named ``decisions-<utc time>-<pid>-<seq>.jsonl.gz``, so uvicorn
+    workers can share a directory. The open segment carries a ``.part`` suffix; it is renamed
+    once it reaches ``max_segment_mb`` or ``max_segment_seconds``. Every ``fsync_seconds`` the
+    compressor is flushed and the file fsynced, so a crash loses at most that much.
+
+    When the queue is full, ``overflow`` decides: ``drop_newest`` rejects the new record,
+    ``drop_oldest`` evicts the oldest queued one, and ``block`` waits up to ``block_timeout_ms``
+    for the writer before dropping the new record. Drops and write errors are counted, never raised.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        max_queue: int = 50_000,
+        overflow: str = "drop_newest",
+        block_timeout_ms: float = 50.0,
+        batch_size: int = 512,
+        flush_seconds: float = 1.0,
+        fsync_seconds: float = 5.0,
+        max_segment_mb: float = 64.0,
+        max_segment_seconds: float = 3600.0,
+        compresslevel: int = 6,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; one of {OVERFLOW_POLICIES}")
+        self.directory = Path(directory)
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.block_timeout_s = block_timeout_ms / 1000
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.fsync_seconds = fsync_seconds
+        self.max_segment_bytes = int(max_segment_mb * 1024 * 1024)
+        self.max_segment_seconds = max_segment_seconds
+        self.compresslevel = compresslevel
+        self._queue: deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._seq = 0
+        self._path: Path | None = None
+        self._raw = None
+        self._gz: gzip.GzipFile | None = None
+        self._opened_at = self._synced_at = 0.0
+        self._unsynced = False
+        self.appended = self.written = self.dropped = self.lost = 0
+        self.write_errors = self.segments = self.bytes_written = 0
+        self.last_error: str | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def append(self, record: dict) -> bool:
+        """Queue one record; False when it was dropped because the queue is full."""
+        return self.extend([record]) == 1
+
+    def extend(self, records: list[dict]) -> int:
+        """Queue records under one lock acquisition; returns how many were accepted."""
+        accepted = 0
+        with self._cond:
+            for record in records:
+                if len(self._queue) >= self.max_queue and not self._make_room():
+                    self.dropped += 1
+                    continue
+                self._queue.append(record)
+                accepted += 1
+            self.appended += accepted
+            # The writer sleeps until a full batch is waiting or flush_seconds pass.
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+        return accepted
+
+    def _make_room(self) -> bool:
+        # Called with the lock held and the queue full.
+        if self.overflow == "drop_oldest":
+            self._queue.popleft()
+            self.dropped += 1
+            return True
+        if self.overflow == "block" and self.running:
+            self._cond.notify_all()
+            deadline = time.monotonic() + self.block_timeout_s
+            while len(self._queue) >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._cond.wait(remaining):
+                    return len(self._queue) < self.max_queue
+            return True
+        return False
+
+    def start(self) -> None:
+        with self._cond:
+            self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="decision-log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """Write everything still queued, then close and publish the open segment."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if len(self._queue) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_seconds)
+                n = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(n)]
+                stopping = self._stopping
+                # Wake appenders waiting for room under the block policy.
+                self._cond.notify_all()
+            if batch:
+                self._write(batch)
+            self._maintain()
+            if stopping and not batch:
+                break
+        self._close_segment()
+
+    def _write(self, batch: list[dict]) -> None:
+        try:
+            lines = []
+            for record in batch:
+                lines.append(json.dumps(record, separators=(",", ":"), default=_json_default))
+            if self._gz is None:
+                self._open_segment()
+            self._gz.write(("\n".join(lines) + "\n").encode())
+            self._unsynced = True
+            self.written += len(batch)
+        except (OSError, TypeError, ValueError) as exc:
+            self.write_errors += 1
+            self.lost += len(batch)
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Failed to write %d decision records to %s", len(batch), self._path)
+            # Start a fresh segment on the next batch rather than appending to a broken file.
+            self._close_segment()
+
+    def _maintain(self) -> None:
+        if self._gz is None:
+            return
+        now = time.monotonic()
+        try:
+            if self._raw.tell() >= self.max_segment_bytes or (
+                now - self._opened_at >= self.max_segment_seconds
+            ):
+                self._close_segment()
+            elif self._unsynced and now - self._synced_at >= self.fsync_seconds:
+                self._sync()
+        except OSError as exc:
+            self.write_errors += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Failed to sync decision log segment %s", self._path)
+            self._close_segment()
+
+    def _sync(self) -> None:
+        # A sync flush ends the deflate block, so readers can decode everything written so far.
+        self._gz.flush(zlib.Z_SYNC_FLUSH)
+        self._raw.flush()
+        os.fsync(self._raw.fileno())
+        self._synced_at = time.monotonic()
+        self._unsynced = False
+
+    def _open_segment(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._seq += 1
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        name = f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}-{self._seq:06d}{SEGMENT_SUFFIX}"
+        self._path = self.directory / f"{name}{OPEN_SUFFIX}"
+        self._raw = self._path.open("xb")
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=self.compresslevel)
+        self._opened_at = self._synced_at = time.monotonic()
+        self.segments += 1
+
+    def _close_segment(self) -> None:
+        if self._raw is None:
+            return
+        path, gz, raw = self._path, self._gz, self._raw
+        self._path = self._gz = self._raw = None
+        try:
+            gz.close()
+            raw.flush()
+            os.fsync(raw.fileno())
+            self.bytes_written += raw.tell()
+            raw.close()
+            path.rename(path.with_name(path.name[: -len(OPEN_SUFFIX)]))
+            _fsync_dir(path.parent)
+        except OSError as exc:
+            self.write_errors += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("Failed to close decision log segment %s", path)
+            raw.close()
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = len(self._queue)
+        return {
+            "running": self.running,
+            "directory": str(self.directory),
+            "overflow": self.overflow,
+            "queued": queued,
+            "appended": self.appended,
+            "written": self.written,
+            "dropped": self.dropped,
+            "lost": self.lost,
+            "write_errors": self.write_errors,
+            "segments": self.segments,
+            "bytes_written": self.bytes_written,
+            "last_error": self.last_error,
+        }
+
+
+def segment_paths(directory: str | Path, include_open: bool = False) -> list[Path]:
+    """Segments in write order (the name starts with the UTC time they were opened)."""
+    paths = Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")
+    if include_open:
+        paths = [*paths, *Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}{OPEN_SUFFIX}")]
+    return sorted(paths, key=lambda path: path.name)
+
+
+def _read_segment(path: Path) -> Iterator[dict]:
+    is_open = path.name.endswith(OPEN_SUFFIX)
+    with gzip.open(path, "rt") as fh:
+        try:
+            for line in fh:
+                if not line.endswith("\n"):
+                    break  # cut off mid-record by an unsynced write
+                yield json.loads(line)
+        except (EOFError, zlib.error):
+            # An open (or crashed) segment ends after its last sync flush.
+            if not is_open:
+                raise
+
+
+def read_decisions(
+    directory: str | Path,
+    model: str | None = None,
+    version: str | None = None,
+    include_open: bool = False,
+) -> Iterator[dict]:
+    """Every logged record in write order, optionally for one model and model version.
+
+    ``include_open`` also reads segments still being written (or left by a crashed process),
+    up to their last fsync.
+    """
+    for path in segment_paths(directory, include_open=include_open):
+        for record in _read_segment(path):
+            if model is not None and record["model"] != model:
+                continue
+            if version is not None and record["version"] != version:
+                continue
+            yield record
+
+
+def decision_requests(
+    directory: str | Path, model: str | None = None, limit: int | None = None, **kwargs
+) -> list[dict]:
+    """Logged requests as a replayable request log: ``{"endpoint": model, "body": request}``.
+
+    The logged request is the scored payload, so derived fields are included; the API schemas
+    ignore them, and logged velocity counts are replayed as given.
+    """
+    out = []
+    for record in read_decisions(directory, model=model, **kwargs):
+        out.append({"endpoint": record["model"], "body": record["request"]})
+        if limit is not None and len(out) >= limit:
+            break
+    return out
+
+
+def decision_frames(
+    directory: str | Path, model: str, chunksize: int = 50_000, **kwargs
+) -> Iterator[pd.DataFrame]:
+    """Logged requests of one model as frames of ``chunksize`` rows, with the score as
+    ``__score__``, ready for a ``DriftAccumulator`` or ``OnlineDriftMonitor.observe_frame``."""
+    rows: list[dict[str, Any]] = []
+    for record in read_decisions(directory, model=model, **kwargs):
+        rows.append({**record["request"], SCORE_FEATURE: record["score"]})
+        if len(rows) >= chunksize:
+            yield pd.DataFrame(rows)
+            rows = []
+    if rows:
+        yield pd.DataFrame(rows)
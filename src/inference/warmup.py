@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Any
+
+
+def synthetic_payload(pipe) -> dict[str, Any]:
+    """A plausible single request built from the fitted preprocessor (imputer fills / first levels)."""
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+
+    payload: dict[str, Any] = {}
+    prep = pipe.named_steps["prep"]
+    for name, transformer, cols in prep.transformers_:
+        if name == "remainder" or transformer == "drop" or len(cols) == 0:
+            continue
+        steps = [s for _, s in transformer.steps] if isinstance(transformer, Pipeline) else [transformer]
+        # The compact preprocessor puts a float32 cast ahead of the imputer.
+        imputer = next((s for s in steps[:2] if isinstance(s, SimpleImputer)), None)
+        fills = imputer.statistics_ if imputer is not None else None
+        categories = getattr(steps[-1], "categories_", None)
+        for i, col in enumerate(cols):
+            if fills is not None:
+                value = fills[i]
+            elif categories is not None:
+                value = categories[i][0]
+            else:
+                value = 0.0
+            payload[col] = value.item() if hasattr(value, "item") else value
+    return payload
@@ -22,25 +22,78 @@ class EvaluationResult:
     expected_cost: float
 
 
-def optimize_threshold(y_true, proba, fn_cost: float = 10.0, fp_cost: float = 1.0) -> tuple[float, float]:
-    thresholds = np.arange(0.05, 0.96, 0.01)
-    best_thr, min_cost = 0.5, float("inf")
-    for thr in thresholds:
-        pred = (proba >= thr).astype(int)
-        tn, fp, fn, tp = confusion_matrix(y_true, pred).ravel()
-        cost = fn * fn_cost + fp * fp_cost
-        if cost < min_cost:
-            best_thr, min_cost = float(thr), float(cost)
-    return best_thr, min_cost
-
-
-def evaluate_binary_classifier(y_true, proba, threshold: float | None = None) -> EvaluationResult:
+def threshold_grid(min_thr: float = 0.05, max_thr: float = 0.95, step: float = 0.01) -> np.ndarray:
+    return np.arange(min_thr, max_thr + step / 2, step)
+
+
+def threshold_search_kwargs(cfg: dict) -> dict:
+    """Build ``optimize_threshold`` keyword arguments from ``configs/training.yaml``."""
+    search = cfg["threshold_search"]
+    if search.get("mode", "grid") == "distinct":
+        thresholds: np.ndarray | str = "distinct"
+    else:
+        thresholds = threshold_grid(search["min"], search["max"], search["step"])
+    return {
+        "fn_cost": float(cfg["metrics"]["fn_cost"]),
+        "fp_cost": float(cfg["metrics"]["fp_cost"]),
+        "thresholds": thresholds,
+    }
+
+
+def threshold_costs(
+    y_true, proba, thresholds, fn_cost: float = 10.0, fp_cost: float = 1.0
+) -> np.ndarray:
+    """Exact cost of the rule ``proba >= thr`` for every threshold, from one sort of the scores."""
+    y_true = np.asarray(y_true)
+    proba = np.asarray(proba, dtype=np.float64)
+    order = np.argsort(proba, kind="mergesort")
+    sorted_proba = proba[order]
+    # pos_below[i] = number of positives among the i lowest scores.
+    pos_below = np.concatenate([[0], np.cumsum(y_true[order] == 1)])
+    n_below = np.searchsorted(sorted_proba, np.asarray(thresholds, dtype=np.float64), side="left")
+    fn = pos_below[n_below]
+    fp = (len(proba) - n_below) - (pos_below[-1] - fn)
+    return fn * fn_cost + fp * fp_cost
+
+
+def optimize_threshold(
+    y_true,
+    proba,
+    fn_cost: float = 10.0,
+    fp_cost: float = 1.0,
+    thresholds: np.ndarray | str | None = None,
+) -> tuple[float, float]:
+    """Return the lowest-cost threshold; ``thresholds`` is a grid, or ``"distinct"`` for every score."""
+    if thresholds is None:
+        thresholds = threshold_grid()
+    elif isinstance(thresholds, str):
+        if thresholds != "distinct":
+            raise ValueError(f"Unknown threshold mode: {thresholds}")
+        thresholds = np.unique(proba)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    if thresholds.size == 0:
+        return 0.5, float("inf")
+    costs = threshold_costs(y_true, proba, thresholds, fn_cost=fn_cost, fp_cost=fp_cost)
+    best = int(np.argmin(costs))
+    return float(thresholds[best]), float(costs[best])
+
+
+def evaluate_binary_classifier(
+    y_true,
+    proba,
+    threshold: float | None = None,
+    fn_cost: float = 10.0,
+    fp_cost: float = 1.0,
+    thresholds: np.ndarray | str | None = None,
+) -> EvaluationResult:
     roc_auc = float(roc_auc_score(y_true, proba))
     pr_auc = float(average_precision_score(y_true, proba))
     ks = float(ks_2samp(proba[y_true == 1], proba[y_true == 0]).statistic)
 
     if threshold is None:
-        threshold, expected_cost = optimize_threshold(y_true, proba)
+        threshold, expected_cost = optimize_threshold(
+            y_true, proba, fn_cost=fn_cost, fp_cost=fp_cost, thresholds=thresholds
+        )
     else:
         expected_cost = float("nan")
 
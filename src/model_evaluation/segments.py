@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+OTHER_SEGMENT = "__other__"
+MISSING_SEGMENT = "__missing__"
+METRICS = ("roc_auc", "pr_auc", "ks", "expected_cost", "cost_per_row")
+
+
+def segment_labels(
+    column: pd.Series, min_rows: int = 1, edges: list[float] | None = None
+) -> np.ndarray:
+    """String segment of every row: the level itself, or its band when ``edges`` are given.
+
+    Bands are ``(lo, hi]`` with open-ended outer bands. Levels with fewer than ``min_rows`` rows
+    are pooled into ``__other__``, so no segment is reported on a handful of rows.
+    """
+    if edges is not None:
+        bins = [-np.inf, *sorted(edges), np.inf]
+        column = pd.cut(pd.to_numeric(column, errors="coerce"), bins)
+    labels = column.astype(object).where(column.notna(), MISSING_SEGMENT).astype(str).to_numpy()
+    levels, counts = np.unique(labels, return_counts=True)
+    small = levels[counts < min_rows]
+    return np.where(np.isin(labels, small), OTHER_SEGMENT, labels)
+
+
+def segment_columns(
+    frame: pd.DataFrame, spec: dict[str, list[float] | None], min_rows: int = 1
+) -> dict[str, np.ndarray]:
+    """``segment_labels`` for every column in ``spec`` (band edges, or None for levels)."""
+    out = {}
+    for col, edges in spec.items():
+        if col not in frame.columns:
+            logger.warning("Segment column %r is not in the data; skipped", col)
+            continue
+        out[col] = segment_labels(frame[col], min_rows=min_rows, edges=edges)
+    return out
+
+
+@dataclass
+class SegmentLayout:
+    """Score groups of every segmentation: runs of tied scores within one segment.
+
+    Built from one sort of the scores: each segmentation only needs a stable sort of its small
+    integer segment codes on top. Groups are numbered in (segmentation, segment, score) order,
+    so every metric is a prefix sum or ``reduceat`` over group totals, and a resample only has
+    to count its rows per group.
+    """
+
+    row_groups: np.ndarray  # (n_segmentations, n_rows): group of every row in each segmentation
+    proba: np.ndarray  # score of every group
+    group_segment: np.ndarray  # segment of every group
+    segment_first_group: np.ndarray
+    segments: list[tuple[str, str]]  # (dimension, level) per segment
+
+
+def build_layout(proba, segments: dict[str, np.ndarray]) -> SegmentLayout:
+    proba = np.asarray(proba, dtype=np.float64)
+    order = np.argsort(proba, kind="stable")
+    rows, codes, names = [], [], []
+    for dimension, labels in segments.items():
+        levels, inverse = np.unique(np.asarray(labels)[order], return_inverse=True)
+        # Small-integer codes sort in linear time and keep the score order within a segment.
+        within = np.argsort(inverse.astype(np.int32), kind="stable")
+        rows.append(order[within])
+        codes.append(inverse[within] + len(names))
+        names += [(dimension, str(level)) for level in levels]
+    rows = np.concatenate(rows)
+    codes = np.concatenate(codes)
+    sorted_proba = proba[rows]
+    new_group = np.ones(len(rows), dtype=bool)
+    new_group[1:] = (codes[1:] != codes[:-1]) | (sorted_proba[1:] != sorted_proba[:-1])
+    group_starts = np.flatnonzero(new_group)
+    group_segment = codes[group_starts]
+    row_groups = np.empty((len(segments), len(proba)), dtype=np.int64)
+    for d, positions in enumerate(np.split(np.arange(len(rows)), len(segments))):
+        row_groups[d, rows[positions]] = np.cumsum(new_group)[positions] - 1
+    return SegmentLayout(
+        row_groups=row_groups,
+        proba=sorted_proba[group_starts],
+        group_segment=group_segment,
+        segment_first_group=np.searchsorted(group_segment, np.arange(len(names))),
+        segments=names,
+    )
+
+
+def group_totals(
+    layout: SegmentLayout, y_true, idx: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Positive and negative row counts per group, shape (n_resamples, n_groups).
+
+    ``idx`` is a (n_resamples, n_rows) matrix of resampled row indices; None counts every row
+    once. Each resample becomes per-row counts, which are then summed into the fixed group of
+    every row: two bincounts over cache-sized arrays rather than a scatter over all resamples.
+    """
+    y = np.asarray(y_true) == 1
+    n_groups = len(layout.proba)
+    keys = layout.row_groups + y * n_groups  # positives count into a second block of groups
+    n_resamples = 1 if idx is None else len(idx)
+    totals = np.zeros((n_resamples, 2 * n_groups))
+    for b in range(n_resamples):
+        counts = None if idx is None else np.bincount(idx[b], minlength=len(y))
+        for row_keys in keys:
+            # Segmentations use disjoint group numbers, so their counts simply add up.
+            totals[b] += np.bincount(row_keys, weights=counts, minlength=2 * n_groups)
+    return totals[:, n_groups:], totals[:, :n_groups]
+
+
+def grouped_metrics(
+    layout: SegmentLayout,
+    g_pos: np.ndarray,
+    g_neg: np.ndarray,
+    threshold: float,
+    fn_cost: float = 10.0,
+    fp_cost: float = 1.0,
+) -> dict[str, np.ndarray]:
+    """Every metric for every segment from ``group_totals``, shape (n_resamples, n_segments).
+
+    ROC-AUC counts tied scores as half, PR-AUC is average precision and KS is the largest gap
+    between the class CDFs, matching ``roc_auc_score``, ``average_precision_score`` and
+    ``ks_2samp`` on the resampled rows. Undefined values (one class absent) are NaN.
+    """
+    first, seg = layout.segment_first_group, layout.group_segment
+
+    def below(values: np.ndarray) -> np.ndarray:
+        # Count in the lower-scored groups of the same segment.
+        before = np.cumsum(values, axis=1) - values
+        return before - before[:, first][:, seg]
+
+    pos_below, neg_below = below(g_pos), below(g_neg)
+    pos = np.add.reduceat(g_pos, first, axis=1)
+    neg = np.add.reduceat(g_neg, first, axis=1)
+    g_pred = layout.proba >= threshold
+    fn = np.add.reduceat(g_pos * ~g_pred, first, axis=1)
+    fp = np.add.reduceat(g_neg * g_pred, first, axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        both = (pos > 0) & (neg > 0)
+        auc = np.add.reduceat(g_pos * (neg_below + 0.5 * g_neg), first, axis=1) / (pos * neg)
+        gap = np.abs((pos_below + g_pos) / pos[:, seg] - (neg_below + g_neg) / neg[:, seg])
+        ks = np.maximum.reduceat(np.nan_to_num(gap), first, axis=1)
+        # Average precision: each group's positives, at the precision of "score >= group".
+        precision = (pos[:, seg] - pos_below) / ((pos + neg)[:, seg] - pos_below - neg_below)
+        ap = np.add.reduceat(np.nan_to_num(g_pos * precision), first, axis=1) / pos
+        cost = fn * fn_cost + fp * fp_cost
+        return {
+            "roc_auc": np.where(both, auc, np.nan),
+            "pr_auc": np.where(pos > 0, ap, np.nan),
+            "ks": np.where(both, ks, np.nan),
+            "expected_cost": cost,
+            "cost_per_row": cost / (pos + neg),
+            "n_pos": pos,
+            "n_rows": pos + neg,
+            "fn": fn,
+            "fp": fp,
+        }
+
+
+def _bootstrap_batch(
+    layout: SegmentLayout,
+    y_true: np.ndarray,
+    n_resamples: int,
+    seed: np.random.SeedSequence,
+    threshold: float,
+    fn_cost: float,
+    fp_cost: float,
+) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(y_true), size=(n_resamples, len(y_true)))
+    out = grouped_metrics(layout, *group_totals(layout, y_true, idx), threshold, fn_cost, fp_cost)
+    return {name: out[name] for name in METRICS}
+
+
+def evaluate_segments(
+    y_true,
+    proba,
+    segments: dict[str, np.ndarray],
+    threshold: float,
+    fn_cost: float = 10.0,
+    fp_cost: float = 1.0,
+    n_bootstrap: int = 500,
+    confidence: float = 0.95,
+    n_jobs: int = 1,
+    batch_cells: int = 4_000_000,
+    seed: int = 42,
+) -> dict[str, dict[str, dict]]:
+    """Per-segment ROC-AUC, PR-AUC, KS and cost at ``threshold``, with bootstrap intervals.
+
+    ``segments`` maps a dimension name to one label per row; an ``overall`` dimension with a
+    single ``all`` segment is always included. Resamples are drawn in batches of about
+    ``batch_cells / layout size`` and the batches run on ``n_jobs`` processes. Each batch gets
+    its own child seed, so results do not depend on ``n_jobs``.
+    """
+    y_true = np.asarray(y_true)
+    layout = build_layout(proba, {"overall": np.full(len(y_true), "all"), **segments})
+    point = grouped_metrics(layout, *group_totals(layout, y_true), threshold, fn_cost, fp_cost)
+
+    per_batch = max(1, min(n_bootstrap, batch_cells // max(layout.row_groups.size, 1)))
+    sizes = [min(per_batch, n_bootstrap - start) for start in range(0, n_bootstrap, per_batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    batches = Parallel(n_jobs=n_jobs)(
+        delayed(_bootstrap_batch)(layout, y_true, size, s, threshold, fn_cost, fp_cost)
+        for size, s in zip(sizes, seeds)
+    )
+    # Percentile intervals; resamples where a metric is undefined (one class absent) are skipped.
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for name in METRICS:
+        bounds = np.full((2, len(layout.segments)), np.nan)
+        if batches:
+            draws = np.concatenate([batch[name] for batch in batches])
+            valid = ~np.isnan(draws).all(axis=0)
+            bounds[:, valid] = np.nanpercentile(draws[:, valid], [tail, 100 - tail], axis=0)
+        intervals[name] = bounds
+
+    report: dict[str, dict[str, dict]] = {}
+    for j, (dimension, level) in enumerate(layout.segments):
+        n_rows, n_pos = int(point["n_rows"][0, j]), int(point["n_pos"][0, j])
+        fn, fp = int(point["fn"][0, j]), int(point["fp"][0, j])
+        entry: dict[str, Any] = {
+            "n_rows": n_rows,
+            "n_pos": n_pos,
+            "confusion": {"tp": n_pos - fn, "fp": fp, "fn": fn, "tn": n_rows - n_pos - fp},
+        }
+        for name in METRICS:
+            entry[name] = {
+                "value": _finite(point[name][0, j]),
+                "ci_low": _finite(intervals[name][0, j]),
+                "ci_high": _finite(intervals[name][1, j]),
+            }
+        report.setdefault(dimension, {})[level] = entry
+    return report
+
+
+def _finite(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
+
+
+def write_segment_report(report: dict[str, Any], path: str | Path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.tmp")
+    tmp.write_text(json.dumps(report, indent=2))
+    os.replace(tmp, path)
+    return path
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import importlib.util
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import average_precision_score, roc_auc_score
+from sklearn.pipeline import Pipeline
+
+from src.explainability.shap_explainer import record_training_mean
+from src.model_training.train import TrainingArtifacts, _build_preprocessor, _record_stage
+from src.utils.hashing import canonical_rows
+from src.utils.io import iter_table_chunks, save_joblib
+from src.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# pandas row hashing takes a 16-character key.
+SPLIT_HASH_KEY = "holdout-split-01"
+
+
+def row_unit_hash(chunk: pd.DataFrame, key: list[str] | None = None) -> np.ndarray:
+    """A uniform value in [0, 1) per row that depends only on its content (or its ``key`` columns).
+
+    The same row gets the same value on every run, whatever the chunk size, file order or
+    partitioning: values are hashed in their ``canonical_rows`` form, so a column read as int64
+    in one chunk and float64 in another (one with a NaN) hashes alike.
+    """
+    values = canonical_rows(chunk[key] if key else chunk)
+    hashes = pd.util.hash_pandas_object(values, index=False, hash_key=SPLIT_HASH_KEY).to_numpy()
+    # Top 53 bits as a float.
+    return (hashes >> np.uint64(11)).astype(np.float64) / 2.0**53
+
+
+def hash_split(chunk: pd.DataFrame, test_size: float, key: list[str] | None = None) -> np.ndarray:
+    """Boolean holdout mask: rows whose hash falls below ``test_size``."""
+    return row_unit_hash(chunk, key) < test_size
+
+
+@dataclass
+class ChunkSource:
+    """A CSV/Parquet table read in chunks, each hash-split and passed through ``transform``.
+
+    ``transform`` must be row-local (e.g. geo distance): a chunk never sees its neighbours, so
+    features that need a customer's full history have to be computed before this stage.
+    """
+
+    path: str | Path
+    columns: list[str] | None = None
+    transform: Callable[[pd.DataFrame], pd.DataFrame] | None = None
+    chunksize: int = 200_000
+    test_size: float = 0.2
+    split_key: list[str] | None = None
+
+    def chunks(self) -> Iterator[tuple[pd.DataFrame, np.ndarray, np.ndarray]]:
+        """Yield ``(chunk, holdout_mask, row_hash)``; rows are hashed before ``transform``."""
+        for chunk in iter_table_chunks(self.path, self.columns, self.chunksize):
+            u = row_unit_hash(chunk, self.split_key)
+            if self.transform is not None:
+                chunk = self.transform(chunk)
+            yield chunk, u < self.test_size, u
+
+
+@dataclass
+class StreamStats:
+    """Training-row statistics gathered in one streaming pass over the data.
+
+    Numeric moments are exact (chunk moments merged with Chan's update). Medians, category levels
+    and reference bins come from ``sample``: the training rows with the smallest row hashes, which
+    makes it uniform, deterministic and independent of chunk order.
+    """
+
+    target_col: str
+    sample_rows: int
+    n_train: int = 0
+    n_test: int = 0
+    class_counts: dict[int, int] = field(default_factory=dict)
+    count: dict[str, float] = field(default_factory=dict)
+    mean: dict[str, float] = field(default_factory=dict)
+    m2: dict[str, float] = field(default_factory=dict)
+    sample: pd.DataFrame | None = None
+    _priority: np.ndarray = field(default_factory=lambda: np.empty(0), repr=False)
+
+    def update(self, train: pd.DataFrame, n_test: int, priority: np.ndarray) -> None:
+        self.n_train += len(train)
+        self.n_test += n_test
+        labels, counts = np.unique(train[self.target_col].to_numpy(), return_counts=True)
+        for label, n in zip(labels.tolist(), counts.tolist()):
+            self.class_counts[label] = self.class_counts.get(label, 0) + n
+
+        numeric = train.drop(columns=[self.target_col]).select_dtypes(include="number")
+        for col in numeric.columns:
+            values = numeric[col].to_numpy(dtype=np.float64)
+            values = values[~np.isnan(values)]
+            if not len(values):
+                continue
+            n_b, mean_b = float(len(values)), float(values.mean())
+            m2_b = float(((values - mean_b) ** 2).sum())
+            n_a, mean_a = self.count.get(col, 0.0), self.mean.get(col, 0.0)
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self.count[col] = n
+            self.mean[col] = mean_a + delta * n_b / n
+            self.m2[col] = self.m2.get(col, 0.0) + m2_b + delta**2 * n_a * n_b / n
+
+        # Bottom-k: keep the rows with the smallest hash priorities seen so far. Once the sample
+        # is full, only rows below its current cutoff can enter, which on a large table is few.
+        if self.sample is not None and len(self.sample) == self.sample_rows:
+            enters = priority < self._priority.max()
+            train, priority = train[enters], priority[enters]
+        if self.sample is not None:
+            train = pd.concat([self.sample, train])
+            priority = np.concatenate([self._priority, priority])
+        keep = np.argsort(priority, kind="stable")[: self.sample_rows]
+        keep.sort()
+        self.sample = train.iloc[keep]
+        self._priority = priority[keep]
+
+
+def scan_training_data(
+    source: ChunkSource, target_col: str, sample_rows: int = 200_000
+) -> StreamStats:
+    """First pass: accumulate training-row statistics over every chunk."""
+    stats = StreamStats(target_col=target_col, sample_rows=sample_rows)
+    for chunk, test, u in source.chunks():
+        stats.update(chunk[~test], int(test.sum()), u[~test])
+    logger.info("Scanned %d train / %d holdout rows", stats.n_train, stats.n_test)
+    return stats
+
+
+def sample_holdout(source: ChunkSource, n_test: int, max_rows: int) -> pd.DataFrame:
+    """Uniform sample of about ``max_rows`` holdout rows, in one more pass over the chunks.
+
+    Holdout rows hash below ``test_size``; keeping those below a proportionally lower cutoff
+    keeps each of them with the same probability, whatever the chunk order.
+    """
+    cutoff = source.test_size * min(max_rows / max(n_test, 1), 1.0)
+    parts = [chunk[test & (u < cutoff)] for chunk, test, u in source.chunks()]
+    return pd.concat(parts, ignore_index=True)
+
+
+def fit_streamed_preprocessor(stats: StreamStats, preprocessing: dict[str, Any] | None = None):
+    """The usual ``_build_preprocessor`` transformer, fitted on the sample, with the scaler's
+    moments replaced by the exact streamed ones.
+
+    An integer ``min_frequency`` counts rows in the full training set, so it is rescaled to the
+    sample. The scaler sees imputed values, so each column's missing rows are merged in at the
+    sample median before computing the variance.
+    """
+    options = dict(preprocessing or {})
+    if isinstance(options.get("min_frequency"), int) and stats.n_train:
+        options["min_frequency"] = min(options["min_frequency"] / stats.n_train, 1.0)
+    sample = stats.sample
+    prep = _build_preprocessor(sample, stats.target_col, **options)
+    prep.fit(sample.drop(columns=[stats.target_col]))
+
+    numeric = prep.named_transformers_["num"]
+    cols = list(prep.transformers_[0][2])
+    if not cols:
+        return prep
+    median = numeric.named_steps["imputer"].statistics_.astype(np.float64)
+    n_obs = np.array([stats.count.get(c, 0.0) for c in cols])
+    mean_obs = np.array([stats.mean.get(c, 0.0) for c in cols])
+    m2_obs = np.array([stats.m2.get(c, 0.0) for c in cols])
+    n_miss = stats.n_train - n_obs
+    n = np.maximum(n_obs + n_miss, 1.0)
+    delta = median - mean_obs
+    mean = mean_obs + delta * n_miss / n
+    var = (m2_obs + delta**2 * n_obs * n_miss / n) / n
+
+    scaler = numeric.named_steps["scaler"]
+    scaler.mean_ = mean.astype(scaler.mean_.dtype)
+    scaler.var_ = var.astype(scaler.var_.dtype)
+    scale = np.sqrt(var)
+    scaler.scale_ = np.where(scale < 10 * np.finfo(scale.dtype).eps, 1.0, scale).astype(
+        scaler.scale_.dtype
+    )
+    scaler.n_samples_seen_ = int(stats.n_train)
+    return prep
+
+
+def _batches(source: ChunkSource, prep, target_col: str, holdout: bool) -> Iterator[tuple]:
+    """Preprocessed (X, y) per chunk for either the training rows or the holdout rows."""
+    for chunk, test, _ in source.chunks():
+        rows = chunk[test] if holdout else chunk[~test]
+        if len(rows):
+            yield prep.transform(rows.drop(columns=[target_col])), rows[target_col].to_numpy()
+
+
+def _fit_sgd(batches: Callable[[], Iterator], stats: StreamStats, epochs: int, seed: int, params):
+    # partial_fit cannot balance classes itself, so weight rows by the streamed class counts.
+    classes = np.array(sorted(stats.class_counts))
+    counts = np.array([stats.class_counts[c] for c in classes], dtype=np.float64)
+    weights = stats.n_train / (len(classes) * counts)
+    model = SGDClassifier(loss="log_loss", random_state=seed, **(params or {}))
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        for X, y in batches():
+            order = rng.permutation(len(y))
+            X, y = X[order], y[order]
+            w = weights[np.searchsorted(classes, y)]
+            model.partial_fit(X, y, classes=classes, sample_weight=w)
+    return model
+
+
+def _fit_xgboost(batches: Callable[[], Iterator], stats: StreamStats, seed: int, params):
+    # xgboost is imported lazily: it is slow to import and optional.
+    import xgboost as xgb
+
+    class _ChunkIter(xgb.DataIter):
+        def __init__(self, cache_prefix: str | None):
+            self._it = None
+            super().__init__(cache_prefix=cache_prefix)
+
+        def next(self, input_data) -> int:
+            if self._it is None:
+                self._it = batches()
+            batch = next(self._it, None)
+            if batch is None:
+                return 0
+            input_data(data=batch[0], label=batch[1])
+            return 1
+
+        def reset(self) -> None:
+            self._it = None
+
+    params = dict(params or {})
+    rounds = params.pop("num_boost_round", 300)
+    external_memory = params.pop("external_memory", True)
+    neg, pos = stats.class_counts.get(0, 0), stats.class_counts.get(1, 0)
+    booster_params = {
+        "objective": "binary:logistic",
+        "eval_metric": "aucpr",
+        "tree_method": "hist",
+        "scale_pos_weight": neg / max(pos, 1),
+        "seed": seed,
+        **params,
+    }
+    with tempfile.TemporaryDirectory() as cache_dir:
+        if external_memory:
+            # Pages are cached on disk and only one batch is held in memory at a time.
+            dtrain = xgb.DMatrix(_ChunkIter(str(Path(cache_dir) / "train")))
+        else:
+            # Chunks are streamed once into quantized bins: about a byte per cell, held in memory.
+            dtrain = xgb.QuantileDMatrix(
+                _ChunkIter(None), max_bin=booster_params.get("max_bin", 256)
+            )
+        booster = xgb.train(booster_params, dtrain, num_boost_round=rounds)
+        del dtrain  # releases the cache pages before the directory is removed
+    # Wrap as XGBClassifier so the saved pipeline serves and explains like any other candidate.
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw("json")))
+    return model
+
+
+def train_out_of_core(
+    source: ChunkSource,
+    stats: StreamStats,
+    experiment_name: str,
+    artifact_dir: str,
+    task_name: str,
+    epochs: int = 3,
+    metric: str = "pr_auc",
+    seed: int = 42,
+    sgd: dict[str, Any] | None = None,
+    xgboost: dict[str, Any] | None = None,
+    preprocessing: dict[str, Any] | None = None,
+) -> TrainingArtifacts:
+    """Train SGD (``partial_fit``) and XGBoost (external memory) on a stream of chunks.
+
+    ``stats`` comes from ``scan_training_data`` over the same ``source``. Each model is trained
+    on the training rows streamed chunk by chunk and scored on the hash holdout in a final pass;
+    the winner by ``metric`` is saved as a prep + model pipeline.
+    """
+    stages: dict[str, dict[str, float]] = {}
+    prep = fit_streamed_preprocessor(stats, preprocessing)
+    _record_stage(stages, "preprocess")
+
+    def batches(holdout: bool = False):
+        return _batches(source, prep, stats.target_col, holdout)
+
+    fitters = {"sgd": lambda: _fit_sgd(batches, stats, epochs, seed, sgd)}
+    if importlib.util.find_spec("xgboost") is not None:  # optional, as in _candidate_models
+        fitters["xgboost"] = lambda: _fit_xgboost(batches, stats, seed, xgboost)
+
+    models: dict[str, Any] = {}
+    fit_seconds: dict[str, float] = {}
+    for name, fit in fitters.items():
+        start = time.perf_counter()
+        models[name] = fit()
+        fit_seconds[name] = time.perf_counter() - start
+        logger.info("%s trained out of core in %.1fs", name, fit_seconds[name])
+    _record_stage(stages, "fit")
+
+    y_parts, score_parts = [], {name: [] for name in models}
+    for X, y in batches(holdout=True):
+        y_parts.append(y)
+        for name, model in models.items():
+            score_parts[name].append(model.predict_proba(X)[:, 1])
+    y_test = np.concatenate(y_parts)
+    auc_scores, pr_auc_scores = {}, {}
+    for name, parts in score_parts.items():
+        scores = np.concatenate(parts)
+        auc_scores[name] = float(roc_auc_score(y_test, scores))
+        pr_auc_scores[name] = float(average_precision_score(y_test, scores))
+    _record_stage(stages, "evaluate")
+
+    import mlflow  # deferred: importing mlflow costs seconds and only training needs it
+
+    mlflow.set_experiment(experiment_name)
+    for name in models:
+        with mlflow.start_run(run_name=f"{task_name}_{name}_out_of_core"):
+            mlflow.log_param("model", name)
+            mlflow.log_params({"out_of_core": True, "train_rows": stats.n_train, "epochs": epochs})
+            mlflow.log_metric("roc_auc", auc_scores[name])
+            mlflow.log_metric("pr_auc", pr_auc_scores[name])
+            mlflow.log_metric("fit_seconds", fit_seconds[name])
+            mlflow.log_metrics({f"{s}_peak_rss_mb": m["peak_rss_mb"] for s, m in stages.items()})
+        logger.info("%s AUC = %.4f, PR-AUC = %.4f", name, auc_scores[name], pr_auc_scores[name])
+
+    scores = pr_auc_scores if metric == "pr_auc" else auc_scores
+    best = max(scores, key=scores.get)
+    model_path = str(Path(artifact_dir) / f"{task_name}_pipeline.joblib")
+    pipe = Pipeline([("prep", prep), ("model", models[best])])
+    # The streamed scaler centres numeric columns exactly; one-hot means come from the sample.
+    record_training_mean(pipe, prep.transform(stats.sample.drop(columns=[stats.target_col])))
+    save_joblib(pipe, model_path)
+    _record_stage(stages, "save")
+    return TrainingArtifacts(
+        best_model_name=best,
+        model_path=model_path,
+        auc_scores=auc_scores,
+        fit_seconds=fit_seconds,
+        pr_auc_scores=pr_auc_scores,
+        stage_memory_mb=stages,
+    )
@@ -1,76 +1,143 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import copy
+import json
+import os
+import time
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
-import mlflow
 import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from sklearn.compose import ColumnTransformer
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.impute import SimpleImputer
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import roc_auc_score
+from sklearn.metrics import average_precision_score, roc_auc_score
 from sklearn.model_selection import train_test_split
 from sklearn.pipeline import Pipeline
-from sklearn.preprocessing import OneHotEncoder, StandardScaler
+from sklearn.preprocessing import FunctionTransformer, OneHotEncoder, StandardScaler
 
+from src.explainability.shap_explainer import record_training_mean
+from src.model_training.tuning import refit_best, successive_halving
 from src.utils.io import save_joblib
 from src.utils.logging import get_logger
+from src.utils.resources import (
+    current_rss_mb,
+    peak_rss_mb,
+    reset_peak_rss,
+    start_worker_peak,
+)
 
 logger = get_logger(__name__)
 
-try:
-    from xgboost import XGBClassifier
-except ImportError:  # pragma: no cover
-    XGBClassifier = None
-
 
 @dataclass
 class TrainingArtifacts:
     best_model_name: str
     model_path: str
     auc_scores: dict[str, float]
+    fit_seconds: dict[str, float] = field(default_factory=dict)
+    pr_auc_scores: dict[str, float] = field(default_factory=dict)
+    best_config_path: str | None = None
+    stage_memory_mb: dict[str, dict[str, float]] = field(default_factory=dict)
+    holdout_rows: np.ndarray | None = None  # positions of the test split in the training frame
+
 
+def _build_preprocessor(
+    df: pd.DataFrame,
+    target_col: str,
+    compact: bool = False,
+    min_frequency: int | float | None = None,
+    max_categories: int | None = None,
+) -> ColumnTransformer:
+    """Median-impute + scale numerics, most-frequent-impute + one-hot categoricals.
 
-def _build_preprocessor(df: pd.DataFrame, target_col: str) -> ColumnTransformer:
+    ``compact=True`` makes the output float32: numerics are cast before imputing, one-hot columns
+    are float32, and levels rarer than ``min_frequency`` (or beyond ``max_categories``) share one
+    "infrequent" column, which also absorbs unseen levels. The output is CSR whenever it is
+    smaller than the dense float32 matrix would be, i.e. below 50% non-zeros.
+    """
     features = df.drop(columns=[target_col])
     cat_cols = features.select_dtypes(include=["object", "category"]).columns.tolist()
     num_cols = [c for c in features.columns if c not in cat_cols]
 
-    numeric = Pipeline(
-        steps=[("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())]
-    )
-    categorical = Pipeline(
-        steps=[
-            ("imputer", SimpleImputer(strategy="most_frequent")),
-            ("encoder", OneHotEncoder(handle_unknown="ignore")),
+    numeric_steps = [("imputer", SimpleImputer(strategy="median")), ("scaler", StandardScaler())]
+    encoder = OneHotEncoder(handle_unknown="ignore")
+    if compact:
+        # Cast straight from the frame so no float64 copy of the numeric block is ever made.
+        # np.array always copies, so imputing and scaling in place never touches the caller's frame.
+        cast = FunctionTransformer(
+            np.array, kw_args={"dtype": np.float32}, feature_names_out="one-to-one"
+        )
+        numeric_steps = [
+            ("float32", cast),
+            ("imputer", SimpleImputer(strategy="median", copy=False)),
+            ("scaler", StandardScaler(copy=False)),
         ]
+        capped = min_frequency is not None or max_categories is not None
+        encoder = OneHotEncoder(
+            handle_unknown="infrequent_if_exist" if capped else "ignore",
+            min_frequency=min_frequency,
+            max_categories=max_categories,
+            dtype=np.float32,
+        )
+    categorical = Pipeline(
+        steps=[("imputer", SimpleImputer(strategy="most_frequent")), ("encoder", encoder)]
     )
 
     return ColumnTransformer(
-        transformers=[("num", numeric, num_cols), ("cat", categorical, cat_cols)]
+        transformers=[
+            ("num", Pipeline(steps=numeric_steps), num_cols),
+            ("cat", categorical, cat_cols),
+        ],
+        # A float32 CSR entry costs 8 bytes (value + column index) against 4 for a dense cell.
+        sparse_threshold=0.5 if compact else 0.3,
     )
 
 
-def train_and_select(
-    df: pd.DataFrame,
-    target_col: str,
-    experiment_name: str,
-    artifact_dir: str,
-    task_name: str,
-) -> TrainingArtifacts:
-    X = df.drop(columns=[target_col])
-    y = df[target_col]
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, stratify=y, random_state=42)
+def _matrix_mb(X) -> float:
+    if hasattr(X, "indptr"):
+        return (X.data.nbytes + X.indices.nbytes + X.indptr.nbytes) / 2**20
+    return np.asarray(X).nbytes / 2**20
+
+
+def _record_stage(
+    stages: dict[str, dict[str, float]], stage: str, worker_peak_mb: float = 0.0
+) -> None:
+    """Current RSS and the peak since the previous stage, then reset the peak for the next one.
+
+    ``worker_peak_mb`` is the largest peak reported by a worker process during the stage; work
+    run in this process is already in ``peak_rss_mb``. Where the kernel cannot reset the mark,
+    ``peak_rss_mb`` is the peak since the process started and ``peak_is_cumulative`` says so.
+    """
+    stages[stage] = {
+        "rss_mb": round(current_rss_mb(), 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "worker_peak_rss_mb": round(worker_peak_mb, 1),
+    }
+    if not reset_peak_rss():
+        stages[stage]["peak_is_cumulative"] = True
+    logger.info("Memory after %s: %s", stage, stages[stage])
+
 
-    preprocessor = _build_preprocessor(df, target_col)
+def _candidate_models(model_n_jobs: int = 1) -> dict[str, Any]:
+    # xgboost is imported lazily: it is slow to import and optional.
+    try:
+        from xgboost import XGBClassifier
+    except ImportError:  # pragma: no cover
+        XGBClassifier = None
 
     models: dict[str, Any] = {
         "logreg": LogisticRegression(max_iter=500, class_weight="balanced"),
         "random_forest": RandomForestClassifier(
-            n_estimators=300, max_depth=10, class_weight="balanced_subsample", random_state=42
+            n_estimators=300,
+            max_depth=10,
+            class_weight="balanced_subsample",
+            random_state=42,
+            n_jobs=model_n_jobs,
         ),
     }
     if XGBClassifier is not None:
@@ -82,26 +149,214 @@ def train_and_select(
             colsample_bytree=0.8,
             eval_metric="auc",
             random_state=42,
+            n_jobs=model_n_jobs,
         )
+    return models
+
+
+def _score(estimator, Xt_test, y_test) -> tuple[float, float]:
+    preds = estimator.predict_proba(Xt_test)[:, 1]
+    return float(roc_auc_score(y_test, preds)), float(average_precision_score(y_test, preds))
+
+
+def _fit_candidate(
+    name: str, estimator, Xt_train, y_train, Xt_test, y_test, parent_pid: int | None = None
+) -> tuple:
+    in_worker = start_worker_peak(parent_pid)
+    start = time.perf_counter()
+    estimator.fit(Xt_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    scores = _score(estimator, Xt_test, y_test)
+    # In-process fits already count towards the training process's own peak.
+    worker_peak = peak_rss_mb() if in_worker else 0.0
+    return name, estimator, *scores, fit_seconds, worker_peak
+
+
+def _log_trials(task_name: str, fraction: float, trials) -> None:
+    import mlflow
+
+    for trial in trials:
+        run_name = f"{task_name}_{trial.family}_t{trial.trial_id}"
+        with mlflow.start_run(run_name=run_name, nested=True):
+            mlflow.log_params({"model": trial.family, **trial.params})
+            metrics = {
+                "train_fraction": fraction,
+                "val_pr_auc": trial.pr_auc,
+                "val_roc_auc": trial.roc_auc,
+                "fit_seconds": trial.fit_seconds,
+                "cpu_seconds": trial.cpu_seconds,
+            }
+            if trial.best_iteration is not None:
+                metrics["best_iteration"] = trial.best_iteration
+            mlflow.log_metrics(metrics)
+
+
+def _tune_candidates(
+    task_name: str,
+    models: dict[str, Any],
+    tuning: dict[str, Any],
+    Xt_fit,
+    y_fit: np.ndarray,
+    Xt_val,
+    y_val: np.ndarray,
+) -> tuple[list[tuple], dict[str, Any]]:
+    import mlflow
+
+    settings = {k: v for k, v in tuning.items() if k not in ("enabled", "metric", "search_space")}
+    with mlflow.start_run(run_name=f"{task_name}_tuning"):
+        search = successive_halving(
+            models,
+            tuning["search_space"],
+            Xt_fit,
+            y_fit,
+            Xt_val,
+            y_val,
+            on_rung=lambda fraction, trials: _log_trials(task_name, fraction, trials),
+            **settings,
+        )
+        mlflow.log_metrics(
+            {
+                "trials": len(search.trials),
+                "cpu_seconds": search.cpu_seconds,
+                "wall_seconds": search.wall_seconds,
+            }
+        )
+    results, summary = [], {}
+    for family, trial in search.best.items():
+        start = time.perf_counter()
+        rounds = settings.get("early_stopping_rounds", 30)
+        estimator = refit_best(trial, models[family], Xt_fit, y_fit, Xt_val, y_val, rounds)
+        results.append((family, estimator, time.perf_counter() - start + trial.fit_seconds))
+        summary[family] = {
+            "params": trial.params,
+            "val_pr_auc": trial.pr_auc,
+            "train_fraction": trial.fraction,
+            "best_iteration": trial.best_iteration,
+        }
+    search_info = {
+        "trials": len(search.trials),
+        "cpu_seconds": round(search.cpu_seconds, 2),
+        "wall_seconds": round(search.wall_seconds, 2),
+        "budget_exhausted": search.budget_exhausted,
+        "worker_peak_rss_mb": search.peak_rss_mb,
+        "families": summary,
+    }
+    return results, search_info
+
+
+def train_and_select(
+    df: pd.DataFrame,
+    target_col: str,
+    experiment_name: str,
+    artifact_dir: str,
+    task_name: str,
+    n_workers: int | None = None,
+    backend: str = "loky",
+    model_n_jobs: int = 1,
+    test_size: float = 0.2,
+    val_size: float = 0.2,
+    tuning: dict[str, Any] | None = None,
+    preprocessing: dict[str, Any] | None = None,
+) -> TrainingArtifacts:
+    stages: dict[str, dict[str, float]] = {}
+    _record_stage(stages, "load")
+    X = df.drop(columns=[target_col])
+    y = df[target_col]
+    # The split depends only on the row count, labels and seed, so the positions ride along.
+    X_train, X_test, y_train, y_test, _, test_rows = train_test_split(
+        X, y, np.arange(len(X)), test_size=test_size, stratify=y, random_state=42
+    )
+    tune = bool(tuning and tuning.get("enabled", True))
+    if tune:
+        # Tuning scores trials and early-stops XGBoost on a validation split; test stays untouched.
+        X_train, X_val, y_train, y_val = train_test_split(
+            X_train, y_train, test_size=val_size, stratify=y_train, random_state=42
+        )
+    del X
+
+    # Fit and transform the split once; every candidate trains on the same cached matrices.
+    # With the loky backend joblib memory-maps large arrays so workers share them instead of copying.
+    preprocessor = _build_preprocessor(df, target_col, **(preprocessing or {})).fit(X_train)
+    Xt_train, Xt_test = preprocessor.transform(X_train), preprocessor.transform(X_test)
+    y_train, y_test = y_train.to_numpy(), y_test.to_numpy()
+    del X_train, X_test
+    _record_stage(stages, "preprocess")
+    stages["preprocess"]["train_matrix_mb"] = round(_matrix_mb(Xt_train), 1)
+
+    import mlflow  # deferred: importing mlflow costs seconds and only training needs it
 
     mlflow.set_experiment(experiment_name)
+    models = _candidate_models(model_n_jobs)
+    search_info = None
+    if tune:
+        Xt_val = preprocessor.transform(X_val)
+        del X_val
+        fitted, search_info = _tune_candidates(
+            task_name, models, tuning, Xt_train, y_train, Xt_val, y_val.to_numpy()
+        )
+        results = [(name, est, *_score(est, Xt_test, y_test), secs) for name, est, secs in fitted]
+        worker_peak = search_info["worker_peak_rss_mb"]
+    else:
+        n_workers = n_workers or len(models)
+        fitted = Parallel(n_jobs=min(n_workers, len(models)), backend=backend)(
+            delayed(_fit_candidate)(
+                name, estimator, Xt_train, y_train, Xt_test, y_test, parent_pid=os.getpid()
+            )
+            for name, estimator in models.items()
+        )
+        results = [result[:-1] for result in fitted]
+        worker_peak = max(result[-1] for result in fitted)
+
+    _record_stage(stages, "fit", worker_peak_mb=worker_peak)
+
     auc_scores: dict[str, float] = {}
+    pr_auc_scores: dict[str, float] = {}
+    fit_seconds: dict[str, float] = {}
     trained: dict[str, Pipeline] = {}
 
-    for name, estimator in models.items():
+    for name, estimator, auc, pr_auc, seconds in results:
         with mlflow.start_run(run_name=f"{task_name}_{name}"):
-            pipe = Pipeline([("prep", preprocessor), ("model", estimator)])
-            pipe.fit(X_train, y_train)
-            preds = pipe.predict_proba(X_test)[:, 1]
-            auc = roc_auc_score(y_test, preds)
-            auc_scores[name] = float(auc)
-            trained[name] = pipe
+            # Each pipeline owns a copy of the fitted preprocessor so saved artifacts never share state.
+            trained[name] = Pipeline([("prep", copy.deepcopy(preprocessor)), ("model", estimator)])
+            record_training_mean(trained[name], Xt_train)
+            auc_scores[name] = auc
+            pr_auc_scores[name] = pr_auc
+            fit_seconds[name] = seconds
             mlflow.log_metric("roc_auc", auc)
+            mlflow.log_metric("pr_auc", pr_auc)
+            mlflow.log_metric("fit_seconds", seconds)
+            mlflow.log_metrics({f"{s}_peak_rss_mb": m["peak_rss_mb"] for s, m in stages.items()})
+            mlflow.log_metric("fit_worker_peak_rss_mb", stages["fit"]["worker_peak_rss_mb"])
             mlflow.log_param("model", name)
-            logger.info("%s AUC = %.4f", name, auc)
+            logger.info("%s AUC = %.4f, PR-AUC = %.4f (fit %.2fs)", name, auc, pr_auc, seconds)
 
-    best = max(auc_scores, key=auc_scores.get)
+    # Tuning optimises PR-AUC, so tuned runs are also selected on it.
+    scores = pr_auc_scores if tune and tuning.get("metric", "pr_auc") == "pr_auc" else auc_scores
+    best = max(scores, key=scores.get)
     best_pipeline = trained[best]
     model_path = str(Path(artifact_dir) / f"{task_name}_pipeline.joblib")
     save_joblib(best_pipeline, model_path)
-    return TrainingArtifacts(best_model_name=best, model_path=model_path, auc_scores=auc_scores)
+
+    best_config_path = None
+    if search_info is not None:
+        best_config_path = str(Path(artifact_dir) / f"{task_name}_best_config.json")
+        config = {
+            "task": task_name,
+            "model": best,
+            **search_info["families"][best],
+            "test_roc_auc": auc_scores[best],
+            "test_pr_auc": pr_auc_scores[best],
+            "search": search_info,
+        }
+        Path(best_config_path).write_text(json.dumps(config, indent=2, default=str))
+    _record_stage(stages, "save")
+    return TrainingArtifacts(
+        best_model_name=best,
+        model_path=model_path,
+        auc_scores=auc_scores,
+        fit_seconds=fit_seconds,
+        pr_auc_scores=pr_auc_scores,
+        best_config_path=best_config_path,
+        stage_memory_mb=stages,
+        holdout_rows=np.sort(test_rows),
+    )
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from src.utils.logging import get_logger
+from src.utils.resources import peak_rss_mb, process_peak_rss_mb, start_worker_peak
+
+logger = get_logger(__name__)
+
+# Set once per worker by the pool initializer so trials don't re-ship the matrices.
+_DATA: dict[str, Any] = {}
+
+
+def sample_params(space: dict[str, Any], rng: np.random.Generator) -> dict[str, Any]:
+    """Draw one configuration; each entry is a fixed value or one of
+    ``{choice: [...]}``, ``{int: [lo, hi]}``, ``{uniform: [lo, hi]}``, ``{log_uniform: [lo, hi]}``.
+    """
+    params: dict[str, Any] = {}
+    for name, spec in space.items():
+        if not isinstance(spec, dict):
+            params[name] = spec
+            continue
+        (kind, args), = spec.items()
+        if kind == "choice":
+            params[name] = args[int(rng.integers(len(args)))]
+        elif kind == "int":
+            params[name] = int(rng.integers(args[0], args[1] + 1))
+        elif kind == "uniform":
+            params[name] = float(rng.uniform(args[0], args[1]))
+        elif kind == "log_uniform":
+            params[name] = float(np.exp(rng.uniform(np.log(args[0]), np.log(args[1]))))
+        else:
+            raise ValueError(f"Unknown search space kind {kind!r} for {name}")
+    return params
+
+
+def rung_fractions(min_fraction: float, eta: int) -> list[float]:
+    """Training-set fractions per rung, growing by ``eta`` and always ending at the full set.
+
+    A partial rung is only kept if it is at most ``1/eta`` of the data, so the final step is a
+    real reduction (0.1, 0.3, 1.0 rather than 0.1, 0.3, 0.9, 1.0).
+    """
+    fractions, fraction = [], min_fraction
+    while fraction * eta <= 1.0 + 1e-9:
+        fractions.append(round(fraction, 6))
+        fraction *= eta
+    return fractions + [1.0]
+
+
+def _stratified_order(y: np.ndarray, seed: int) -> np.ndarray:
+    """A row order whose every prefix keeps the class ratio, so rungs train on nested subsets."""
+    rng = np.random.default_rng(seed)
+    keys = np.empty(len(y))
+    for label in np.unique(y):
+        idx = np.flatnonzero(y == label)
+        keys[idx] = (rng.permutation(len(idx)) + rng.random()) / len(idx)
+    return np.argsort(keys, kind="stable")
+
+
+def _init_worker(X_train, y_train, X_val, y_val, order, parent_pid=None) -> None:
+    _DATA.update(X_train=X_train, y_train=y_train, X_val=X_val, y_val=y_val, order=order)
+    _DATA.update(parent_pid=parent_pid)
+
+
+@dataclass
+class Trial:
+    trial_id: int
+    family: str
+    params: dict[str, Any]
+    fraction: float = 0.0
+    pr_auc: float = float("nan")
+    roc_auc: float = float("nan")
+    fit_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    best_iteration: int | None = None
+    peak_rss_mb: float = 0.0  # worker process peak during the trial; 0 when run in-process
+    estimator: Any = None
+    history: list[dict[str, float]] = field(default_factory=list)
+
+
+def _run_trial(trial: Trial, base_estimator, fraction: float, early_stopping_rounds: int) -> Trial:
+    # Copy so thread-pool runs behave like process-pool ones: each rung returns a new Trial.
+    trial = replace(trial)
+    order = _DATA["order"]
+    idx = order[: max(int(math.ceil(len(order) * fraction)), 2)]
+    X, y = _DATA["X_train"][idx], _DATA["y_train"][idx]
+    X_val, y_val = _DATA["X_val"], _DATA["y_val"]
+
+    estimator = clone(base_estimator).set_params(**trial.params)
+    fit_kwargs = {}
+    if trial.family == "xgboost":
+        estimator.set_params(early_stopping_rounds=early_stopping_rounds, eval_metric="aucpr")
+        fit_kwargs = {"eval_set": [(X_val, y_val)], "verbose": False}
+
+    in_worker = start_worker_peak(_DATA["parent_pid"])
+    wall, cpu = time.perf_counter(), time.process_time()
+    estimator.fit(X, y, **fit_kwargs)
+    trial.fit_seconds = time.perf_counter() - wall
+    trial.cpu_seconds = time.process_time() - cpu
+    preds = estimator.predict_proba(X_val)[:, 1]
+    trial.fraction = fraction
+    trial.pr_auc = float(average_precision_score(y_val, preds))
+    trial.roc_auc = float(roc_auc_score(y_val, preds))
+    trial.peak_rss_mb = peak_rss_mb() if in_worker else 0.0
+    if trial.family == "xgboost":
+        trial.best_iteration = int(estimator.best_iteration)
+    trial.history = trial.history + [
+        {"fraction": fraction, "pr_auc": trial.pr_auc, "cpu_seconds": trial.cpu_seconds}
+    ]
+    # Only full-data models can be reused as the final estimator; skip pickling the rest back.
+    trial.estimator = estimator if fraction >= 1.0 else None
+    return trial
+
+
+def _terminate_workers(pool: ProcessPoolExecutor) -> float:
+    """Kill the pool's worker processes, trials still running included; returns their largest
+    peak RSS, so the memory of trials cut off by the budget is still accounted for."""
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    peak = max((process_peak_rss_mb(p.pid) for p in processes), default=0.0)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join()
+    return peak
+
+
+@dataclass
+class SearchResult:
+    best: dict[str, Trial]
+    trials: list[Trial]
+    cpu_seconds: float
+    wall_seconds: float
+    budget_exhausted: bool
+    peak_rss_mb: float = 0.0  # largest worker peak of any trial
+
+
+def successive_halving(
+    base_estimators: dict[str, Any],
+    search_space: dict[str, dict[str, Any]],
+    X_train,
+    y_train: np.ndarray,
+    X_val,
+    y_val: np.ndarray,
+    n_trials: int = 27,
+    eta: int = 3,
+    min_fraction: float = 0.1,
+    budget_seconds: float = 600.0,
+    n_workers: int = 2,
+    backend: str = "process",
+    early_stopping_rounds: int = 30,
+    seed: int = 42,
+    on_rung=None,
+) -> SearchResult:
+    """Random configurations per model family, pruned by successive halving on training-set size.
+
+    Every rung fits the surviving trials on a larger nested, stratified subsample, scores them by
+    validation PR-AUC and keeps the top ``1/eta`` of each family. Trials run on a process pool
+    (``backend="thread"`` for tests). At ``budget_seconds`` queued trials are dropped and the
+    worker processes killed, so trials still running stop using CPU and memory (thread workers
+    cannot be stopped and finish in the background). Each family keeps the best trial of the
+    highest rung it completed. A family without a ``search_space``
+    entry runs one trial with its default parameters. ``on_rung(fraction, trials)`` is called
+    after each rung, e.g. to log to MLflow.
+    """
+    rng = np.random.default_rng(seed)
+    untuned = [f for f in base_estimators if f not in search_space]
+    if untuned:
+        logger.warning("No search_space for %s; tuning with their defaults", untuned)
+    alive: dict[str, list[Trial]] = {
+        family: [
+            Trial(trial_id=i, family=family, params=sample_params(search_space[family], rng))
+            for i in range(n_trials)
+        ]
+        if family in search_space
+        else [Trial(trial_id=0, family=family, params={})]
+        for family in base_estimators
+    }
+    completed: list[Trial] = []
+    best: dict[str, Trial] = {}
+    start = time.perf_counter()
+    deadline = start + budget_seconds
+    exhausted = False
+    killed_peak_mb = 0.0
+    order = _stratified_order(y_train, seed)
+
+    pool_cls = ProcessPoolExecutor if backend == "process" else ThreadPoolExecutor
+    pool = pool_cls(
+        max_workers=n_workers,
+        initializer=_init_worker,
+        initargs=(X_train, y_train, X_val, y_val, order, os.getpid()),
+    )
+    try:
+        for fraction in rung_fractions(min_fraction, eta):
+            if time.perf_counter() >= deadline:
+                exhausted = True
+                break
+            pending = {
+                pool.submit(
+                    _run_trial,
+                    trial,
+                    base_estimators[trial.family],
+                    fraction,
+                    early_stopping_rounds,
+                )
+                for trials in alive.values()
+                for trial in trials
+            }
+            finished: list[Trial] = []
+            while pending:
+                remaining = max(deadline - time.perf_counter(), 0)
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                finished += [future.result() for future in done]
+                if pending and time.perf_counter() >= deadline:
+                    for future in pending:
+                        future.cancel()
+                    exhausted = True
+                    break
+            completed += finished
+            if on_rung is not None:
+                on_rung(fraction, finished)
+            for family in alive:
+                ranked = [t for t in finished if t.family == family]
+                ranked.sort(key=lambda t: t.pr_auc, reverse=True)
+                if ranked:
+                    best[family] = ranked[0]
+                    alive[family] = ranked[: max(1, math.ceil(len(alive[family]) / eta))]
+                else:
+                    alive[family] = []
+            logger.info(
+                "Rung %.3f: %d trials, best PR-AUC %s",
+                fraction,
+                len(finished),
+                {f: round(t.pr_auc, 4) for f, t in best.items()},
+            )
+            if exhausted:
+                break
+    finally:
+        in_processes = isinstance(pool, ProcessPoolExecutor)
+        if exhausted and in_processes:
+            killed_peak_mb = _terminate_workers(pool)
+        # Past the budget, don't block on trials still running in threads.
+        pool.shutdown(wait=in_processes or not exhausted, cancel_futures=True)
+
+    return SearchResult(
+        best=best,
+        trials=completed,
+        cpu_seconds=sum(t.cpu_seconds for t in completed),
+        wall_seconds=time.perf_counter() - start,
+        budget_exhausted=exhausted,
+        peak_rss_mb=max([killed_peak_mb] + [t.peak_rss_mb for t in completed]),
+    )
+
+
+def refit_best(
+    trial: Trial, base_estimator, X_train, y_train, X_val, y_val, early_stopping_rounds: int = 30
+):
+    """Estimator fitted on the full training set; reuses the last rung's model when available."""
+    if trial.estimator is not None:
+        return trial.estimator
+    _init_worker(X_train, y_train, X_val, y_val, np.arange(len(y_train)))
+    try:
+        fresh = Trial(trial.trial_id, trial.family, trial.params)
+        return _run_trial(fresh, base_estimator, 1.0, early_stopping_rounds).estimator
+    finally:
+        _DATA.clear()
@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+
+def canonical_rows(frame: pd.DataFrame) -> pd.DataFrame:
+    """Row values in a dtype-independent form, so equal rows hash alike in every chunk.
+
+    Row hashes depend on dtype: a column read as int64 in one chunk and float64 in another (once
+    a NaN shows up), or downcast differently per Parquet partition, would hash the same row twice.
+    Numbers and bools become float64; everything else becomes str, with missing values kept apart.
+    """
+    out = {}
+    for col in frame.columns:
+        values = frame[col]
+        if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+            out[col] = values.astype(np.float64)
+        else:
+            out[col] = values.astype(str).where(values.notna(), "\x00missing")
+    return pd.DataFrame(out, index=frame.index)
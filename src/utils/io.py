@@ -1,6 +1,9 @@
+import hashlib
+import os
 from pathlib import Path
 
 import joblib
+import pandas as pd
 
 
 def ensure_dir(path: str | Path) -> Path:
@@ -10,9 +13,50 @@ def ensure_dir(path: str | Path) -> Path:
 
 
 def save_joblib(obj, path: str | Path) -> None:
-    ensure_dir(Path(path).parent)
-    joblib.dump(obj, path)
+    # Write then rename so readers (e.g. the API model watcher) never see a half-written file.
+    path = Path(path)
+    ensure_dir(path.parent)
+    tmp = path.with_name(f".{path.name}.tmp")
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
 
 
-def load_joblib(path: str | Path):
-    return joblib.load(path)
+def load_joblib(path: str | Path, mmap_mode: str | None = None):
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def file_fingerprint(path: str | Path) -> tuple[int, int] | None:
+    """Cheap change marker: (mtime_ns, size), or None when the file is missing."""
+    try:
+        st = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def file_digest(path: str | Path, length: int = 12) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:length]
+
+
+def read_table(path: str | Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """Read a CSV, a Parquet file or a directory of Parquet parts, loading only ``columns``."""
+    path = Path(path)
+    if path.is_dir() or path.suffix == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_csv(path, usecols=columns)
+
+
+def iter_table_chunks(path: str | Path, columns: list[str] | None = None, chunksize: int = 200_000):
+    """Yield DataFrame chunks from a CSV or Parquet file/directory with bounded memory."""
+    path = Path(path)
+    if path.is_dir() or path.suffix == ".parquet":
+        import pyarrow.dataset as ds
+
+        for batch in ds.dataset(path, format="parquet").to_batches(columns=columns, batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunksize)
@@ -0,0 +1,58 @@
+import os
+import resource
+from pathlib import Path
+
+
+def _proc_status_mb(field: str, pid: int | str = "self") -> float | None:
+    status = Path(f"/proc/{pid}/status")
+    if not status.exists():
+        return None
+    try:
+        text = status.read_text()
+    except OSError:  # the process exited
+        return None
+    for line in text.splitlines():
+        if line.startswith(f"{field}:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+
+def current_rss_mb() -> float:
+    rss = _proc_status_mb("VmRSS")
+    return rss if rss is not None else peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    # VmHWM is reset on exec, unlike ru_maxrss which a spawned child inherits from its parent.
+    peak = _proc_status_mb("VmHWM")
+    return peak if peak is not None else resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def process_peak_rss_mb(pid: int) -> float:
+    """Peak RSS of another process (e.g. a pool worker about to be killed); 0 where unknown."""
+    return _proc_status_mb("VmHWM", pid) or 0.0
+
+
+def reset_peak_rss() -> bool:
+    """Lower this process's peak RSS mark to its current RSS, so the next peak covers one step.
+
+    Linux only; returns False where the mark cannot be reset and keeps growing for the process
+    lifetime instead.
+    """
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        return False
+    return True
+
+
+def start_worker_peak(parent_pid: int | None) -> bool:
+    """True when running in a worker process rather than ``parent_pid`` itself.
+
+    A worker's peak mark is then reset, so its ``peak_rss_mb`` covers the current task only:
+    pool workers are reused across tasks.
+    """
+    in_worker = parent_pid is not None and os.getpid() != parent_pid
+    if in_worker:
+        reset_peak_rss()
+    return in_worker
@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from src.explainability.shap_explainer import record_training_mean
+from src.model_training.train import _build_preprocessor
+from src.utils.io import save_joblib
+from tests.synthetic import small_fraud_frame
+
+
+@pytest.fixture(scope="session")
+def fraud_frame() -> pd.DataFrame:
+    return small_fraud_frame()
+
+
+@pytest.fixture(scope="session")
+def fraud_pipeline(fraud_frame) -> Pipeline:
+    pipe = Pipeline(
+        [
+            ("prep", _build_preprocessor(fraud_frame, "is_fraud")),
+            ("model", LogisticRegression(max_iter=500, class_weight="balanced")),
+        ]
+    )
+    X = fraud_frame.drop(columns=["is_fraud"])
+    pipe.fit(X, fraud_frame["is_fraud"])
+    record_training_mean(pipe, pipe.named_steps["prep"].transform(X))
+    return pipe
+
+
+@pytest.fixture
+def fraud_model_path(tmp_path, fraud_pipeline) -> str:
+    path = tmp_path / "fraud_pipeline.joblib"
+    save_joblib(fraud_pipeline, path)
+    return str(path)
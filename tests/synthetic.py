@@ -0,0 +1,13 @@
+import pandas as pd
+
+from benchmarks.synthetic import make_fraud_frame
+
+
+def small_fraud_frame() -> pd.DataFrame:
+    """The shared generator at test size; customer ids are left to ``fraud_payloads``."""
+    return make_fraud_frame(400, seed=7).drop(columns=["customer_id"])
+
+
+def fraud_payloads(df: pd.DataFrame) -> list[dict]:
+    records = df.drop(columns=["is_fraud"]).to_dict(orient="records")
+    return [{"customer_id": f"C{i:04d}", **r} for i, r in enumerate(records)]
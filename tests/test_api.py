@@ -1,6 +1,32 @@
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
 from fastapi.testclient import TestClient
 
-from api.service import app
+from api import service
+from api.profiling import SamplingProfiler
+from api.schemas import CreditRiskRequest
+from api.service import ModelBundle, app
+from src.drift_detection.reference_bins import (
+    SCORE_FEATURE,
+    build_reference_bins,
+    build_score_bins,
+    save_reference_bins,
+)
+from src.explainability.compliance_pack import build_compliance_pack
+from src.feature_engineering.target_encoding import TargetEncodingTable
+from src.inference.decision_log import DecisionLog, read_decisions
+from tests.synthetic import fraud_payloads
+
+
+@pytest.fixture(autouse=True)
+def _empty_score_caches():
+    # Fixture models share one artifact across tests, so cached responses would leak between them.
+    for cache in service.score_caches.values():
+        cache.clear()
 
 
 def test_health_endpoint():
@@ -8,3 +34,292 @@ def test_health_endpoint():
     resp = client.get("/health")
     assert resp.status_code == 200
     assert "status" in resp.json()
+
+
+def test_predict_batch_matches_single_predictions(fraud_model_path, fraud_frame):
+    bundle = ModelBundle(fraud_model_path, threshold=0.6)
+    payloads = fraud_payloads(fraud_frame.head(20))
+    batch = bundle.predict_batch(payloads)
+    assert len(batch) == 20
+    for payload, result in zip(payloads, batch):
+        single = bundle.predict(payload)
+        assert result["score"] == pytest.approx(single["score"], abs=1e-5)
+        assert [e["feature"] for e in result["explanation"]] == [e["feature"] for e in single["explanation"]]
+
+
+def test_fraud_batch_endpoint_reports_per_item_errors(monkeypatch, fraud_model_path, fraud_frame):
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6))
+    items = fraud_payloads(fraud_frame.head(3))
+    items[1]["amount"] = -5
+    resp = TestClient(app).post("/predict/fraud/batch", json=items)
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["n_items"] == 3 and body["n_failed"] == 1
+    assert "amount" in body["results"][1]["error"]
+    assert body["results"][1]["result"] is None
+    assert body["results"][0]["result"]["decision"] in {"high_risk", "low_risk"}
+
+
+def test_fraud_endpoint_fills_velocity_counts_from_feature_store(monkeypatch, fraud_model_path, fraud_frame):
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6))
+    monkeypatch.setattr(service, "velocity_store", service.VelocityFeatureStore())
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    del payload["txn_count_1h"], payload["txn_count_24h"]
+    client = TestClient(app)
+    for minute in range(3):
+        payload["transaction_ts"] = f"2024-05-01T10:0{minute}:00"
+        assert client.post("/predict/fraud", json=payload).status_code == 200
+    as_of = pd.Timestamp("2024-05-01T10:30:00").value
+    assert service.velocity_store.query(payload["customer_id"], as_of)["txn_count_1h"] == 3
+
+
+def test_rejected_fraud_request_is_not_counted_towards_velocity(
+    monkeypatch, fraud_model_path, fraud_frame
+):
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6))
+    monkeypatch.setattr(service, "velocity_store", service.VelocityFeatureStore())
+    score = service._score
+
+    async def queue_full(batcher, payload):
+        raise service.HTTPException(status_code=429, detail="Scoring queue full")
+
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    payload["transaction_ts"] = "2024-05-01T10:00:00"
+    as_of = pd.Timestamp("2024-05-01T10:30:00").value
+    client = TestClient(app)
+    monkeypatch.setattr(service, "_score", queue_full)
+    assert client.post("/predict/fraud", json=payload).status_code == 429
+    assert service.velocity_store.query(payload["customer_id"], as_of)["txn_count_1h"] == 0
+
+    monkeypatch.setattr(service, "_score", score)
+    assert client.post("/predict/fraud", json=payload).status_code == 200
+    assert service.velocity_store.query(payload["customer_id"], as_of)["txn_count_1h"] == 1
+
+
+def test_fraud_payload_fills_store_features_the_model_takes(
+    monkeypatch, fraud_model_path, fraud_frame
+):
+    bundle = ModelBundle(fraud_model_path, threshold=0.6)
+    monkeypatch.setattr(service, "fraud_model", bundle)
+    monkeypatch.setattr(service, "velocity_store", service.VelocityFeatureStore())
+    request = service.FraudRequest(**fraud_payloads(fraud_frame.head(1))[0])
+    assert "txn_amount_7d" not in service._fraud_payload(request)
+    bundle.input_columns = bundle.input_columns | {"txn_amount_7d"}
+    assert service._fraud_payload(request)["txn_amount_7d"] == 2 * request.amount
+
+
+def test_single_requests_flow_through_micro_batcher(monkeypatch, tmp_path, fraud_model_path, fraud_frame):
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6))
+    monkeypatch.setitem(service.cfg["feature_store"], "snapshot_path", str(tmp_path / "velocity.joblib"))
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    with TestClient(app) as client:
+        assert client.post("/predict/fraud", json=payload).status_code == 200
+        stats = client.get("/model-info").json()["micro_batching"]["fraud"]
+    assert stats["items"] == 1 and stats["batches"] == 1
+
+
+def test_ready_only_after_lifespan_warm_up(monkeypatch, tmp_path, fraud_model_path):
+    monkeypatch.setitem(service.cfg["feature_store"], "snapshot_path", str(tmp_path / "velocity.joblib"))
+    assert TestClient(app).get("/ready").status_code == 503
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6))
+    monkeypatch.setattr(service, "credit_model", ModelBundle(fraud_model_path, threshold=0.55))
+    with TestClient(app) as client:
+        resp = client.get("/ready")
+        assert resp.status_code == 200
+        assert resp.json()["warmup_seconds"] is not None
+
+
+def test_metrics_endpoint_exposes_stage_histograms(monkeypatch, tmp_path, fraud_model_path, fraud_frame):
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6, name="fraud"))
+    monkeypatch.setattr(service, "metrics", service.ScoringMetrics())
+    monkeypatch.setitem(service.cfg["profiling"], "enabled", True)
+    monkeypatch.setitem(service.cfg["profiling"], "output_dir", str(tmp_path))
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    client = TestClient(app)
+    assert client.post("/predict/fraud", json=payload).status_code == 200
+    profiled = client.post("/predict/fraud", json=payload, headers={"X-Profile": "1"})
+    assert profiled.status_code == 200
+    assert Path(profiled.headers["X-Profile-Path"]).exists()
+
+    bad = client.post("/predict/fraud", json={**payload, "amount": -1})
+    assert bad.status_code == 422
+    assert bad.json()["detail"][0]["loc"] == ["body", "amount"]
+
+    text = client.get("/metrics").text
+    for stage in ("validation", "features", "score", "total", "transform", "predict", "explain"):
+        assert f'scoring_stage_latency_seconds_count{{model="fraud",stage="{stage}",mode="single"}}' in text
+    assert 'scoring_stage_latency_seconds_bucket{model="fraud",stage="total",mode="single",le="+Inf"} 2' in text
+    assert 'scoring_validation_errors_total{model="fraud"} 1' in text
+    for off in ("0", "false", ""):
+        plain = client.post("/predict/fraud", json=payload, headers={"X-Profile": off})
+        assert "X-Profile-Path" not in plain.headers
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _profiled_work() -> None:
+    _spin(0.1)
+
+
+def test_profiler_samples_only_the_profiled_thread():
+    stop = threading.Event()
+    other = threading.Thread(target=lambda: [_spin(0.001) for _ in iter(stop.is_set, True)])
+    other.start()
+    try:
+        with SamplingProfiler(interval_ms=1.0) as profiler:
+            profiler.call(_profiled_work)
+    finally:
+        stop.set()
+        other.join()
+    assert profiler.samples > 0
+    assert all("_profiled_work" in stack for stack in profiler.stacks)
+
+
+def test_credit_payload_looks_up_merchant_risk(monkeypatch, fraud_model_path):
+    frame = pd.DataFrame(
+        {"merchant_category": ["travel"] * 4 + ["grocery"] * 4, "label_proxy": [1, 1, 1, 0, 0, 0, 0, 1]}
+    )
+    bundle = ModelBundle(fraud_model_path, threshold=0.55, name="credit")
+    bundle.merchant_risk = TargetEncodingTable.fit(frame, "merchant_category", "label_proxy", smoothing=2.0)
+    monkeypatch.setattr(service, "credit_model", bundle)
+    request = CreditRiskRequest(
+        customer_id="L1", monthly_income=50_000, monthly_emi=10_000, credit_limit=100_000, credit_used=20_000,
+        bureau_score=700, dpd_m1=0, dpd_m2=0, dpd_m3=0, loan_tenure_months=24, merchant_category="travel",
+    )  # fmt: skip
+    payload = service._credit_payload(request)
+    assert payload["merchant_risk_score"] == pytest.approx((3 + 2 * 0.5) / (4 + 2))
+    assert bundle.info()["merchant_risk"]["version"] == 1
+
+
+def test_retried_request_is_served_from_cache_until_reload(monkeypatch, fraud_model_path, fraud_frame):
+    monkeypatch.setattr(service, "fraud_model", ModelBundle(fraud_model_path, threshold=0.6, name="fraud"))
+    monkeypatch.setattr(service, "velocity_store", service.VelocityFeatureStore())
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    payload["transaction_ts"] = "2024-05-01T10:00:00"
+    client = TestClient(app)
+    first = client.post("/predict/fraud", json=payload).json()
+    assert client.post("/predict/fraud", json=payload).json() == first
+    assert service.score_caches["fraud"].stats()["hits"] == 1
+    # The retry did not count as a second transaction.
+    as_of = pd.Timestamp("2024-05-01T10:30:00").value
+    assert service.velocity_store.query(payload["customer_id"], as_of)["txn_count_1h"] == 1
+
+    service._swap_fraud_model(ModelBundle(fraud_model_path, threshold=0.6, name="fraud"))
+    assert len(service.score_caches["fraud"]) == 0
+
+
+def test_repeated_fraud_payloads_without_timestamp_or_key_are_all_scored(
+    monkeypatch, fraud_model_path, fraud_frame
+):
+    bundle = ModelBundle(fraud_model_path, threshold=0.6, name="fraud")
+    monkeypatch.setattr(service, "fraud_model", bundle)
+    monkeypatch.setattr(service, "velocity_store", service.VelocityFeatureStore())
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    del payload["txn_count_1h"], payload["txn_count_24h"]
+    client = TestClient(app)
+    hits = service.score_caches["fraud"].stats()["hits"]
+    # A card-testing burst: identical charges with no timestamp must each count and be scored.
+    for _ in range(3):
+        assert client.post("/predict/fraud", json=payload).status_code == 200
+    assert service.score_caches["fraud"].stats()["hits"] == hits
+    assert service.velocity_store.query(payload["customer_id"])["txn_count_1h"] == 3
+
+    # With an idempotency key, a retry of the same charge is served from the cache.
+    headers = {"Idempotency-Key": "charge-1"}
+    first = client.post("/predict/fraud", json=payload, headers=headers).json()
+    assert client.post("/predict/fraud", json=payload, headers=headers).json() == first
+    assert service.score_caches["fraud"].stats()["hits"] == hits + 1
+    other = client.post("/predict/fraud", json=payload, headers={"Idempotency-Key": "charge-2"})
+    assert other.status_code == 200
+    assert service.score_caches["fraud"].stats()["hits"] == hits + 1
+
+
+def test_drift_endpoint_reports_live_psi(
+    monkeypatch, tmp_path, fraud_pipeline, fraud_model_path, fraud_frame
+):
+    reference = fraud_frame.drop(columns=["is_fraud"])
+    bins = build_reference_bins(reference)
+    bins[SCORE_FEATURE] = build_score_bins(fraud_pipeline, reference)
+    bins_path = tmp_path / "fraud_reference_bins.joblib"
+    save_reference_bins(bins, bins_path)
+    bundle = ModelBundle(fraud_model_path, threshold=0.6, reference_bins_path=str(bins_path))
+    bundle.warm_up()
+    monkeypatch.setattr(service, "fraud_model", bundle)
+
+    client = TestClient(app)
+    payloads = fraud_payloads(fraud_frame.head(40))
+    for payload in payloads[:10]:
+        payload["amount"] *= 20  # far above anything seen in training
+        assert client.post("/predict/fraud", json=payload).status_code == 200
+    assert client.post("/predict/fraud/batch", json=payloads[10:]).status_code == 200
+
+    body = client.get("/drift", params={"window": "5m"}).json()
+    assert body["credit"] is None
+    window = body["fraud"]["windows"]["5m"]
+    assert window["n_rows"] == 40  # warm-up predictions are not counted
+    assert window["features"]["amount"]["psi"] > window["features"]["transaction_hour"]["psi"]
+    assert window["score"] is not None
+    assert not window["alerts"]  # 40 rows is below drift.min_rows
+    assert client.get("/drift", params={"window": "2d"}).status_code == 404
+
+
+def test_global_explanations_endpoint_serves_matching_summary(
+    monkeypatch, tmp_path, fraud_model_path, fraud_frame
+):
+    summary_path = build_compliance_pack(
+        fraud_model_path,
+        fraud_frame.drop(columns=["is_fraud"]),
+        fraud_frame["is_fraud"],
+        tmp_path,
+        "fraud",
+        max_rows=100,
+        min_per_class=30,
+    )
+    bundle = ModelBundle(fraud_model_path, compliance_summary_path=str(summary_path))
+    monkeypatch.setattr(service, "fraud_model", bundle)
+
+    client = TestClient(app)
+    body = client.get("/explanations/global", params={"top_n": 3}).json()
+    assert body["credit"] is None
+    assert body["fraud"]["version"] == bundle.version
+    assert body["fraud"]["n_rows"] == 100
+    assert len(body["fraud"]["global_importance"]) == 3
+    assert set(body["fraud"]["segments"]["label"]) == {"0", "1"}
+
+    # A summary written for another model version is not served.
+    summary_path.write_text(summary_path.read_text().replace(bundle.version, "0" * 12))
+    assert client.get("/explanations/global").json()["fraud"] is None
+
+
+def test_scored_requests_are_written_to_decision_log(
+    monkeypatch, tmp_path, fraud_model_path, fraud_frame
+):
+    log = DecisionLog(tmp_path / "decisions")
+    bundle = ModelBundle(fraud_model_path, threshold=0.6, name="fraud", decision_log=log)
+    bundle.warm_up()
+    monkeypatch.setattr(service, "fraud_model", bundle)
+    monkeypatch.setattr(service, "decision_log", log)
+    snapshot = str(tmp_path / "velocity.joblib")
+    monkeypatch.setitem(service.cfg["feature_store"], "snapshot_path", snapshot)
+    payloads = fraud_payloads(fraud_frame.head(5))
+    with TestClient(app) as client:
+        headers = {"Idempotency-Key": "charge-1"}
+        single = client.post("/predict/fraud", json=payloads[0], headers=headers).json()
+        retry = client.post("/predict/fraud", json=payloads[0], headers=headers)
+        assert retry.json() == single  # cache hit
+        assert client.post("/predict/fraud/batch", json=payloads[1:]).status_code == 200
+        assert client.get("/model-info").json()["decision_log"]["running"]
+
+    # Shutdown drained the queue; warm-up and the cached retry were not logged.
+    records = list(read_decisions(tmp_path / "decisions"))
+    assert [r["mode"] for r in records] == ["single"] + ["batch"] * 4
+    assert records[0]["version"] == bundle.version
+    assert records[0]["request"]["customer_id"] == payloads[0]["customer_id"]
+    assert {k: records[0][k] for k in ("score", "threshold", "decision")} == {
+        k: single[k] for k in ("score", "threshold", "decision")
+    }
+    assert records[0]["explanation"] == single["explanation"]
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_validation.validator import SchemaContractError
+from src.explainability.shap_explainer import CachedExplainer
+from src.inference.batch_scoring import score_table
+
+
+@pytest.fixture
+def fraud_input(tmp_path, fraud_frame):
+    frame = fraud_frame.drop(columns=["is_fraud"]).assign(txn_ref=np.arange(len(fraud_frame)))
+    path = tmp_path / "transactions"
+    path.mkdir()
+    for i, start in enumerate(range(0, len(frame), 150)):
+        frame.iloc[start : start + 150].to_parquet(path / f"part-{i}.parquet", index=False)
+    return frame, path
+
+
+def _scorer_kwargs(model_path):
+    return {
+        "task": "fraud",
+        "model_path": model_path,
+        "threshold": 0.6,
+        "top_n": 2,
+        "keep_columns": ["txn_ref"],
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_score_table_matches_pipeline(
+    tmp_path, fraud_input, fraud_pipeline, fraud_model_path, workers
+):
+    frame, path = fraud_input
+    kwargs = _scorer_kwargs(fraud_model_path)
+    result = score_table(str(path), str(tmp_path / "scores"), kwargs, chunksize=64, workers=workers)
+    scored = pd.read_parquet(tmp_path / "scores")
+    assert result.n_rows == len(frame) == len(scored)
+    assert result.n_parts == 8  # 64-row chunks of each 150-row input part
+    np.testing.assert_array_equal(scored["row_id"], np.arange(len(frame)))
+    np.testing.assert_array_equal(scored["txn_ref"], frame["txn_ref"])
+
+    expected = fraud_pipeline.predict_proba(frame)[:, 1]
+    np.testing.assert_allclose(scored["score"], expected)
+    assert (scored["decision"] == np.where(expected >= 0.6, "high_risk", "low_risk")).all()
+    assert result.n_flagged == int((expected >= 0.6).sum())
+
+    explainer = CachedExplainer(fraud_pipeline)
+    contrib = explainer.contributions(fraud_pipeline.named_steps["prep"].transform(frame.head(20)))
+    for row, (_, out) in zip(contrib, scored.head(20).iterrows()):
+        top = np.argsort(-row, kind="stable")[:2]
+        expected_codes = [explainer.feature_names[j] if row[j] > 0 else None for j in top]
+        assert [out["reason_1"], out["reason_2"]] == expected_codes
+
+
+def test_score_table_resumes_missing_parts(tmp_path, fraud_input, fraud_model_path):
+    _, path = fraud_input
+    out = tmp_path / "scores"
+    kwargs = _scorer_kwargs(fraud_model_path)
+    score_table(str(path), str(out), kwargs, chunksize=100)
+    first = pd.read_parquet(out)
+    kept = out / "part-000000.parquet"
+    kept_mtime = kept.stat().st_mtime_ns
+    (out / "part-000002.parquet").unlink()  # as if the run died before writing it
+
+    result = score_table(str(path), str(out), kwargs, chunksize=100)
+    assert result.resumed_parts == result.n_parts - 1
+    assert kept.stat().st_mtime_ns == kept_mtime
+    pd.testing.assert_frame_equal(pd.read_parquet(out), first)
+
+    with pytest.raises(ValueError, match="different settings"):
+        score_table(str(path), str(out), {**kwargs, "threshold": 0.5}, chunksize=100)
+
+
+def test_score_table_does_not_resume_after_merchant_table_changes(
+    tmp_path, fraud_input, fraud_model_path
+):
+    _, path = fraud_input
+    out, table = tmp_path / "scores", tmp_path / "merchant_risk.joblib"
+    table.write_bytes(b"v1")
+    kwargs = {**_scorer_kwargs(fraud_model_path), "merchant_risk_path": str(table)}
+    score_table(str(path), str(out), kwargs, chunksize=100)
+    table.write_bytes(b"v2")  # refreshed in place, same path
+    with pytest.raises(ValueError, match="different settings"):
+        score_table(str(path), str(out), kwargs, chunksize=100)
+
+
+def test_score_table_rejects_input_without_model_columns(tmp_path, fraud_frame, fraud_model_path):
+    path = tmp_path / "transactions.csv"
+    fraud_frame.drop(columns=["txn_count_1h"]).to_csv(path, index=False)
+    with pytest.raises(SchemaContractError, match="txn_count_1h"):
+        score_table(str(path), str(tmp_path / "scores"), _scorer_kwargs(fraud_model_path))
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+from src.inference.compiled_scorer import PARITY_TOLERANCE, CompiledScorer
+from src.model_training.train import _build_preprocessor
+from tests.synthetic import fraud_payloads
+
+
+def _edge_payloads(fraud_frame):
+    payloads = fraud_payloads(fraud_frame.head(50))
+    payloads[0]["amount"] = np.nan
+    payloads[1]["merchant_category"] = "unseen_category"
+    payloads[2]["merchant_category"] = np.nan
+    return payloads
+
+
+def _assert_parity(pipe, payloads):
+    scorer = CompiledScorer.from_pipeline(pipe)
+    assert scorer is not None
+    compiled = np.array([scorer.score(p) for p in payloads])
+    expected = pipe.predict_proba(pd.DataFrame(payloads))[:, 1]
+    assert np.max(np.abs(compiled - expected)) < PARITY_TOLERANCE
+
+
+def test_compiled_scorer_matches_logreg_pipeline(fraud_pipeline, fraud_frame):
+    _assert_parity(fraud_pipeline, _edge_payloads(fraud_frame))
+
+
+def test_compiled_scorer_matches_random_forest_pipeline(fraud_frame):
+    pipe = Pipeline(
+        [
+            ("prep", _build_preprocessor(fraud_frame, "is_fraud")),
+            ("model", RandomForestClassifier(n_estimators=20, max_depth=5, random_state=42)),
+        ]
+    )
+    pipe.fit(fraud_frame.drop(columns=["is_fraud"]), fraud_frame["is_fraud"])
+    _assert_parity(pipe, _edge_payloads(fraud_frame))
+
+
+def test_compiled_scorer_matches_compact_preprocessor(fraud_frame):
+    # Leave "gaming" too rare for its own column; it and unseen levels share the infrequent one.
+    frame = fraud_frame.copy()
+    gaming = frame.index[frame["merchant_category"] == "gaming"]
+    frame.loc[gaming[3:], "merchant_category"] = "grocery"
+    prep = _build_preprocessor(frame, "is_fraud", compact=True, min_frequency=10)
+    pipe = Pipeline([("prep", prep), ("model", LogisticRegression(max_iter=500))])
+    pipe.fit(frame.drop(columns=["is_fraud"]), frame["is_fraud"])
+    assert prep.named_transformers_["cat"].named_steps["encoder"].infrequent_categories_[0] is not None
+    payloads = _edge_payloads(frame)
+    payloads[3]["merchant_category"] = "gaming"
+    _assert_parity(pipe, payloads)
+
+
+@pytest.mark.parametrize("with_mean, with_std", [(False, True), (True, False), (False, False)])
+def test_compiled_scorer_honours_scaler_flags(fraud_frame, with_mean, with_std):
+    prep = _build_preprocessor(fraud_frame, "is_fraud")
+    scaler = prep.transformers[0][1].named_steps["scaler"]
+    scaler.set_params(with_mean=with_mean, with_std=with_std)
+    pipe = Pipeline([("prep", prep), ("model", LogisticRegression(max_iter=500))])
+    pipe.fit(fraud_frame.drop(columns=["is_fraud"]), fraud_frame["is_fraud"])
+    _assert_parity(pipe, _edge_payloads(fraud_frame))
+
+
+def test_compiled_scorer_rejects_unsupported_steps(fraud_pipeline):
+    pipe = Pipeline([("prep", FunctionTransformer()), ("model", fraud_pipeline.named_steps["model"])])
+    assert CompiledScorer.from_pipeline(pipe) is None
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.explainability.compliance_pack import (
+    build_compliance_pack,
+    load_compliance_pack,
+    load_compliance_summary,
+    stratified_sample,
+)
+from src.explainability.shap_explainer import CachedExplainer
+from src.utils.io import file_digest
+
+
+def test_stratified_sample_keeps_rare_class_and_reweights():
+    labels = np.array([0] * 1000 + [1] * 20)
+    rows, weights = stratified_sample(labels, max_rows=100, min_per_class=30)
+    assert len(rows) == 100
+    assert (labels[rows] == 1).sum() == 20
+    assert np.all(np.diff(rows) > 0)
+    np.testing.assert_allclose(weights.sum(), len(labels))
+    np.testing.assert_allclose(weights[labels[rows] == 1], 1.0)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compliance_pack_matches_explainer(
+    tmp_path, fraud_frame, fraud_pipeline, fraud_model_path, workers
+):
+    X = fraud_frame.drop(columns=["is_fraud"])
+    summary_path = build_compliance_pack(
+        fraud_model_path,
+        X,
+        fraud_frame["is_fraud"],
+        tmp_path,
+        "fraud",
+        max_rows=200,
+        min_per_class=40,
+        segment_columns=["merchant_category", "not_a_column"],
+        min_segment_rows=30,
+        workers=workers,
+    )
+    pack = load_compliance_pack(tmp_path / "fraud_shap_pack.npz")
+    summary = load_compliance_summary(summary_path)
+    assert pack["shap_values"].dtype == np.float16
+    assert summary["model_version"] == str(pack["model_version"]) == file_digest(fraud_model_path)
+
+    explainer = CachedExplainer(fraud_pipeline)
+    rows = pack["row_position"]
+    prepped = fraud_pipeline.named_steps["prep"].transform(X.iloc[rows])
+    expected = explainer.contributions(prepped)
+    np.testing.assert_allclose(pack["shap_values"], expected, rtol=2e-3, atol=1e-3)
+    np.testing.assert_allclose(
+        pack["shap_values"].sum(axis=1) + pack["base_value"],
+        fraud_pipeline.named_steps["model"].decision_function(prepped),
+        atol=2e-2,
+    )
+    assert list(pack["feature_names"]) == summary["feature_names"] == explainer.feature_names
+    assert (pack["label"] == 1).sum() >= 40
+    np.testing.assert_allclose(pack["weight"].sum(), len(fraud_frame), rtol=1e-5)
+
+    importance = summary["global_importance"]
+    mean_abs = [row["mean_abs_shap"] for row in importance]
+    assert mean_abs == sorted(mean_abs, reverse=True)
+    weighted = np.average(np.abs(expected), axis=0, weights=pack["weight"])
+    assert importance[0]["feature"] == explainer.feature_names[int(np.argmax(weighted))]
+    assert set(summary["segments"]) == {"label", "merchant_category"}
+    assert set(summary["segments"]["label"]) == {"0", "1"}
+    levels = set(pack["segment__merchant_category"])
+    assert levels == set(summary["segments"]["merchant_category"])
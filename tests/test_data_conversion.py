@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion.convert import apply_dtypes, convert_all, downcast_frame, plan_dtypes
+from src.utils.io import iter_table_chunks, read_table
+
+
+def _raw_frame(n: int = 1000) -> pd.DataFrame:
+    rng = np.random.default_rng(1)
+    amount = rng.gamma(2.0, 100.0, n).round(2)
+    amount[::50] = np.nan
+    return pd.DataFrame(
+        {
+            "txn_id": np.arange(n) + 3_000_000,
+            "hour": rng.integers(0, 24, n),
+            "dpd": -rng.integers(0, 90, n),
+            "amount": amount,
+            "merchant_category": rng.choice(["fuel", "travel", "grocery"], n),
+            "device_id": [f"dev-{i}" for i in range(n)],
+        }
+    )
+
+
+def test_downcast_frame_picks_smallest_safe_types():
+    out = downcast_frame(_raw_frame(), max_categories=100)
+    assert out["hour"].dtype == np.uint8
+    assert out["dpd"].dtype == np.int8
+    assert out["txn_id"].dtype == np.uint32
+    assert out["merchant_category"].dtype == "category"
+    assert out["device_id"].dtype == object
+    np.testing.assert_allclose(out["amount"], _raw_frame()["amount"], rtol=1e-6)
+
+
+def test_convert_all_writes_partitioned_parquet(tmp_path):
+    raw = tmp_path / "raw" / "ieee"
+    raw.mkdir(parents=True)
+    df = _raw_frame()
+    df.to_csv(raw / "train_transaction.csv", index=False)
+    (table,) = convert_all(tmp_path / "raw", tmp_path / "processed", chunksize=300)
+    assert len(list(table.glob("part-*.parquet"))) == 4
+
+    loaded = read_table(table, columns=["hour", "merchant_category"])
+    assert list(loaded.columns) == ["hour", "merchant_category"]
+    assert loaded["merchant_category"].dtype == "category"
+    assert (loaded["hour"].to_numpy() == df["hour"].to_numpy()).all()
+    assert sum(len(c) for c in iter_table_chunks(table, ["amount"], chunksize=250)) == len(df)
+
+
+def test_columns_that_change_kind_mid_scan_keep_their_values(tmp_path):
+    raw = tmp_path / "raw" / "ieee"
+    raw.mkdir(parents=True)
+    code = ["1", "2", "", "2", "a", "1.0"]  # numbers (one chunk with a gap), then strings
+    df = pd.DataFrame({"code": code, "flag": [True, False] * 3, "n": range(6)})
+    df.to_csv(raw / "train_transaction.csv", index=False)
+    (table,) = convert_all(tmp_path / "raw", tmp_path / "processed", chunksize=3)
+
+    loaded = read_table(table)
+    assert loaded["flag"].dtype == bool
+    assert loaded["flag"].tolist() == [True, False] * 3
+    assert loaded["code"].dtype == "category"
+    assert loaded["code"].tolist()[:2] == ["1", "2"] and loaded["code"].isna().sum() == 1
+    assert loaded["code"].tolist()[3:5] == ["2", "a"]
+
+
+def test_mixed_column_with_many_levels_falls_back_to_strings():
+    chunks = [pd.DataFrame({"code": [0, 1, 2, 3]}), pd.DataFrame({"code": ["x0", "x1", "x2"]})]
+    plan = plan_dtypes(chunks, max_categories=3)
+    assert plan["code"] is str
+    out = [apply_dtypes(chunk, plan)["code"].tolist() for chunk in chunks]
+    assert out == [["0", "1", "2", "3"], ["x0", "x1", "x2"]]
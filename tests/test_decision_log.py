@@ -0,0 +1,125 @@
+import time
+
+import numpy as np
+import pytest
+
+from mlops.drift_monitor import run
+from src.drift_detection.reference_bins import (
+    SCORE_FEATURE,
+    build_reference_bins,
+    save_reference_bins,
+)
+from src.inference.decision_log import (
+    DecisionLog,
+    decision_frames,
+    decision_requests,
+    read_decisions,
+    segment_paths,
+)
+
+
+def _records(n: int, model: str = "fraud") -> list[dict]:
+    return [
+        {
+            "ts": 1.7e9 + i,
+            "model": model,
+            "version": "v1",
+            "mode": "single",
+            "request": {"customer_id": f"C{i}", "amount": float(i), "merchant_category": "grocery"},
+            "score": np.float32(i / n),
+            "threshold": 0.6,
+            "decision": "low_risk",
+            "explanation": [],
+        }
+        for i in range(n)
+    ]
+
+
+def test_segments_rotate_and_read_back_in_order(tmp_path):
+    log = DecisionLog(tmp_path, batch_size=50, flush_seconds=0.01, max_segment_mb=0.002)
+    log.start()
+    assert log.extend(_records(2000)) == 2000
+    log.stop()
+    stats = log.stats()
+    assert stats["written"] == 2000 and stats["dropped"] == 0 and stats["write_errors"] == 0
+    assert stats["segments"] > 1 and stats["queued"] == 0
+    assert len(segment_paths(tmp_path)) == stats["segments"]
+    assert not list(tmp_path.glob("*.part"))  # stop publishes the open segment
+    records = list(read_decisions(tmp_path))
+    assert [r["request"]["customer_id"] for r in records] == [f"C{i}" for i in range(2000)]
+    assert records[-1]["score"] == pytest.approx(1999 / 2000)
+
+
+def test_open_segment_is_readable_up_to_last_sync(tmp_path):
+    log = DecisionLog(tmp_path, batch_size=10, flush_seconds=0.01, fsync_seconds=0.0)
+    log.start()
+    try:
+        log.extend(_records(25))
+        deadline = time.monotonic() + 10
+        while len(list(read_decisions(tmp_path, include_open=True))) < 25:
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+        assert segment_paths(tmp_path) == []  # still being written
+    finally:
+        log.stop()
+    assert len(list(read_decisions(tmp_path))) == 25
+
+
+@pytest.mark.parametrize(
+    "overflow, kept",
+    [
+        ("drop_newest", ["C0", "C1", "C2"]),
+        ("drop_oldest", ["C2", "C3", "C4"]),
+        ("block", ["C0", "C1", "C2"]),
+    ],
+)
+def test_full_queue_follows_overflow_policy(tmp_path, overflow, kept):
+    # Without a running writer nothing drains the queue; "block" gives up after its timeout.
+    log = DecisionLog(tmp_path, max_queue=3, overflow=overflow, block_timeout_ms=1)
+    accepted = log.extend(_records(5))
+    assert accepted == (5 if overflow == "drop_oldest" else 3)
+    assert log.stats()["dropped"] == 2
+    log.start()
+    log.stop()
+    assert [r["request"]["customer_id"] for r in read_decisions(tmp_path)] == kept
+
+
+def test_block_policy_waits_for_the_writer(tmp_path):
+    log = DecisionLog(
+        tmp_path, max_queue=10, overflow="block", block_timeout_ms=5000, batch_size=10
+    )
+    log.start()
+    try:
+        assert log.extend(_records(500)) == 500
+    finally:
+        log.stop()
+    assert log.stats()["dropped"] == 0
+    assert len(list(read_decisions(tmp_path))) == 500
+
+
+def test_unknown_overflow_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError, match="overflow"):
+        DecisionLog(tmp_path, overflow="spill")
+
+
+def test_decisions_replay_as_requests_and_drift_frames(tmp_path):
+    log = DecisionLog(tmp_path)
+    log.extend(_records(30) + _records(10, model="credit"))
+    log.start()
+    log.stop()
+    requests = decision_requests(tmp_path, limit=35)
+    assert len(requests) == 35
+    assert requests[0] == {"endpoint": "fraud", "body": _records(1)[0]["request"]}
+    assert {r["endpoint"] for r in requests} == {"fraud", "credit"}
+
+    frames = list(decision_frames(tmp_path, "fraud", chunksize=20))
+    assert [len(f) for f in frames] == [20, 10]
+    assert {"amount", "merchant_category", SCORE_FEATURE} <= set(frames[0].columns)
+
+    reference = build_reference_bins(frames[0][["amount", SCORE_FEATURE]])
+    bins_path = tmp_path / "fraud_reference_bins.joblib"
+    save_reference_bins(reference, bins_path)
+    report = run(None, bins_path=str(bins_path), decisions_dir=str(tmp_path), model="fraud")
+    assert set(report) == {"amount", SCORE_FEATURE}
+    with pytest.raises(ValueError, match="--model"):
+        run(None, bins_path=str(bins_path), decisions_dir=str(tmp_path))
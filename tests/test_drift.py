@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from mlops.drift_monitor import run
+from src.drift_detection.online import OnlineDriftMonitor
+from src.drift_detection.psi import population_stability_index
+from src.drift_detection.reference_bins import (
+    SCORE_FEATURE,
+    DriftAccumulator,
+    build_feature_bins,
+    build_reference_bins,
+    save_reference_bins,
+)
+
+
+def _frames(seed: int = 0):
+    rng = np.random.default_rng(seed)
+    ref = pd.DataFrame(
+        {"amount": rng.gamma(2.0, 1000.0, 5000), "merchant_category": rng.choice(["a", "b", "c"], 5000)}
+    )
+    prod = pd.DataFrame(
+        {
+            "amount": np.clip(rng.gamma(2.0, 1300.0, 5000), ref["amount"].min(), ref["amount"].max()),
+            "merchant_category": rng.choice(["a", "b", "c", "d"], 5000, p=[0.2, 0.3, 0.3, 0.2]),
+        }
+    )
+    return ref, prod
+
+
+def test_chunked_psi_matches_population_stability_index():
+    ref, prod = _frames()
+    acc = DriftAccumulator(build_reference_bins(ref))
+    for start in range(0, len(prod), 700):
+        acc.update(prod.iloc[start : start + 700])
+    report = acc.report()
+    expected = population_stability_index(ref["amount"], prod["amount"])
+    assert abs(report["amount"]["psi"] - expected) < 1e-6
+    assert report["merchant_category"]["kind"] == "categorical"
+    assert report["merchant_category"]["psi"] > 0.1
+
+
+def test_drift_monitor_streams_production_file(tmp_path):
+    ref, prod = _frames()
+    bins_path = tmp_path / "fraud_reference_bins.joblib"
+    save_reference_bins(build_reference_bins(ref), bins_path)
+    prod_path = tmp_path / "prod.csv"
+    prod.to_csv(prod_path, index=False)
+    report = run(str(prod_path), bins_path=str(bins_path), chunksize=1000, report_path=str(tmp_path / "r.json"))
+    assert set(report) == {"amount", "merchant_category"}
+    assert (tmp_path / "r.json").exists()
+
+
+def test_online_monitor_matches_chunked_psi_and_expires_old_slots():
+    ref, prod = _frames()
+    reference = build_reference_bins(ref)
+    reference[SCORE_FEATURE] = build_feature_bins(pd.Series(np.linspace(0, 1, 100), name="s"))
+    now = [1_000.0]
+    monitor = OnlineDriftMonitor(
+        reference, windows={"5m": 300, "1h": 3600}, bucket_seconds=60, clock=lambda: now[0]
+    )
+    prod.loc[::50, "amount"] = np.nan
+    for payload in prod.head(1000).to_dict(orient="records"):
+        monitor.observe(payload, score=0.9)
+    now[0] += 600  # ten minutes later: the first rows have left the 5m window
+    monitor.observe_frame(prod.iloc[1000:], scores=np.full(len(prod) - 1000, 0.9))
+
+    acc = DriftAccumulator(build_reference_bins(ref))
+    acc.update(prod)
+    report = monitor.report(min_rows=100)
+    assert report["1h"]["n_rows"] == len(prod) and report["5m"]["n_rows"] == len(prod) - 1000
+    for name, row in acc.report().items():
+        assert report["1h"]["features"][name]["psi"] == row["psi"]
+    assert report["1h"]["score"]["alert"] and "score" in report["1h"]["alerts"]
@@ -1,6 +1,23 @@
 import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import ks_2samp
+from sklearn.metrics import average_precision_score, roc_auc_score
 
-from src.model_evaluation.evaluate import evaluate_binary_classifier
+from src.model_evaluation.evaluate import (
+    evaluate_binary_classifier,
+    optimize_threshold,
+    threshold_costs,
+    threshold_search_kwargs,
+)
+from src.model_evaluation.segments import (
+    build_layout,
+    evaluate_segments,
+    group_totals,
+    grouped_metrics,
+    segment_labels,
+)
+from src.utils.config import load_yaml
 
 
 def test_evaluation_outputs_metrics():
@@ -9,3 +26,85 @@ def test_evaluation_outputs_metrics():
     result = evaluate_binary_classifier(y_true, proba)
     assert result.roc_auc > 0.8
     assert 0.05 <= result.best_threshold <= 0.95
+
+
+def test_threshold_costs_match_brute_force():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 2000)
+    proba = rng.random(2000).round(2)
+    thresholds = np.unique(np.concatenate([proba, [0.0, 1.5]]))
+    expected = [
+        ((proba < t) & (y_true == 1)).sum() * 10.0 + ((proba >= t) & (y_true == 0)).sum()
+        for t in thresholds
+    ]
+    np.testing.assert_array_equal(threshold_costs(y_true, proba, thresholds), expected)
+
+    _, best_cost = optimize_threshold(y_true, proba, thresholds="distinct")
+    assert best_cost == min(expected)
+
+
+def test_threshold_search_reads_training_config():
+    kwargs = threshold_search_kwargs(load_yaml("configs/training.yaml"))
+    assert kwargs["fn_cost"] == 10.0 and kwargs["fp_cost"] == 1.0
+    assert len(kwargs["thresholds"]) == 91
+
+
+def _segmented_scores(n: int = 3000, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    y_true = rng.integers(0, 2, n)
+    proba = (rng.random(n) * 0.6 + 0.3 * y_true).round(2)  # rounded, so scores tie
+    return y_true, proba, rng.choice(["a", "b", "c"], n).astype(object)
+
+
+def test_grouped_metrics_match_sklearn_per_segment_and_resample():
+    y_true, proba, segment = _segmented_scores()
+    layout = build_layout(proba, {"segment": segment})
+    idx = np.random.default_rng(1).integers(0, len(y_true), len(y_true))
+    # Counting a resample's rows per group must equal the metrics of the materialized resample.
+    for resample, rows in ((None, np.arange(len(y_true))), (idx[None, :], idx)):
+        totals = group_totals(layout, y_true, resample)
+        metrics = grouped_metrics(layout, *totals, threshold=0.5)
+        for j, (_, level) in enumerate(layout.segments):
+            y, p = y_true[rows][segment[rows] == level], proba[rows][segment[rows] == level]
+            assert metrics["roc_auc"][0, j] == pytest.approx(roc_auc_score(y, p))
+            assert metrics["pr_auc"][0, j] == pytest.approx(average_precision_score(y, p))
+            assert metrics["ks"][0, j] == pytest.approx(ks_2samp(p[y == 1], p[y == 0]).statistic)
+            cost = threshold_costs(y, p, [0.5])[0]
+            assert metrics["expected_cost"][0, j] == pytest.approx(cost)
+
+
+def test_evaluate_segments_reports_bootstrap_intervals():
+    y_true, proba, segment = _segmented_scores()
+    segment[:40] = "only_negatives"
+    y_true[:40] = 0
+    kwargs = {"threshold": 0.5, "n_bootstrap": 60, "batch_cells": 50_000, "seed": 3}
+    report = evaluate_segments(y_true, proba, {"segment": segment}, n_jobs=1, **kwargs)
+    assert report == evaluate_segments(y_true, proba, {"segment": segment}, n_jobs=2, **kwargs)
+
+    overall = report["overall"]["all"]
+    assert overall["n_rows"] == len(y_true)
+    assert overall["roc_auc"]["value"] == pytest.approx(roc_auc_score(y_true, proba))
+    for name in ("roc_auc", "pr_auc", "ks", "cost_per_row"):
+        metric = overall[name]
+        assert metric["ci_low"] < metric["value"] < metric["ci_high"]
+    assert sum(c for c in overall["confusion"].values()) == len(y_true)
+    assert report["segment"]["only_negatives"]["roc_auc"] == {
+        "value": None,
+        "ci_low": None,
+        "ci_high": None,
+    }
+
+
+def test_segment_labels_band_and_pool_small_levels():
+    amounts = pd.Series([10.0, 600.0, 600.0, np.nan, 5000.0, 5000.0])
+    bands = segment_labels(amounts, edges=[500, 2000])
+    assert list(bands) == [
+        "(-inf, 500.0]",
+        "(500.0, 2000.0]",
+        "(500.0, 2000.0]",
+        "__missing__",
+        "(2000.0, inf]",
+        "(2000.0, inf]",
+    ]
+    pooled = segment_labels(pd.Series(["a", "a", "b", None]), min_rows=2)
+    assert list(pooled) == ["a", "a", "__other__", "__other__"]
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from xgboost import XGBClassifier
+
+from benchmarks.synthetic import MERCHANTS
+from src.explainability.shap_explainer import CachedExplainer, source_feature_names
+from src.model_training.train import _build_preprocessor
+
+
+def test_source_feature_names_map_one_hot_columns(fraud_pipeline):
+    names = source_feature_names(fraud_pipeline.named_steps["prep"])
+    assert names.count("merchant_category") == len(MERCHANTS)
+    assert names[0] == "amount"
+
+
+def test_linear_explainer_uses_closed_form_and_real_names(fraud_pipeline, fraud_frame):
+    explainer = CachedExplainer(fraud_pipeline, top_n=3)
+    assert explainer.kind == "linear"
+    rows = fraud_frame.drop(columns=["is_fraud"]).head(5)
+    prepped = fraud_pipeline.named_steps["prep"].transform(rows)
+    contrib = explainer.contributions(prepped)
+    logit = fraud_pipeline.named_steps["model"].decision_function(prepped)
+    np.testing.assert_allclose(contrib.sum(axis=1) + explainer.base_value, logit)
+
+    explanations = explainer.explain_frame(rows)
+    assert len(explanations) == 5
+    assert all(e["feature"] in explainer.feature_names for e in explanations[0])
+
+
+def test_linear_attributions_average_to_zero_over_training_data(fraud_pipeline, fraud_frame):
+    explainer = CachedExplainer(fraud_pipeline)
+    X = fraud_pipeline.named_steps["prep"].transform(fraud_frame.drop(columns=["is_fraud"]))
+    contrib = explainer.contributions(X)
+    assert np.abs(contrib[:, explainer.feature_names.index("merchant_category")]).mean() > 0.01
+    np.testing.assert_allclose(contrib.mean(axis=0), 0.0, atol=1e-9)
+    logit = fraud_pipeline.named_steps["model"].decision_function(X)
+    assert explainer.base_value == pytest.approx(logit.mean())
+
+
+def test_tree_explainer_explains_whole_batch(fraud_frame):
+    pipe = Pipeline(
+        [
+            ("prep", _build_preprocessor(fraud_frame, "is_fraud")),
+            ("model", RandomForestClassifier(n_estimators=10, max_depth=4, random_state=42)),
+        ]
+    ).fit(fraud_frame.drop(columns=["is_fraud"]), fraud_frame["is_fraud"])
+    explainer = CachedExplainer(pipe, top_n=2)
+    assert explainer.kind == "tree"
+    explanations = explainer.explain_frame(fraud_frame.drop(columns=["is_fraud"]).head(8))
+    assert len(explanations) == 8
+    assert all(len(e) == 2 and "note" not in e[0] for e in explanations)
+
+
+def test_approximate_tree_contributions_are_additive(fraud_frame):
+    pipe = Pipeline(
+        [
+            ("prep", _build_preprocessor(fraud_frame, "is_fraud")),
+            ("model", RandomForestClassifier(n_estimators=10, max_depth=4, random_state=42)),
+        ]
+    ).fit(fraud_frame.drop(columns=["is_fraud"]), fraud_frame["is_fraud"])
+    explainer = CachedExplainer(pipe)
+    X = pipe.named_steps["prep"].transform(fraud_frame.drop(columns=["is_fraud"]).head(50))
+    exact = explainer.contributions(X)
+    approx = explainer.contributions(X, approximate=True)
+    # Both attribute the same score minus the expected value, just split differently.
+    np.testing.assert_allclose(approx.sum(axis=1), exact.sum(axis=1), atol=1e-6)
+    assert not np.allclose(approx, exact)
+
+
+def test_xgboost_on_csr_is_explained_on_the_matrix_it_scores(fraud_frame):
+    # One-hot zeros are absent from the CSR matrix, which XGBoost reads as missing.
+    frame = fraud_frame.assign(customer_id=[f"C{i % 150}" for i in range(len(fraud_frame))])
+    prep = _build_preprocessor(frame, "is_fraud", compact=True)
+    model = XGBClassifier(n_estimators=30, max_depth=4, random_state=0)
+    pipe = Pipeline([("prep", prep), ("model", model)])
+    pipe.fit(frame.drop(columns=["is_fraud"]), frame["is_fraud"])
+    X = prep.transform(frame.drop(columns=["is_fraud"]).head(50))
+    assert sparse.issparse(X)
+    explainer = CachedExplainer(pipe)
+    margin = model.predict(X, output_margin=True)
+    for approximate in (False, True):
+        contrib = explainer.contributions(X, approximate=approximate)
+        np.testing.assert_allclose(contrib.sum(axis=1) + explainer.base_value, margin, atol=1e-4)
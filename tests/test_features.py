@@ -1,6 +1,16 @@
+import numpy as np
 import pandas as pd
+import pytest
 
-from src.feature_engineering.features import add_credit_features, add_geo_anomaly_feature
+from src.feature_engineering.features import (
+    add_credit_features,
+    add_geo_anomaly_feature,
+    add_transaction_velocity_features,
+    serving_merchant_risk,
+)
+from src.feature_engineering.online_store import VelocityFeatureStore
+from src.feature_engineering.target_encoding import TargetEncodingTable
+from src.feature_engineering.velocity import compute_velocity_features, feature_grid
 
 
 def test_add_geo_anomaly_feature():
@@ -17,8 +27,8 @@ def test_add_geo_anomaly_feature():
     assert out["geo_distance_km"].iloc[0] > 0
 
 
-def test_add_credit_features():
-    df = pd.DataFrame(
+def _credit_frame() -> pd.DataFrame:
+    return pd.DataFrame(
         {
             "monthly_income": [50000],
             "monthly_emi": [10000],
@@ -31,6 +41,184 @@ def test_add_credit_features():
             "label_proxy": [1],
         }
     )
-    out = add_credit_features(df)
+
+
+def test_add_credit_features():
+    out = add_credit_features(_credit_frame())
     assert out["income_to_emi_ratio"].iloc[0] == 5
     assert out["utilization_ratio"].iloc[0] == 0.2
+
+
+def test_online_velocity_store_matches_offline_features(tmp_path):
+    rng = np.random.default_rng(3)
+    n = 3000
+    df = pd.DataFrame(
+        {
+            "customer_id": rng.choice([f"C{i}" for i in range(25)], n),
+            "transaction_ts": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 30 * 24 * 3600, n), unit="s"),
+            "amount": rng.gamma(2.0, 500.0, n).round(2),
+        }
+    )
+    offline = add_transaction_velocity_features(df)
+    store = VelocityFeatureStore()
+    online = store.replay(df)
+    for col in ["txn_count_1h", "txn_count_24h"]:
+        assert (online[col].to_numpy() == offline.loc[df.index, col].to_numpy()).all()
+    np.testing.assert_allclose(online["txn_amount_7d"], offline.loc[df.index, "txn_amount_7d"], rtol=1e-9)
+
+    path = tmp_path / "velocity.joblib"
+    store.snapshot(path)
+    restored = VelocityFeatureStore.load(path)
+    now = int(df["transaction_ts"].max().value)
+    assert restored.query("C1", now) == pytest.approx(store.query("C1", now))
+
+
+def _transactions(n: int, n_customers: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "customer_id": rng.choice([f"C{i}" for i in range(n_customers)], n),
+            # Minute resolution so same-timestamp ties are common.
+            "transaction_ts": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 20 * 24 * 60, n), unit="min"),
+            "amount": rng.gamma(2.0, 500.0, n).round(2),
+            "merchant_category": rng.choice(["grocery", "travel", "fuel", None], n),
+        }
+    )
+    df.loc[rng.random(n) < 0.02, "amount"] = np.nan
+    return df
+
+
+def test_velocity_engine_matches_pandas_rolling():
+    df = _transactions(20_000, 300, seed=5)
+    expected = df.copy().sort_values(["customer_id", "transaction_ts"])
+    grouped = expected.set_index("transaction_ts").groupby("customer_id")["amount"]
+    for name, (agg, window) in {"txn_count_1h": ("count", "1h"), "txn_amount_7d": ("sum", "7d")}.items():
+        rolled = getattr(grouped.rolling(window), agg)().reset_index(level=0, drop=True)
+        expected[name] = rolled.fillna(0).values
+
+    for out in [
+        add_transaction_velocity_features(df),
+        compute_velocity_features(df, n_jobs=2, partition_rows=3_000),
+    ]:
+        assert out.index.equals(expected.index)
+        assert (out["txn_count_1h"].to_numpy() == expected["txn_count_1h"].to_numpy()).all()
+        np.testing.assert_allclose(out["txn_amount_7d"], expected["txn_amount_7d"], rtol=1e-12, atol=1e-9)
+
+
+def test_velocity_engine_aggregations_match_brute_force():
+    df = _transactions(600, 8, seed=9)
+    features = feature_grid(["6h"], ["count", "sum", "mean", "max", "distinct_merchants"])
+    out = compute_velocity_features(df, features, partition_rows=100).reset_index(drop=True)
+    for i, row in out.iterrows():
+        prior = out.iloc[: i + 1]
+        window = prior[
+            (prior["customer_id"] == row["customer_id"])
+            & (prior["transaction_ts"] > row["transaction_ts"] - pd.Timedelta("6h"))
+        ]
+        amounts = window["amount"].dropna()
+        expected = [
+            len(amounts),
+            amounts.sum(),
+            amounts.mean() if len(amounts) else 0.0,
+            amounts.max() if len(amounts) else 0.0,
+            window["merchant_category"].nunique(),
+        ]
+        assert [row[name] for name in features] == pytest.approx(expected)
+
+
+def test_velocity_engine_long_windows_of_heavy_customers():
+    df = _transactions(6_000, 2, seed=13)
+    features = feature_grid(["7d"], ["max", "distinct_merchants"])
+    out = compute_velocity_features(df, features).reset_index(drop=True)
+    rolled = out.set_index("transaction_ts").groupby("customer_id")["amount"].rolling("7d").max()
+    np.testing.assert_array_equal(out["txn_amount_max_7d"], rolled.fillna(0).to_numpy())
+    for i in range(0, len(out), 97):
+        row = out.iloc[i]
+        prior = out.iloc[: i + 1]
+        window = prior[
+            (prior["customer_id"] == row["customer_id"])
+            & (prior["transaction_ts"] > row["transaction_ts"] - pd.Timedelta("7d"))
+        ]
+        assert row["txn_distinct_merchants_7d"] == window["merchant_category"].nunique()
+
+
+def test_merchant_risk_table_smoothing_out_of_fold_and_updates(tmp_path):
+    rng = np.random.default_rng(11)
+    n = 5000
+    df = pd.DataFrame(
+        {
+            "merchant_category": rng.choice(["grocery", "travel", "gaming", None], n),
+            "label_proxy": (rng.random(n) < 0.1).astype(float),
+        }
+    )
+    table = TargetEncodingTable.fit(df, "merchant_category", "label_proxy", smoothing=10.0)
+    grocery = df[df["merchant_category"] == "grocery"]["label_proxy"]
+    expected = (grocery.sum() + 10.0 * table.prior) / (len(grocery) + 10.0)
+    assert table.lookup("grocery") == pytest.approx(expected)
+    assert table.lookup("unseen") == table.lookup(None) == pytest.approx(df["label_proxy"].mean())
+
+    # Out-of-fold: row i is encoded from the other folds only.
+    oof = table.out_of_fold(df)
+    fold = np.random.default_rng(table.seed).permutation(n) % table.n_splits
+    i = int(np.flatnonzero(df["merchant_category"].eq("travel"))[0])
+    others = df[fold != fold[i]]
+    same = others[others["merchant_category"] == "travel"]["label_proxy"]
+    assert oof[i] == pytest.approx((same.sum() + 10.0 * others["label_proxy"].mean()) / (len(same) + 10.0))
+
+    # Incremental updates match a full refit, including levels first seen in the update.
+    head = df.iloc[:3000]
+    tail = pd.concat([df.iloc[3000:], pd.DataFrame({"merchant_category": ["fuel"], "label_proxy": [1.0]})])
+    path = tmp_path / "credit_merchant_risk.joblib"
+    TargetEncodingTable.fit(head, "merchant_category", "label_proxy", smoothing=10.0).save(path)
+    updated = TargetEncodingTable.load(path).update(tail["merchant_category"], tail["label_proxy"])
+    refit = TargetEncodingTable.fit(pd.concat([head, tail]), "merchant_category", "label_proxy", smoothing=10.0)
+    keys = pd.Series(["grocery", "travel", "gaming", "fuel", "unseen"])
+    np.testing.assert_allclose(updated.transform(keys), refit.transform(keys))
+    assert updated.version == 2
+
+
+def test_serving_merchant_risk_is_the_same_for_payloads_and_frames():
+    df = pd.DataFrame(
+        {"merchant_category": ["grocery", "travel", "grocery", "fuel"], "label_proxy": [1, 0, 0, 1]}
+    )
+    table = TargetEncodingTable.fit(df, "merchant_category", "label_proxy", smoothing=1.0)
+    rows = pd.DataFrame({"merchant_category": ["grocery", "unseen", "fuel"]})
+    for merchant_risk in (table, None):
+        vector = serving_merchant_risk(rows, merchant_risk)
+        single = [serving_merchant_risk(row, merchant_risk) for row in rows.to_dict("records")]
+        np.testing.assert_array_equal(vector, single)
+    assert np.isnan(serving_merchant_risk(rows, None)).all()
+    # Serving never falls back to the per-merchant label mean, even when labels are present.
+    served = add_credit_features(_credit_frame().assign(label_proxy=1), serving=True)
+    assert served["merchant_risk_score"].isna().all()
+
+
+def test_velocity_store_evicts_customers_idle_longer_than_the_largest_window():
+    store = VelocityFeatureStore(sweep_every=10)
+    day = int(pd.Timedelta("1d").value)
+    for i in range(10):
+        store.update(f"old{i}", 10.0, i)
+    assert len(store) == 10
+    for i in range(20):  # eight days later: past the 7d window of every "old" customer
+        store.update(f"new{i % 10}", 10.0, 8 * day + i)
+    assert len(store) == 10 and store.evicted == 10
+    assert store.query("old0", 8 * day) == store.query("never-seen", 8 * day)
+    assert store.update("new0", 5.0, 8 * day + 100)["txn_count_1h"] == 3
+
+
+def test_velocity_store_revert_takes_back_one_update():
+    store, reference = VelocityFeatureStore(), VelocityFeatureStore()
+    hour = int(pd.Timedelta("1h").value)
+    for ts, amount in [(0, 10.0), (hour // 2, 20.0), (2 * hour, 30.0)]:
+        store.update("c1", amount, ts)
+        reference.update("c1", amount, ts)
+    # A rejected event, then a late one (stored at the latest time seen), both taken back.
+    store.update("c1", 40.0, 2 * hour + 1)
+    store.update("c1", 50.0, hour)
+    assert store.revert("c1", 50.0, hour) and store.revert("c1", 40.0, 2 * hour + 1)
+    assert not store.revert("c1", 40.0) and not store.revert("c9", 10.0)
+    assert store.query("c1") == reference.query("c1")
+    # The retry counts once.
+    assert store.update("c1", 40.0, 2 * hour + 1) == reference.update("c1", 40.0, 2 * hour + 1)
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from benchmarks.bench_load import compare_to_baseline, load_request_log, summarize
+from benchmarks.synthetic import write_request_log
+
+
+def _report(p95: float, rps: float, errors: int = 0) -> dict:
+    return {
+        "results": {
+            "inprocess": {
+                "single": {"p95_ms": p95, "p99_ms": p95 * 1.2, "throughput_rps": rps, "n_errors": errors}
+            }
+        }
+    }
+
+
+def test_summarize_percentiles_and_throughput():
+    summary = summarize([0.001 * i for i in range(1, 101)], wall_s=2.0, n_items=400)
+    assert summary["n_requests"] == 100
+    assert summary["throughput_rps"] == 50.0
+    assert summary["items_per_s"] == 200.0
+    assert summary["p50_ms"] < summary["p95_ms"] < summary["p99_ms"] <= summary["max_ms"] == 100.0
+
+
+def test_compare_to_baseline_flags_only_regressions_beyond_tolerance():
+    baseline = _report(p95=10.0, rps=100.0)
+    assert compare_to_baseline(_report(p95=11.0, rps=95.0), baseline, tolerance=0.25) == []
+    assert compare_to_baseline(_report(p95=5.0, rps=300.0), baseline, tolerance=0.25) == []
+
+    regressions = compare_to_baseline(_report(p95=20.0, rps=50.0, errors=3), baseline, tolerance=0.25)
+    assert any("p95_ms" in r for r in regressions)
+    assert any("throughput_rps" in r for r in regressions)
+    assert any("errors" in r for r in regressions)
+
+
+def test_request_log_round_trip(tmp_path):
+    path = write_request_log(tmp_path / "requests.jsonl", n_requests=50, fraud_share=0.6)
+    records = load_request_log(path)
+    assert len(records) == 50
+    assert sum(r["endpoint"] == "fraud" for r in records) == 30
+    assert len(load_request_log(path, limit=10)) == 10
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+
+from api.microbatch import MicroBatcher, QueueFullError
+
+
+def _batcher(calls, **kwargs):
+    def predict_many(payloads):
+        calls.append(len(payloads))
+        return [{"echo": p["i"]} for p in payloads]
+
+    return MicroBatcher("test", lambda p: predict_many([p])[0], predict_many, **kwargs)
+
+
+def test_concurrent_requests_are_coalesced_and_routed_back():
+    calls: list[int] = []
+
+    async def scenario():
+        batcher = _batcher(calls, max_batch_size=16, max_wait_ms=20)
+        await batcher.start()
+        results = await asyncio.gather(*(batcher.submit({"i": i}) for i in range(40)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert [r["echo"] for r in results] == list(range(40))
+    assert max(calls) == 16 and len(calls) < 40
+    assert stats["items"] == 40 and stats["rejected"] == 0
+
+
+def test_full_queue_rejects_requests():
+    async def scenario():
+        batcher = _batcher([], max_queue=2)
+        await batcher.start()
+        for task in batcher._tasks:  # keep the queue from draining
+            task.cancel()
+        loop_tasks = [asyncio.create_task(batcher.submit({"i": i})) for i in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await batcher.submit({"i": 99})
+        for task in loop_tasks:
+            task.cancel()
+        return batcher.stats()
+
+    assert asyncio.run(scenario())["rejected"] == 1
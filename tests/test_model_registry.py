@@ -0,0 +1,88 @@
+import os
+
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+
+from api.model_registry import ModelWatcher
+from api.service import ModelBundle
+from src.drift_detection.reference_bins import build_reference_bins, save_reference_bins
+from src.model_training.train import _build_preprocessor
+from src.utils.io import save_joblib
+from tests.synthetic import fraud_payloads
+
+
+def test_watcher_swaps_in_new_artifact_version(fraud_model_path, fraud_frame):
+    active = {"bundle": ModelBundle(fraud_model_path, threshold=0.6, mmap_mode="r")}
+    watcher = ModelWatcher(
+        "fraud",
+        fraud_model_path,
+        loader=lambda: ModelBundle(fraud_model_path, threshold=0.6, mmap_mode="r"),
+        on_swap=lambda bundle: active.update(bundle=bundle),
+        fingerprint=(active["bundle"].fingerprint,),
+    )
+    assert watcher.check_once() is False
+    old = active["bundle"]
+
+    pipe = Pipeline(
+        [
+            ("prep", _build_preprocessor(fraud_frame, "is_fraud")),
+            ("model", RandomForestClassifier(n_estimators=10, random_state=0)),
+        ]
+    ).fit(fraud_frame.drop(columns=["is_fraud"]), fraud_frame["is_fraud"])
+    save_joblib(pipe, fraud_model_path)
+    os.utime(fraud_model_path, ns=(0, old.fingerprint[0] + 1))
+
+    assert watcher.check_once() is True
+    assert active["bundle"] is not old
+    assert active["bundle"].version != old.version
+    payload = fraud_payloads(fraud_frame.head(1))[0]
+    assert old.predict(payload)["score"] != active["bundle"].predict(payload)["score"]
+
+
+def test_watcher_keeps_current_model_when_reload_fails(tmp_path):
+    path = tmp_path / "broken.joblib"
+    path.write_bytes(b"not a pickle")
+    swapped = []
+    watcher = ModelWatcher("fraud", str(path), lambda: ModelBundle(str(path)), swapped.append)
+    assert watcher.check_once() is False
+    assert swapped == [] and watcher.last_error
+
+
+def test_one_watcher_reloads_the_bundle_when_any_source_file_changes(
+    tmp_path, fraud_model_path, fraud_frame
+):
+    bins_path = tmp_path / "fraud_reference_bins.joblib"
+    X = fraud_frame.drop(columns=["is_fraud"])
+    save_reference_bins(build_reference_bins(X), bins_path)
+    paths = [fraud_model_path, str(bins_path)]
+
+    def rewrite_bins() -> None:
+        stat = os.stat(bins_path)
+        save_reference_bins(build_reference_bins(X.head(500)), bins_path)
+        os.utime(bins_path, ns=(0, stat.st_mtime_ns + 1))
+
+    loads = []
+
+    def loader():
+        loads.append(1)
+        if len(loads) == 2:
+            rewrite_bins()  # training writes the next bins while this reload is loading
+        return ModelBundle(fraud_model_path, reference_bins_path=str(bins_path))
+
+    active = {"bundle": loader()}
+    watcher = ModelWatcher(
+        "fraud",
+        paths,
+        loader,
+        on_swap=lambda bundle: active.update(bundle=bundle),
+        fingerprint=active["bundle"].source_fingerprint(paths),
+    )
+    assert watcher.check_once() is False
+
+    rewrite_bins()
+    assert watcher.check_once() is True
+    # The bins changed mid-load, so the swapped bundle may be stale: the next poll reloads again.
+    assert watcher.check_once() is True
+    assert watcher.check_once() is False
+    assert watcher.reloads == 2
+    assert active["bundle"].source_fingerprint(paths) == watcher.current_fingerprint()
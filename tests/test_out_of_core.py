@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.model_training.out_of_core import (
+    ChunkSource,
+    fit_streamed_preprocessor,
+    hash_split,
+    scan_training_data,
+    train_out_of_core,
+)
+from src.model_training.train import _build_preprocessor
+from src.utils.io import load_joblib
+
+
+@pytest.fixture
+def fraud_parquet(tmp_path, fraud_frame):
+    frame = fraud_frame.assign(txn_id=np.arange(len(fraud_frame)))
+    frame.loc[::7, "amount"] = np.nan
+    path = tmp_path / "fraud"
+    path.mkdir()
+    for i, start in enumerate(range(0, len(frame), 100)):
+        frame.iloc[start : start + 100].to_parquet(path / f"part-{i}.parquet", index=False)
+    return frame, path
+
+
+def test_hash_split_is_independent_of_chunking(fraud_parquet):
+    frame, path = fraud_parquet
+    whole = hash_split(frame, 0.25, ["txn_id"])
+    source = ChunkSource(path, chunksize=37, test_size=0.25, split_key=["txn_id"])
+    chunked = np.concatenate([test for _, test, _ in source.chunks()])
+    assert np.array_equal(whole, chunked)
+    assert 0.15 < whole.mean() < 0.35
+
+
+def test_whole_row_split_is_unchanged_across_csv_chunk_sizes(tmp_path, fraud_frame):
+    # device_change_flag parses as int64 in chunks without a gap and as float64 in the one with.
+    frame = fraud_frame.astype({"device_change_flag": "Int64"})  # written as "1", "0" and ""
+    frame.loc[150, "device_change_flag"] = pd.NA
+    path = tmp_path / "fraud.csv"
+    frame.to_csv(path, index=False)
+    masks = [
+        np.concatenate([test for _, test, _ in ChunkSource(path, chunksize=size).chunks()])
+        for size in (len(frame), 100, 37)
+    ]
+    assert all(np.array_equal(masks[0], mask) for mask in masks[1:])
+    assert 0.1 < masks[0].mean() < 0.3
+
+
+def test_streamed_preprocessor_matches_in_memory_fit(fraud_parquet):
+    frame, path = fraud_parquet
+    source = ChunkSource(path, chunksize=50, split_key=["txn_id"])
+    stats = scan_training_data(source, "is_fraud", sample_rows=len(frame))
+    train = frame[~hash_split(frame, 0.2, ["txn_id"])]
+    assert stats.n_train == len(train)
+
+    streamed = fit_streamed_preprocessor(stats, {"compact": True})
+    expected = _build_preprocessor(train, "is_fraud", compact=True)
+    expected.fit(train.drop(columns=["is_fraud"]))
+    X = frame.drop(columns=["is_fraud"]).head(20)
+    np.testing.assert_allclose(streamed.transform(X), expected.transform(X), rtol=1e-4, atol=1e-5)
+
+
+@pytest.mark.parametrize("external_memory", [True, False])
+def test_train_out_of_core_saves_servable_pipeline(
+    tmp_path, monkeypatch, fraud_parquet, external_memory
+):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", (tmp_path / "mlruns").as_uri())
+    frame, path = fraud_parquet
+    source = ChunkSource(path, chunksize=64, split_key=["txn_id"])
+    stats = scan_training_data(source, "is_fraud", sample_rows=100)
+    artifacts = train_out_of_core(
+        source,
+        stats,
+        "test-exp",
+        str(tmp_path),
+        "fraud",
+        epochs=2,
+        xgboost={"num_boost_round": 20, "max_depth": 3, "external_memory": external_memory},
+    )
+    assert set(artifacts.auc_scores) == {"sgd", "xgboost"}
+    pipe = load_joblib(artifacts.model_path)
+    proba = pipe.predict_proba(pd.DataFrame(frame.drop(columns=["is_fraud"]).head(5)))
+    assert proba.shape == (5, 2)
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from api.score_cache import ScoreCache, cache_key
+
+
+def test_cache_key_is_canonical_and_versioned():
+    payload = {"amount": 10.0, "customer_id": "C1"}
+    same = {"customer_id": "C1", "amount": 10.0}
+    assert cache_key("fraud", payload, "v1") == cache_key("fraud", same, "v1")
+    assert cache_key("fraud", payload, "v1") != cache_key("fraud", payload, "v2")
+    assert cache_key("fraud", payload, "v1") != cache_key("credit", payload, "v1")
+
+
+def test_lru_and_ttl_eviction(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("api.score_cache.time.time", lambda: now[0])
+    cache = ScoreCache(max_entries=2, ttl_seconds=5)
+    cache.put("a", {"score": 1})
+    cache.put("b", {"score": 2})
+    assert cache.get("a") == {"score": 1}  # "a" is now most recently used
+    cache.put("c", {"score": 3})
+    assert cache.get("b") is None and cache.get("a") is not None
+    now[0] += 6
+    assert cache.get("c") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (2, 2, 1, 1)
+
+
+def test_shared_tier_is_visible_to_other_workers(tmp_path):
+    writer = ScoreCache(ttl_seconds=30, shared_dir=str(tmp_path))
+    reader = ScoreCache(ttl_seconds=30, shared_dir=str(tmp_path))
+    writer.put("k", {"score": 0.7})
+    assert reader.get("k") == {"score": 0.7}
+    assert reader.get("k") == {"score": 0.7}
+    assert reader.stats()["shared_hits"] == 1 and reader.stats()["hits"] == 1
+    reader.clear()
+    assert reader.get("missing") is None
@@ -0,0 +1,131 @@
+import json
+import multiprocessing
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from scipy import sparse
+from sklearn.base import BaseEstimator, ClassifierMixin
+
+from src.model_training.train import _build_preprocessor, train_and_select
+from src.model_training.tuning import successive_halving
+from src.utils.io import load_joblib
+
+
+@pytest.fixture(autouse=True)
+def _local_mlflow(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", (tmp_path / "mlruns").as_uri())
+
+
+def test_train_and_select_trains_candidates_in_parallel(tmp_path, fraud_frame):
+    artifacts = train_and_select(
+        fraud_frame, "is_fraud", "test-exp", str(tmp_path), "fraud", n_workers=2, backend="threading"
+    )
+    assert set(artifacts.fit_seconds) == set(artifacts.auc_scores)
+    assert all(seconds > 0 for seconds in artifacts.fit_seconds.values())
+    assert len(artifacts.holdout_rows) == len(fraud_frame) // 5
+    pipe = load_joblib(artifacts.model_path)
+    assert pipe.predict_proba(fraud_frame.drop(columns=["is_fraud"]).head(5)).shape == (5, 2)
+
+
+def test_tuned_training_saves_best_config(tmp_path, fraud_frame):
+    tuning = {
+        "metric": "pr_auc",
+        "budget_seconds": 60,
+        "n_workers": 1,
+        "backend": "thread",
+        "n_trials": 4,
+        "eta": 2,
+        "min_fraction": 0.25,
+        "early_stopping_rounds": 5,
+        "search_space": {
+            "logreg": {"C": {"log_uniform": [0.01, 10.0]}},
+            "xgboost": {"n_estimators": 200, "max_depth": {"int": [2, 4]}},
+        },
+    }
+    artifacts = train_and_select(
+        fraud_frame, "is_fraud", "test-exp", str(tmp_path), "fraud", tuning=tuning
+    )
+    config = json.loads(Path(artifacts.best_config_path).read_text())
+    assert config["model"] == artifacts.best_model_name
+    scores = artifacts.pr_auc_scores
+    assert artifacts.best_model_name == max(scores, key=scores.get)
+    assert config["search"]["trials"] >= 8
+    # random_forest has no search space, so it keeps its defaults instead of being dropped.
+    assert config["search"]["families"]["random_forest"]["params"] == {}
+    pipe = load_joblib(artifacts.model_path)
+    assert pipe.predict_proba(fraud_frame.drop(columns=["is_fraud"]).head(5)).shape == (5, 2)
+
+
+def test_compact_preprocessor_outputs_float32_and_caps_levels(fraud_frame):
+    X = fraud_frame.drop(columns=["is_fraud"])
+    prep = _build_preprocessor(fraud_frame, "is_fraud", compact=True, max_categories=3)
+    Xt = prep.fit_transform(X)
+    assert Xt.dtype == np.float32
+    # Six numeric columns plus two kept levels and one infrequent column.
+    assert Xt.shape[1] == 6 + 3
+
+    wide = X.assign(customer_id=[f"C{i}" for i in range(len(X))])
+    prep = _build_preprocessor(wide.assign(is_fraud=0), "is_fraud", compact=True)
+    Xt = prep.fit_transform(wide)
+    assert sparse.isspmatrix_csr(Xt) and Xt.dtype == np.float32
+
+
+@pytest.mark.parametrize("backend", ["threading", "loky"])
+def test_compact_training_reports_stage_memory(tmp_path, fraud_frame, backend):
+    artifacts = train_and_select(
+        fraud_frame,
+        "is_fraud",
+        "test-exp",
+        str(tmp_path),
+        "fraud",
+        n_workers=2,
+        backend=backend,
+        preprocessing={"compact": True, "min_frequency": 10},
+    )
+    assert list(artifacts.stage_memory_mb) == ["load", "preprocess", "fit", "save"]
+    assert all(stage["peak_rss_mb"] > 0 for stage in artifacts.stage_memory_mb.values())
+    assert "train_matrix_mb" in artifacts.stage_memory_mb["preprocess"]
+    # Worker processes report their own peak; threads are covered by the process peak.
+    worker_peak = artifacts.stage_memory_mb["fit"]["worker_peak_rss_mb"]
+    assert (worker_peak > 0) == (backend == "loky")
+    pipe = load_joblib(artifacts.model_path)
+    assert pipe.predict_proba(fraud_frame.drop(columns=["is_fraud"]).head(5)).shape == (5, 2)
+
+
+class _SlowClassifier(ClassifierMixin, BaseEstimator):
+    def __init__(self, seconds: float = 30.0):
+        self.seconds = seconds
+
+    def fit(self, X, y):
+        time.sleep(self.seconds)
+        self.classes_ = np.unique(y)
+        return self
+
+    def predict_proba(self, X):
+        return np.full((X.shape[0], 2), 0.5)
+
+
+def test_search_stops_running_trials_at_the_budget():
+    rng = np.random.default_rng(0)
+    X, y = rng.random((200, 3)), np.arange(200) % 2
+    children = set(multiprocessing.active_children())  # e.g. loky workers left by other tests
+    start = time.perf_counter()
+    result = successive_halving(
+        {"slow": _SlowClassifier()},
+        {"slow": {}},
+        X,
+        y,
+        X,
+        y,
+        n_trials=2,
+        budget_seconds=1.0,
+        n_workers=2,
+        backend="process",
+    )
+    assert time.perf_counter() - start < 5  # not the 30s the running trials would take
+    assert result.budget_exhausted and result.best == {}
+    # The pool's workers were killed, not left running the trials.
+    assert set(multiprocessing.active_children()) <= children
+    assert result.peak_rss_mb > 0  # measured from the killed workers
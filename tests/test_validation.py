@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_validation.validator import (
+    SchemaContractError,
+    StreamingValidator,
+    validate_files,
+    validate_frame,
+)
+
+
+def _frame(n: int = 20_000, seed: int = 5) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(
+        {
+            "amount": rng.lognormal(6, 1.2, n).round(2),
+            "score": rng.normal(0, 1, n).round(4),
+            "merchant_category": rng.choice(["fuel", "travel"], n),
+        }
+    )
+    df.loc[::97, "amount"] = np.nan
+    return pd.concat([df, df.iloc[:150]], ignore_index=True)
+
+
+def test_streaming_validator_matches_in_memory_report():
+    df = _frame()
+    exact = validate_frame(df, ["amount", "score"])
+    streaming = StreamingValidator(["amount", "score"])
+    for start in range(0, len(df), 3000):
+        streaming.update(df.iloc[start : start + 3000])
+    report = streaming.report()
+
+    assert report.duplicate_rows == exact.duplicate_rows == 150
+    assert report.missing_ratio == pytest.approx(exact.missing_ratio)
+    for col in ["amount", "score"]:
+        tolerance = report.outlier_error_bounds[col] + 0.01 * len(df)
+        assert abs(report.outlier_counts[col] - exact.outlier_counts[col]) <= tolerance
+
+
+def test_duplicates_are_found_across_chunks_of_different_dtypes():
+    streaming = StreamingValidator(["x"])
+    streaming.update(pd.DataFrame({"x": [1, 2, 3], "k": pd.Categorical(["a", "b", "c"])}))
+    # Same rows 1 and 3, but x parsed as float64 (a NaN) and k as plain strings.
+    streaming.update(pd.DataFrame({"x": [1.0, np.nan, 3.0], "k": ["a", "b", "c"]}))
+    streaming.update(pd.DataFrame({"x": np.array([2, 4], dtype=np.int8), "k": ["b", None]}))
+    assert streaming.report().duplicate_rows == 3
+
+
+def test_validate_files_merges_partitions_and_enforces_contract(tmp_path):
+    df = _frame(4000)
+    df.iloc[:2000].to_csv(tmp_path / "a.csv", index=False)
+    df.iloc[2000:].to_parquet(tmp_path / "b.parquet", index=False)
+    paths = [tmp_path / "a.csv", tmp_path / "b.parquet"]
+    contract = {"amount": "numeric", "merchant_category": "categorical"}
+
+    report = validate_files(paths, ["amount"], contract=contract, n_jobs=2)
+    assert report.duplicate_rows == validate_frame(df, ["amount"]).duplicate_rows
+
+    with pytest.raises(SchemaContractError, match="merchant_category"):
+        validate_files(paths, ["amount"], contract={"merchant_category": "numeric"})